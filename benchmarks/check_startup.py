@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Проверка бюджета времени запуска CLI
+
+Запускает типичные команды без сети, сравнивает время с пустым
+интерпретатором и проверяет, что тяжелые модули не импортируются.
+Завершается с кодом 1, если бюджет превышен.
+
+Запуск:
+    python benchmarks/check_startup.py
+    python benchmarks/check_startup.py --budget-ms 40
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "main.py")
+
+DEFAULT_BUDGET_MS = 60.0  # Допустимая добавка к запуску пустого интерпретатора
+DEFAULT_RUNS = 15
+
+# Команды и модули, которые они не должны загружать
+SCENARIOS: Dict[str, tuple] = {
+    "generate_simple": (["-g", "--simple"],
+                        {"requests", "urllib3", "sqlite3", "password_checker", "breach_index"}),
+    "bulk_stdout": (["--bulk", "10"],
+                    {"requests", "urllib3", "sqlite3", "password_checker", "breach_index"}),
+    "check_no_api": (["-c", "Tr0ub4dor&3", "--no-api", "--simple"],
+                     {"requests", "urllib3", "sqlite3", "breach_index"}),
+}
+
+
+def _run_time(command: List[str], runs: int) -> float:
+    """Лучшее время запуска команды в секундах"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def imported_modules(args: List[str]) -> Set[str]:
+    """Модули, загруженные командой (по выводу python -X importtime)"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", MAIN] + args,
+                               capture_output=True, text=True)
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def measure_startup(runs: int = DEFAULT_RUNS) -> Dict:
+    """Время запуска каждого сценария и добавка к пустому интерпретатору (мс)"""
+    baseline = _run_time([sys.executable, "-c", "pass"], runs)
+    results = {}
+    for name, (args, _) in SCENARIOS.items():
+        elapsed = _run_time([sys.executable, MAIN] + args, runs)
+        results[name] = {
+            "best_ms": elapsed * 1000,
+            "overhead_ms": (elapsed - baseline) * 1000,
+            "interpreter_ms": baseline * 1000,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка бюджета времени запуска CLI")
+    parser.add_argument("--budget-ms", help=f"Допустимая добавка к запуску Python, мс "
+                                            f"(по умолчанию: {DEFAULT_BUDGET_MS:.0f})",
+                        type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", help=f"Число запусков (по умолчанию: {DEFAULT_RUNS})",
+                        type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    failures = []
+    timings = measure_startup(args.runs)
+    for name, (command_args, forbidden) in SCENARIOS.items():
+        loaded = sorted(forbidden & imported_modules(command_args))
+        timing = timings[name]
+        status = "✅" if timing["overhead_ms"] <= args.budget_ms and not loaded else "❌"
+        print(f"{status} {name:16s} {timing['best_ms']:6.1f} мс "
+              f"(+{timing['overhead_ms']:.1f} мс к пустому Python)")
+        if loaded:
+            print(f"   Загружены лишние модули: {', '.join(loaded)}")
+            failures.append(name)
+        elif timing["overhead_ms"] > args.budget_ms:
+            failures.append(name)
+
+    if failures:
+        print(f"\n❌ Бюджет запуска превышен: {', '.join(failures)}")
+        sys.exit(1)
+    print(f"\n✅ Запуск укладывается в бюджет {args.budget_ms:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
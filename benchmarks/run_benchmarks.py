@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Набор бенчмарков анализатора паролей
+
+Запуск:
+    python benchmarks/run_benchmarks.py                      # полный прогон
+    python benchmarks/run_benchmarks.py --quick              # быстрый прогон
+    python benchmarks/run_benchmarks.py -o new.json --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+from async_breach import fetch_ranges  # noqa: E402
+from breach_client import BreachClient  # noqa: E402
+from mock_server import MockRangeServer  # noqa: E402
+from check_startup import measure_startup  # noqa: E402
+from password_checker import (  # noqa: E402
+    check_password,
+    check_password_complexity,
+    check_password_strength_score,
+    check_passwords_breach_batch,
+    check_passwords_from_file,
+)
+
+
+DEFAULT_SEED = 1337
+DEFAULT_THRESHOLD = 0.10  # Замедление больше 10% считается регрессией
+UNLIMITED_RATE = 1e6  # Запросов в секунду: локальному серверу ограничение не нужно
+
+COMPOSITIONS = ("random", "weak", "mixed", "cyrillic")
+
+_WEAK_WORDS = ["password", "qwerty", "dragon", "monkey", "summer", "admin", "letmein",
+               "welcome", "football", "iloveyou", "master", "shadow"]
+_SPECIAL = "!@#$%^&*()-_=+.,?"
+_CYRILLIC = "абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЭЮЯ"
+
+
+# --- Синтетические корпуса ---------------------------------------------
+
+
+def make_corpus(size: int, composition: str = "mixed", seed: int = DEFAULT_SEED) -> List[str]:
+    """
+    Генерирует воспроизводимый корпус паролей заданного размера и состава:
+    random - случайные строки из всех классов символов,
+    weak - словарные слова с цифрами и повторами,
+    mixed - поровну random и weak (с повторами паролей, как в реальных дампах),
+    cyrillic - случайные строки с кириллицей
+    """
+    rnd = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + _SPECIAL
+
+    def strong() -> str:
+        return "".join(rnd.choice(alphabet) for _ in range(rnd.randint(8, 20)))
+
+    def weak() -> str:
+        word = rnd.choice(_WEAK_WORDS)
+        if rnd.random() < 0.5:
+            word = word.capitalize()
+        return word + str(rnd.randint(0, 9999)) * rnd.randint(0, 2)
+
+    def cyrillic() -> str:
+        return "".join(rnd.choice(_CYRILLIC + string.digits)
+                       for _ in range(rnd.randint(6, 16)))
+
+    corpus = []
+    for _ in range(size):
+        if composition == "random":
+            corpus.append(strong())
+        elif composition == "weak":
+            corpus.append(weak())
+        elif composition == "cyrillic":
+            corpus.append(cyrillic())
+        elif corpus and rnd.random() < 0.2:
+            corpus.append(rnd.choice(corpus))  # Повтор уже встречавшегося пароля
+        else:
+            corpus.append(strong() if rnd.random() < 0.5 else weak())
+    return corpus
+
+
+def write_corpus(corpus: List[str], directory: str, name: str) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(corpus) + "\n")
+    return path
+
+
+# --- Локальный сервер диапазонов ----------------------------------------
+
+
+def _serve_ranges(port_queue) -> None:
+    server = MockRangeServer(port=0)
+    port_queue.put(server.port)
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def mock_range_server():
+    """
+    Запускает локальный сервер /range/{prefix} в отдельном процессе,
+    чтобы он не делил GIL с измеряемым кодом
+    """
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_ranges, args=(port_queue,), daemon=True)
+    process.start()
+    try:
+        yield f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+    finally:
+        process.terminate()
+        process.join()
+
+
+# --- Измерения ----------------------------------------------------------
+
+
+def measure(func: Callable[[], object], ops: int, repeat: int) -> Dict:
+    """Запускает func repeat раз; func выполняет ops операций. Время - на одну операцию"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) / ops)
+    best = min(timings)
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "best_us": best * 1e6,
+        "median_us": statistics.median(timings) * 1e6,
+        "ops_per_sec": 1 / best if best else 0.0,
+    }
+
+
+def measure_peak_memory(func: Callable[[], object]) -> float:
+    """Пиковый объем памяти Python-объектов (МБ) во время выполнения func"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def quiet(func: Callable[[], object]) -> Callable[[], object]:
+    """Оборачивает func так, чтобы вывод в консоль не влиял на замеры"""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+
+def run_microbenchmarks(size: int, repeat: int, seed: int) -> Dict:
+    results = {}
+    for composition in COMPOSITIONS:
+        corpus = make_corpus(size, composition, seed)
+
+        results[f"complexity/{composition}"] = measure(
+            lambda: [check_password_complexity(p) for p in corpus], len(corpus), repeat)
+        results[f"strength_score/{composition}"] = measure(
+            lambda: [check_password_strength_score(p) for p in corpus], len(corpus), repeat)
+        results[f"check_password_no_api/{composition}"] = measure(
+            lambda: [check_password(p, use_api=False, verbose=False) for p in corpus],
+            len(corpus), repeat)
+    return results
+
+
+def run_breach_benchmarks(size: int, repeat: int, seed: int, base_url: str) -> Dict:
+    corpus = make_corpus(size, "mixed", seed)
+    results = {}
+
+    with BreachClient(base_url=base_url, verbose=False) as client:
+        results["breach_batch/mock_api"] = measure(
+            quiet(lambda: check_passwords_breach_batch(corpus, client=client)),
+            len(corpus), repeat)
+        # Ограничитель частоты асинхронного движка рассчитан на настоящий API;
+        # здесь он снят, чтобы измерять сам движок, а не паузы
+        prefixes = sorted({hashlib.sha1(p.encode()).hexdigest().upper()[:5] for p in corpus})
+        results["fetch_ranges_async/mock_api"] = measure(
+            quiet(lambda: fetch_ranges(prefixes, concurrency=16, rate=UNLIMITED_RATE,
+                                       client=client)),
+            len(prefixes), repeat)
+    return results
+
+
+def run_file_audit_benchmarks(size: int, repeat: int, seed: int, base_url: str,
+                              directory: str) -> Dict:
+    corpus = make_corpus(size, "mixed", seed)
+    path = write_corpus(corpus, directory, f"audit-{size}.txt")
+    results = {}
+
+    audits = {
+        "file_audit/no_api": lambda: check_passwords_from_file(path, use_api=False),
+        "file_audit_stream/no_api": lambda: check_passwords_from_file(
+            path, use_api=False, stream=True, window=1000),
+    }
+    for name, audit in audits.items():
+        results[name] = measure(quiet(audit), len(corpus), repeat)
+        results[name]["peak_memory_mb"] = measure_peak_memory(quiet(audit))
+
+    with BreachClient(base_url=base_url, verbose=False) as client:
+        audit = quiet(lambda: check_passwords_from_file(path, client=client))
+        results["file_audit/mock_api"] = measure(audit, len(corpus), repeat)
+        results["file_audit/mock_api"]["peak_memory_mb"] = measure_peak_memory(audit)
+
+    return results
+
+
+def run_startup_benchmarks(repeat: int) -> Dict:
+    """Время запуска CLI отдельным процессом (сценарии из check_startup.py)"""
+    results = {}
+    for name, timing in measure_startup(repeat).items():
+        best = timing["best_ms"] / 1000
+        results[f"startup/{name}"] = {
+            "ops": 1,
+            "repeat": repeat,
+            "best_us": best * 1e6,
+            "median_us": best * 1e6,
+            "ops_per_sec": 1 / best,
+            "overhead_ms": timing["overhead_ms"],
+        }
+    return results
+
+
+# --- Сравнение прогонов -------------------------------------------------
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Возвращает список регрессий: бенчмарки, ставшие медленнее порога"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        change = result["best_us"] / base["best_us"] - 1 if base["best_us"] else 0.0
+        marker = "⚠️ " if change > threshold else "  "
+        print(f"{marker}{name:45s} {base['best_us']:10.2f} -> {result['best_us']:10.2f} мкс "
+              f"({change:+.1%})")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки анализатора паролей")
+    parser.add_argument("-o", "--output", help="Сохранить результаты в JSON", metavar="PATH")
+    parser.add_argument("--compare", help="Сравнить с предыдущим прогоном (JSON)",
+                        metavar="BASELINE")
+    parser.add_argument("--threshold", help="Порог регрессии (по умолчанию: 0.10)",
+                        type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--quick", help="Маленькие корпуса для быстрой проверки",
+                        action="store_true")
+    parser.add_argument("--seed", help="Зерно генератора корпусов", type=int,
+                        default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    micro_size, breach_size, audit_size, repeat = (
+        (2000, 500, 2000, 3) if args.quick else (20000, 5000, 50000, 5)
+    )
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "quick": args.quick,
+            "corpus_sha1": hashlib.sha1(
+                "\n".join(make_corpus(100, "mixed", args.seed)).encode()
+            ).hexdigest(),
+        },
+        "results": {},
+    }
+
+    print("⏱️  Запуск CLI...")
+    report["results"].update(run_startup_benchmarks(repeat * 3))
+
+    print("⏱️  Микробенчмарки анализа...")
+    report["results"].update(run_microbenchmarks(micro_size, repeat, args.seed))
+
+    with mock_range_server() as base_url, tempfile.TemporaryDirectory() as directory:
+        print("⏱️  Пакетная проверка на утечки (локальный сервер)...")
+        report["results"].update(run_breach_benchmarks(breach_size, repeat, args.seed, base_url))
+
+        print("⏱️  Проверка файла целиком...")
+        report["results"].update(
+            run_file_audit_benchmarks(audit_size, repeat, args.seed, base_url, directory)
+        )
+
+    print()
+    for name, result in report["results"].items():
+        memory = (f", пик памяти {result['peak_memory_mb']:.1f} МБ"
+                  if "peak_memory_mb" in result else "")
+        ops_per_sec = f"{result['ops_per_sec']:,.0f}".replace(",", " ")
+        print(f"  {name:45s} {result['best_us']:10.2f} мкс/оп ({ops_per_sec} оп/с{memory})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты сохранены: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n📊 Сравнение с {args.compare}:")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Регрессии ({len(regressions)}): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Регрессий не обнаружено")
+
+
+if __name__ == "__main__":
+    main()
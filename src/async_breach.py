@@ -0,0 +1,212 @@
+"""
+Модуль для параллельной проверки паролей на утечки через asyncio
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+
+from breach_cache import RangeCache, range_key
+from breach_client import (
+    DEFAULT_RATE,
+    BreachClient,
+    CircuitOpenError,
+    _circuit_open_result,
+    _connection_error_result,
+    _http_error_result,
+    _max_retries_result,
+    _rate_limit_result,
+    _request_error_result,
+    _timeout_result,
+    get_default_client,
+    parse_retry_after,
+)
+from metrics import METRICS
+
+
+DEFAULT_CONCURRENCY = 16
+MIN_RATE = 1.0
+
+
+class TokenBucket:
+    """
+    Общий для всех задач ограничитель частоты запросов (token bucket).
+
+    Ответ 429 от API приостанавливает выдачу токенов всем задачам сразу
+    и вдвое снижает скорость; успешные ответы постепенно возвращают ее
+    к исходному значению.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Ждет, пока не появится токен на запрос"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, delay: float) -> None:
+        """Реакция на 429: общая пауза и снижение скорости вдвое"""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + delay)
+        self.rate = max(MIN_RATE, self.rate / 2)
+        self.tokens = 0
+        self._updated = now
+
+    def reward(self) -> None:
+        """Реакция на успешный ответ: плавное восстановление скорости"""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + 0.5)
+
+
+async def _request_range_async(prefix: str, client: BreachClient, limiter: TokenBucket,
+                               executor: ThreadPoolExecutor, max_retries: int,
+                               mode: str = "sha1", headers: Optional[Dict] = None):
+    """
+    Запрос диапазона с повторами. Пауза после 429 или Retry-After общая
+    для всех задач (снижается частота запросов), после остальных ошибок
+    сервера и сети - только у этой задачи, с экспоненциальным ростом и джиттером.
+    Возвращает (ответ 200 или 304, None) или (None, ошибка)
+    """
+    loop = asyncio.get_running_loop()
+
+    for attempt in range(max_retries + 1):
+        await limiter.acquire()
+        if attempt:
+            client.retries += 1
+            METRICS.inc("api_retries")
+
+        try:
+            response = await loop.run_in_executor(executor, client.request_range, prefix, mode,
+                                                   headers)
+        except CircuitOpenError:
+            return None, _circuit_open_result()
+        except requests.exceptions.Timeout:
+            if attempt < max_retries:
+                wait_time = client.retry_delay(attempt)
+                METRICS.observe("retry_wait", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            return None, _timeout_result()
+        except requests.exceptions.ConnectionError as e:
+            if attempt < max_retries:
+                wait_time = client.retry_delay(attempt)
+                METRICS.observe("retry_wait", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            return None, _connection_error_result(e)
+        except requests.exceptions.RequestException as e:
+            return None, _request_error_result(e)
+
+        if response.status_code in (200, 304):
+            limiter.reward()
+            return response, None
+
+        if response.status_code == 429 or response.status_code >= 500:
+            wait_time = client.retry_delay(attempt, response)
+            METRICS.observe("retry_wait", wait_time)
+            if (response.status_code == 429
+                    or parse_retry_after(response.headers.get('Retry-After')) is not None):
+                # Сервер просит подождать всех: замедляем все задачи сразу
+                limiter.penalize(wait_time)
+            elif attempt < max_retries:
+                # Сбой одного запроса - не повод замедлять остальные задачи
+                await asyncio.sleep(wait_time)
+            if attempt < max_retries:
+                continue
+            if response.status_code == 429:
+                return None, _rate_limit_result()
+
+        return None, _http_error_result(response.status_code)
+
+    return None, _max_retries_result()
+
+
+async def _fetch_range_async(prefix: str, client: BreachClient, limiter: TokenBucket,
+                             executor: ThreadPoolExecutor, max_retries: int,
+                             mode: str = "sha1"):
+    """Асинхронный аналог BreachClient.fetch_range: (тело, None) или (None, ошибка)"""
+    response, error = await _request_range_async(prefix, client, limiter, executor,
+                                                 max_retries, mode)
+    if error is not None:
+        return None, error
+    return response.text, None
+
+
+async def fetch_ranges_async(prefixes: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY,
+                             rate: Optional[float] = None, max_retries: int = 2,
+                             cache: Optional[RangeCache] = None,
+                             client: Optional[BreachClient] = None,
+                             mode: str = "sha1") -> Dict[str, Tuple]:
+    """
+    Запрашивает диапазоны для всех префиксов параллельно.
+    rate - начальная частота запросов в секунду, по умолчанию - client.rate.
+    Возвращает словарь префикс -> (тело ответа, None) или (None, ошибка)
+    """
+    results: Dict[str, Tuple] = {}
+    pending = []
+
+    for prefix in prefixes:
+        body = cache.get(range_key(prefix, mode)) if cache is not None else None
+        if body is not None:
+            results[prefix] = (body, None)
+        else:
+            pending.append(prefix)
+
+    if not pending:
+        return results
+
+    if client is None:
+        client = get_default_client()
+    limiter = TokenBucket(rate if rate is not None else client.rate, capacity=concurrency)
+    queue = iter(pending)
+
+    async def worker():
+        # Число воркеров и есть предел одновременных запросов
+        for prefix in queue:
+            body, error = await _fetch_range_async(prefix, client, limiter, executor,
+                                                     max_retries, mode)
+            results[prefix] = (body, error)
+            if error is None and cache is not None:
+                cache.put(range_key(prefix, mode), body)
+
+    workers = min(concurrency, len(pending))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    return results
+
+
+def fetch_ranges(prefixes: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: Optional[float] = None, max_retries: int = 2,
+                 cache: Optional[RangeCache] = None,
+                 client: Optional[BreachClient] = None,
+                 mode: str = "sha1") -> Dict[str, Tuple]:
+    """Синхронная обертка над fetch_ranges_async"""
+    return asyncio.run(
+        fetch_ranges_async(prefixes, concurrency, rate, max_retries, cache, client, mode)
+    )
@@ -0,0 +1,186 @@
+"""
+Модуль контрольных точек проверки файла: после прерывания проверка
+продолжается с сохраненного места, а не с первой строки
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_INTERVAL = 30.0  # Секунд между сохранениями
+
+# Начало входного файла, по которому узнается тот же файл при продолжении
+_HEAD_BYTES = 64 * 1024
+
+# Кэш ответов API рядом с контрольной точкой (когда общий кэш --cache не задан)
+RANGES_CACHE_SUFFIX = ".ranges"
+
+
+class CheckpointError(Exception):
+    """Контрольная точка повреждена или создана для другого файла или режима"""
+    pass
+
+
+def read_lines_at(filepath: str, offset: int = 0, line_no: int = 0,
+                  errors: str = "strict") -> Iterator[Tuple[int, int, str]]:
+    """
+    Читает строки файла начиная с байтового смещения offset.
+    Выдает (номер строки, смещение конца строки, текст строки);
+    line_no - номер строки, предшествующей offset
+    """
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            line_no += 1
+            yield line_no, offset, raw.decode("utf-8", errors)
+
+
+def _source_identity(filepath: str) -> Dict:
+    """Размер и SHA-1 начала входного файла"""
+    with open(filepath, "rb") as f:
+        head = f.read(_HEAD_BYTES)
+        size = os.fstat(f.fileno()).st_size
+    return {
+        "path": os.path.abspath(filepath),
+        "size": size,
+        "head_sha1": hashlib.sha1(head).hexdigest(),
+    }
+
+
+def ranges_cache_path(checkpoint_path: str) -> str:
+    """
+    Путь кэша ответов API проверки с контрольной точкой: диапазоны,
+    полученные после последнего сохранения, при продолжении не
+    запрашиваются снова
+    """
+    return checkpoint_path + RANGES_CACHE_SUFFIX
+
+
+def remove_ranges_cache(checkpoint_path: str) -> None:
+    """Удаляет кэш ответов API контрольной точки вместе с файлами журнала SQLite"""
+    path = ranges_cache_path(checkpoint_path)
+    for name in (path, f"{path}-wal", f"{path}-shm"):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+class AuditCheckpoint:
+    """
+    Состояние проверки файла в JSON: байтовое смещение конца последней
+    обработанной строки, ее номер, счетчики сводной статистики и позиция
+    в файле вывода.
+
+    Сохраняется не чаще раза в interval секунд и только между записями
+    результатов, поэтому состояние всегда согласовано: все до смещения
+    учтено в статистике и записано в вывод, после - нет. Файл заменяется
+    атомарно, прерывание во время сохранения не портит прошлую точку.
+    params - параметры проверки (режим, формат вывода), продолжить можно
+    только с теми же.
+    """
+
+    def __init__(self, path: str, filepath: str, params: Dict,
+                 interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.filepath = filepath
+        self.params = params
+        self.interval = interval
+
+        self.offset = 0
+        self.line = 0
+        self.stats: Optional[Dict] = None
+        self.output_position: Optional[int] = None
+        self.resumed = False
+        self.saves = 0
+
+        self._source: Optional[Dict] = None
+        self._next_save = time.monotonic() + interval
+
+    def _identity(self) -> Dict:
+        if self._source is None:
+            self._source = _source_identity(self.filepath)
+        return self._source
+
+    def load(self) -> bool:
+        """
+        Загружает сохраненное состояние. False, если контрольной точки еще нет;
+        CheckpointError, если она не подходит к этому файлу или режиму
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            raise CheckpointError(f"контрольная точка '{self.path}' повреждена: {e}")
+
+        if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+            raise CheckpointError(f"неизвестный формат контрольной точки '{self.path}'")
+
+        source = self._identity()
+        saved_source = data.get("source", {})
+        if (saved_source.get("size") != source["size"]
+                or saved_source.get("head_sha1") != source["head_sha1"]):
+            raise CheckpointError(f"контрольная точка создана для другого файла "
+                                  f"({saved_source.get('path')}) или файл изменился")
+
+        saved_params = data.get("params", {})
+        for name, value in self.params.items():
+            if saved_params.get(name) != value:
+                raise CheckpointError(f"контрольная точка создана с другими параметрами "
+                                      f"проверки ({name}: {saved_params.get(name)})")
+
+        self.offset = data["offset"]
+        self.line = data["line"]
+        self.stats = data["stats"]
+        self.output_position = data.get("output_position")
+        self.resumed = True
+        return True
+
+    def due(self) -> bool:
+        """Пора ли сохранять"""
+        return time.monotonic() >= self._next_save
+
+    def save(self, offset: int, line: int, stats: Dict,
+             output_position: Optional[int] = None) -> None:
+        """Атомарно записывает состояние после строки line (конец на байте offset)"""
+        self.offset = offset
+        self.line = line
+        self.stats = stats
+        self.output_position = output_position
+
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "source": self._identity(),
+            "params": self.params,
+            "offset": offset,
+            "line": line,
+            "stats": stats,
+            "output_position": output_position,
+            "saved_at": time.time(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+        self.saves += 1
+        self._next_save = time.monotonic() + self.interval
+
+    def discard(self) -> None:
+        """Удаляет контрольную точку после успешного завершения проверки"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def exists(self) -> bool:
+        """Есть ли сохраненная точка, с которой можно продолжить"""
+        return self.resumed or self.saves > 0
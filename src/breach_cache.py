@@ -0,0 +1,175 @@
+"""
+Модуль для кэширования ответов API HaveIBeenPwned на диске
+"""
+
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "password-analyzer", "ranges.sqlite3"
+)
+DEFAULT_TTL = 7 * 24 * 3600  # Неделя - диапазоны в HIBP обновляются редко
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Как часто фиксировать обновления времени доступа (LRU) на диск
+_TOUCH_COMMIT_EVERY = 256
+
+
+def range_key(prefix: str, mode: str = "sha1") -> str:
+    """Ключ записи кэша: диапазоны NTLM хранятся отдельно от SHA-1 с тем же префиксом"""
+    return prefix if mode == "sha1" else f"{mode}:{prefix}"
+
+
+class RangeCache:
+    """
+    Сквозной кэш ответов /range/{prefix} на диске.
+
+    Хранит одну сжатую запись на 5-символьный префикс SHA-1 в SQLite
+    (поиск по первичному ключу), обновляет записи старше TTL и вытесняет
+    давно не использованные записи при превышении лимита размера.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending_touches = 0
+
+        import sqlite3  # Только при открытии кэша: запуски без --cache его не загружают
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ranges ("
+            " prefix TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " body BLOB NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ranges_accessed ON ranges (accessed_at)"
+        )
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ranges").fetchone()
+        self._total_bytes = row[0]
+
+    def get(self, prefix: str) -> Optional[str]:
+        """Возвращает тело ответа для префикса или None, если записи нет или она устарела"""
+        prefix = prefix.upper()
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, body FROM ranges WHERE prefix = ?", (prefix,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            fetched_at, body = row
+            if now - fetched_at > self.ttl:
+                self.misses += 1
+                self.expired += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE ranges SET accessed_at = ? WHERE prefix = ?", (now, prefix)
+            )
+            self._pending_touches += 1
+            if self._pending_touches >= _TOUCH_COMMIT_EVERY:
+                self._conn.commit()
+                self._pending_touches = 0
+
+            self.hits += 1
+
+        return zlib.decompress(body).decode('ascii')
+
+    def put(self, prefix: str, body: str) -> None:
+        """Сохраняет тело ответа для префикса и при необходимости вытесняет старые записи"""
+        prefix = prefix.upper()
+        now = time.time()
+        blob = zlib.compress(body.encode('ascii'), 6)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM ranges WHERE prefix = ?", (prefix,)
+            ).fetchone()
+            if row is not None:
+                self._total_bytes -= row[0]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ranges (prefix, fetched_at, accessed_at, size, body) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (prefix, now, now, len(blob), blob)
+            )
+            self._total_bytes += len(blob)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+            self._conn.commit()
+            self._pending_touches = 0
+
+    def _evict(self) -> None:
+        """Удаляет самые давно использованные записи, пока кэш не уложится в лимит"""
+        # Освобождаем с запасом в 10%, чтобы не вытеснять по одной записи на каждый put
+        target = self.max_bytes * 0.9
+        cursor = self._conn.execute(
+            "SELECT prefix, size FROM ranges ORDER BY accessed_at ASC"
+        )
+        victims = []
+        for prefix, size in cursor:
+            if self._total_bytes <= target:
+                break
+            victims.append((prefix,))
+            self._total_bytes -= size
+
+        self._conn.executemany("DELETE FROM ranges WHERE prefix = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict:
+        """Возвращает счетчики попаданий и промахов кэша"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ranges").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": self._total_bytes,
+        }
+
+    def close(self) -> None:
+        """Фиксирует отложенные изменения и закрывает базу"""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
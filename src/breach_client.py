@@ -0,0 +1,346 @@
+"""
+Модуль HTTP-клиента для API HaveIBeenPwned (Pwned Passwords)
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional
+
+from metrics import METRICS
+
+# requests (~100 мс на импорт) загружается при создании первого клиента,
+# чтобы запуски без сети (-g, --no-api) его не импортировали
+if TYPE_CHECKING:
+    import requests
+
+
+# Адрес и заголовки запросов к API HaveIBeenPwned
+API_BASE_URL = "https://api.pwnedpasswords.com"
+API_RANGE_URL = API_BASE_URL + "/range/{prefix}"
+API_HEADERS = {
+    'User-Agent': 'Password-Analyzer-CLI/1.0',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate'
+}
+API_TIMEOUT = 10
+
+# Тип хешей в диапазонах: по умолчанию SHA-1, с ?mode=ntlm - NTLM
+HASH_MODES = ("sha1", "ntlm")
+
+# Частота запросов при параллельной проверке до первого ответа 429
+DEFAULT_RATE = 50.0
+
+# Ограничения повторных попыток
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Автоматический выключатель: после стольких сбоев подряд API считается недоступным
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 30.0
+
+# Сколько последних замеров задержки хранить для статистики
+LATENCY_WINDOW = 10000
+
+
+class PasswordAPIError(Exception):
+    """Кастомное исключение для ошибок API"""
+    pass
+
+
+class CircuitOpenError(PasswordAPIError):
+    """API признано недоступным после серии сбоев, запросы временно не выполняются"""
+    pass
+
+
+def _api_error_result(source: str, message: str, **extra) -> Dict:
+    """Результат проверки, когда API не удалось опросить"""
+    result = {
+        "breached": False,
+        "count": 0,
+        "message": message,
+        "source": source
+    }
+    result.update(extra)
+    return result
+
+
+def _rate_limit_result() -> Dict:
+    return _api_error_result("rate_limit", "Превышен лимит запросов к API. Попробуйте позже.")
+
+
+def _http_error_result(status_code: int) -> Dict:
+    return _api_error_result("http_error", f"Ошибка API: {status_code}")
+
+
+def _timeout_result() -> Dict:
+    return _api_error_result("timeout", "Таймаут при подключении к API")
+
+
+def _connection_error_result(error: Exception) -> Dict:
+    # Подробная диагностика ошибки подключения
+    error_msg = "Не удалось подключиться к API"
+    if "SSL" in str(error):
+        error_msg += " (ошибка SSL сертификата)"
+    elif "Proxy" in str(error):
+        error_msg += " (проблема с прокси)"
+
+    return _api_error_result("connection_error", error_msg, details=str(error))
+
+
+def _request_error_result(error: Exception) -> Dict:
+    return _api_error_result("request_error", f"Ошибка при запросе к API: {str(error)[:50]}")
+
+
+def _circuit_open_result() -> Dict:
+    return _api_error_result(
+        "circuit_open",
+        "API временно недоступно после серии ошибок, запрос пропущен"
+    )
+
+
+def _max_retries_result() -> Dict:
+    return _api_error_result(
+        "max_retries_exceeded",
+        "Не удалось выполнить проверку после нескольких попыток"
+    )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата) в число секунд"""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    import email.utils  # Нужен только для редкого формата даты
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class BreachClient:
+    """
+    Переиспользуемый клиент API Pwned Passwords.
+
+    Держит пул keep-alive соединений, запрашивает сжатые ответы,
+    соблюдает Retry-After с джиттером, размыкает цепь после серии
+    сбоев и замеряет задержку каждого запроса. rate - начальная частота
+    запросов в секунду для параллельных проверок (async_breach).
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = API_TIMEOUT,
+                 pool_size: int = 16, verbose: bool = True,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN, rate: float = DEFAULT_RATE):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.rate = rate
+        self.verbose = verbose
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers.update(API_HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+
+        self.requests_sent = 0
+        self.retries = 0
+        self.last_latency: Optional[float] = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    # --- Автоматический выключатель -------------------------------------
+
+    @property
+    def circuit_open(self) -> bool:
+        """True, если запросы сейчас блокируются выключателем"""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            # По истечении паузы пропускаем пробный запрос (полуоткрытое состояние)
+            return time.monotonic() - self._opened_at < self.cooldown
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    # --- Запросы --------------------------------------------------------
+
+    def range_url(self, prefix: str, mode: str = "sha1") -> str:
+        if mode == "sha1":
+            return f"{self.base_url}/range/{prefix}"
+        return f"{self.base_url}/range/{prefix}?mode={mode}"
+
+    def request_range(self, prefix: str, mode: str = "sha1",
+                      headers: Optional[Dict] = None) -> "requests.Response":
+        """
+        Один запрос /range/{prefix} без повторов; headers - дополнительные
+        заголовки (например, If-None-Match для условного запроса).
+        Исключения requests пробрасываются, при разомкнутой цепи - CircuitOpenError
+        """
+        import requests
+
+        if self.circuit_open:
+            raise CircuitOpenError("API временно недоступно")
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.range_url(prefix, mode), headers=headers,
+                                        timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            METRICS.inc("api_timeouts")
+            self._record_failure()
+            raise
+        except requests.exceptions.ConnectionError:
+            METRICS.inc("api_connection_errors")
+            self._record_failure()
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self.last_latency = latency
+            self.latencies.append(latency)
+            self.requests_sent += 1
+            METRICS.inc("api_requests")
+            METRICS.observe("network", latency)
+
+        if response.status_code == 429:
+            METRICS.inc("api_rate_limited")
+        if response.status_code >= 500:
+            METRICS.inc("api_server_errors")
+            self._record_failure()
+        else:
+            self._record_success()
+
+        return response
+
+    def retry_delay(self, attempt: int, response: Optional["requests.Response"] = None) -> float:
+        """Пауза перед повтором: Retry-After сервера или экспоненциальная с джиттером"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                # Небольшой джиттер, чтобы параллельные запросы не вернулись одновременно
+                return retry_after + random.uniform(0, BACKOFF_BASE)
+
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt + 1)))
+
+    def fetch_range(self, prefix: str, max_retries: int = 2, mode: str = "sha1"):
+        """
+        Запрашивает диапазон хешей /range/{prefix} с повторными попытками.
+        Возвращает пару (тело ответа, None) или (None, словарь с ошибкой)
+        """
+        import requests
+
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self.retries += 1
+                METRICS.inc("api_retries")
+
+            try:
+                if self.verbose:
+                    print(f"  Попытка подключения к API ({attempt + 1}/{max_retries + 1})...")
+                response = self.request_range(prefix, mode)
+                if self.verbose:
+                    print(f"  Ответ API: {response.status_code} "
+                          f"за {self.last_latency * 1000:.0f} мс")
+            except CircuitOpenError:
+                return None, _circuit_open_result()
+            except requests.exceptions.Timeout:
+                if attempt < max_retries:
+                    wait_time = self.retry_delay(attempt)
+                    if self.verbose:
+                        print(f"  Таймаут. Повторная попытка через {wait_time:.1f} сек...")
+                    METRICS.observe("retry_wait", wait_time)
+                    time.sleep(wait_time)
+                    continue
+                return None, _timeout_result()
+            except requests.exceptions.ConnectionError as e:
+                if attempt < max_retries:
+                    wait_time = self.retry_delay(attempt)
+                    if self.verbose:
+                        print(f"  Ошибка подключения. Повтор через {wait_time:.1f} сек...")
+                    METRICS.observe("retry_wait", wait_time)
+                    time.sleep(wait_time)
+                    continue
+                return None, _connection_error_result(e)
+            except requests.exceptions.RequestException as e:
+                return None, _request_error_result(e)
+
+            if response.status_code == 200:
+                return response.text, None
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt < max_retries:
+                    wait_time = self.retry_delay(attempt, response)
+                    if self.verbose:
+                        print(f"  Сервер просит подождать. Ждем {wait_time:.1f} сек...")
+                    METRICS.observe("retry_wait", wait_time)
+                    time.sleep(wait_time)
+                    continue
+                if response.status_code == 429:
+                    return None, _rate_limit_result()
+
+            return None, _http_error_result(response.status_code)
+
+        return None, _max_retries_result()
+
+    def stats(self) -> Dict:
+        """Статистика запросов и задержек (в миллисекундах)"""
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(count - 1, int(p * count))] * 1000
+
+        return {
+            "requests": self.requests_sent,
+            "retries": self.retries,
+            "circuit_open": self.circuit_open,
+            "latency_avg_ms": sum(latencies) / count * 1000 if count else 0.0,
+            "latency_p50_ms": percentile(0.50),
+            "latency_p95_ms": percentile(0.95),
+            "latency_max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_default_client: Optional[BreachClient] = None
+
+
+def get_default_client() -> BreachClient:
+    """Общий для процесса клиент, чтобы соединения переиспользовались между вызовами"""
+    global _default_client
+    if _default_client is None:
+        _default_client = BreachClient()
+    return _default_client
@@ -0,0 +1,357 @@
+"""
+Модуль локального индекса утекших паролей: фильтр Блума + отсортированные хеши в mmap
+"""
+
+import argparse
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import BinaryIO, Iterator, List, Optional
+
+
+INDEX_MAGIC = b"PWIDX1\0\0"
+# magic, тип хеша, байт на ключ, число хеш-функций Блума, размер фильтра в битах, число ключей
+_HEADER = struct.Struct("<8sBBBxQQ4x")
+
+HASH_SHA1 = 1
+HASH_NTLM = 2
+HASH_NAMES = {HASH_SHA1: "sha1", HASH_NTLM: "ntlm"}
+HASH_TYPES = {name: hash_type for hash_type, name in HASH_NAMES.items()}
+HASH_HEX_LENGTHS = {"sha1": 40, "ntlm": 32}
+
+KEY_BYTES = 8  # Первые 8 байт хеша: вероятность коллизии ~ n / 2^64
+DEFAULT_BITS_PER_KEY = 10  # ~1% ложных срабатываний фильтра Блума
+DEFAULT_CHUNK_SIZE = 4_000_000  # Ключей в одном отсортированном блоке при сборке
+
+_KEY = struct.Struct(">Q")
+_READ_BLOCK = 64 * 1024
+
+
+class BreachIndexError(Exception):
+    """Файл не является индексом или поврежден"""
+    pass
+
+
+def _bloom_params(count: int, bits_per_key: int):
+    """Размер фильтра в битах (кратен 64) и оптимальное число хеш-функций"""
+    bits = max(64, count * bits_per_key)
+    bits = (bits + 63) // 64 * 64
+    k = max(1, min(16, round(bits_per_key * math.log(2))))
+    return bits, k
+
+
+def _bloom_positions(digest: bytes, bits: int, k: int) -> Iterator[int]:
+    """Позиции битов для хеша (двойное хеширование по байтам самого хеша)"""
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    for i in range(k):
+        yield (h1 + i * h2) % bits
+
+
+class BreachIndex:
+    """
+    Индекс, открываемый через mmap.
+
+    Проверка сначала смотрит в фильтр Блума и только при положительном
+    ответе выполняет бинарный поиск по отсортированному массиву ключей
+    фиксированной ширины. Весь список никогда не загружается в объекты Python.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise BreachIndexError(f"Пустой файл индекса: {path}")
+
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise BreachIndexError(f"Файл не является индексом: {path}")
+
+        magic, hash_type, key_bytes, k, bits, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or key_bytes != KEY_BYTES:
+            self.close()
+            raise BreachIndexError(f"Файл не является индексом: {path}")
+
+        self.hash_type = hash_type
+        self.bloom_bits = bits
+        self.bloom_k = k
+        self.count = count
+
+        self._bloom_offset = _HEADER.size
+        self._keys_offset = self._bloom_offset + bits // 8
+        expected_size = self._keys_offset + count * KEY_BYTES
+        if len(self._mmap) < expected_size:
+            self.close()
+            raise BreachIndexError(f"Файл индекса поврежден: {path}")
+
+    @property
+    def hash_name(self) -> str:
+        return HASH_NAMES.get(self.hash_type, "unknown")
+
+    def _bloom_contains(self, digest: bytes) -> bool:
+        data = self._mmap
+        offset = self._bloom_offset
+        for position in _bloom_positions(digest, self.bloom_bits, self.bloom_k):
+            if not data[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _search(self, key: bytes) -> bool:
+        data = self._mmap
+        base = self._keys_offset
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * KEY_BYTES
+            probe = data[start:start + KEY_BYTES]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def contains_digest(self, digest: bytes) -> bool:
+        """Проверяет наличие хеша (сырые байты) в индексе"""
+        if not self._bloom_contains(digest):
+            return False
+        return self._search(digest[:KEY_BYTES])
+
+    def contains_hex(self, hex_digest: str) -> bool:
+        """Проверяет хеш, записанный шестнадцатеричной строкой"""
+        return self.contains_digest(bytes.fromhex(hex_digest))
+
+    def contains(self, password: str) -> bool:
+        """Проверяет пароль как есть и в нижнем регистре, как локальная база"""
+        if self.hash_type != HASH_SHA1:
+            raise BreachIndexError(f"Индекс {self.hash_name} проверяет только хеши, "
+                                   f"а не пароли")
+        if self.contains_digest(hashlib.sha1(password.encode("utf-8")).digest()):
+            return True
+        lowered = password.lower()
+        if lowered != password:
+            return self.contains_digest(hashlib.sha1(lowered.encode("utf-8")).digest())
+        return False
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains(password)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# --- Сборка индекса -----------------------------------------------------
+
+
+def _iter_wordlist_digests(wordlist: BinaryIO) -> Iterator[bytes]:
+    """SHA-1 каждой непустой строки списка (байты строки хешируются как есть)"""
+    sha1 = hashlib.sha1
+    for line in wordlist:
+        line = line.rstrip(b"\r\n")
+        if line:
+            yield sha1(line).digest()
+
+
+def _iter_hash_list_digests(lines: BinaryIO, hash_type: int) -> Iterator[bytes]:
+    """
+    Хеши из списка в формате выгрузки Pwned Passwords: 'HASH' или 'HASH:COUNT'
+    на строке. Строки, не похожие на хеш нужного типа, пропускаются
+    """
+    hex_length = HASH_HEX_LENGTHS[HASH_NAMES[hash_type]]
+    for line in lines:
+        field = line.split(b":", 1)[0].strip()
+        if len(field) != hex_length:
+            continue
+        try:
+            yield bytes.fromhex(field.decode("ascii"))
+        except (UnicodeDecodeError, ValueError):
+            continue
+
+
+def _write_run(keys: List[int], directory: str) -> str:
+    """Сортирует блок ключей и сохраняет во временный файл"""
+    keys.sort()
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(struct.pack(f">{len(keys)}Q", *keys))
+    return path
+
+
+def _iter_run(path: str) -> Iterator[int]:
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_READ_BLOCK)
+            if not block:
+                break
+            for (key,) in _KEY.iter_unpack(block):
+                yield key
+
+
+def build_index(digests: Iterator[bytes], out_path: str, hash_type: int = HASH_SHA1,
+                bits_per_key: int = DEFAULT_BITS_PER_KEY,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Строит индекс из потока хешей с внешней сортировкой: память
+    ограничена одним блоком ключей и самим фильтром Блума.
+    Возвращает число уникальных ключей.
+    """
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    tmp_dir = tempfile.mkdtemp(prefix="pwidx-", dir=out_dir)
+    runs: List[str] = []
+    bloom_digests = os.path.join(tmp_dir, "digests")
+    total = 0
+
+    try:
+        # Проход 1: отсортированные блоки ключей + сохраняем хеши для фильтра Блума
+        chunk: List[int] = []
+        with open(bloom_digests, "wb") as digest_file:
+            for digest in digests:
+                digest = digest[:16].ljust(16, b"\0")
+                digest_file.write(digest)
+                chunk.append(int.from_bytes(digest[:KEY_BYTES], "big"))
+                total += 1
+                if len(chunk) >= chunk_size:
+                    runs.append(_write_run(chunk, tmp_dir))
+                    chunk = []
+        if chunk:
+            runs.append(_write_run(chunk, tmp_dir))
+        del chunk
+
+        bits, k = _bloom_params(total, bits_per_key)
+        bloom = bytearray(bits // 8)
+        with open(bloom_digests, "rb") as digest_file:
+            while True:
+                block = digest_file.read(16 * 4096)
+                if not block:
+                    break
+                for i in range(0, len(block), 16):
+                    for position in _bloom_positions(block[i:i + 16], bits, k):
+                        bloom[position >> 3] |= 1 << (position & 7)
+
+        # Проход 2: слияние блоков с удалением дубликатов прямо в итоговый файл
+        tmp_out = out_path + ".tmp"
+        count = 0
+        with open(tmp_out, "wb") as out:
+            out.write(b"\0" * _HEADER.size)
+            out.write(bloom)
+            del bloom
+
+            previous = None
+            buffer = []
+            for key in heapq.merge(*(_iter_run(path) for path in runs)):
+                if key == previous:
+                    continue
+                previous = key
+                buffer.append(key)
+                if len(buffer) >= 65536:
+                    out.write(struct.pack(f">{len(buffer)}Q", *buffer))
+                    count += len(buffer)
+                    buffer = []
+            if buffer:
+                out.write(struct.pack(f">{len(buffer)}Q", *buffer))
+                count += len(buffer)
+
+            out.seek(0)
+            out.write(_HEADER.pack(INDEX_MAGIC, hash_type, KEY_BYTES, k, bits, count))
+
+        os.replace(tmp_out, out_path)
+        return count
+    finally:
+        for path in runs + [bloom_digests]:
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(tmp_dir)
+
+
+def build_index_from_wordlist(wordlist_path: str, out_path: str,
+                              bits_per_key: int = DEFAULT_BITS_PER_KEY,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Строит SHA-1 индекс из списка паролей (по одному на строке)"""
+    with open(wordlist_path, "rb") as wordlist:
+        return build_index(_iter_wordlist_digests(wordlist), out_path, HASH_SHA1,
+                           bits_per_key, chunk_size)
+
+
+def build_index_from_hashes(hashes_path: str, out_path: str, hash_type: int = HASH_SHA1,
+                            bits_per_key: int = DEFAULT_BITS_PER_KEY,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Строит индекс из списка хешей SHA-1 или NTLM, не видя паролей открытым текстом"""
+    with open(hashes_path, "rb") as lines:
+        return build_index(_iter_hash_list_digests(lines, hash_type), out_path, hash_type,
+                           bits_per_key, chunk_size)
+
+
+def open_index(path: Optional[str]) -> Optional[BreachIndex]:
+    """Открывает индекс, если путь задан"""
+    return BreachIndex(path) if path else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Сборка локального индекса утекших паролей"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Собрать индекс из списка паролей")
+    build.add_argument("wordlist", help="Файл со списком паролей (по одному на строке)")
+    build.add_argument("output", help="Путь к создаваемому индексу")
+    build.add_argument(
+        "--hashes",
+        help="Файл - список хешей ('HASH' или 'HASH:COUNT'), а не паролей",
+        choices=sorted(HASH_TYPES)
+    )
+    build.add_argument(
+        "--bits-per-key",
+        help=f"Бит фильтра Блума на пароль (по умолчанию: {DEFAULT_BITS_PER_KEY})",
+        type=int,
+        default=DEFAULT_BITS_PER_KEY
+    )
+
+    info = subparsers.add_parser("info", help="Показать сведения об индексе")
+    info.add_argument("index", help="Путь к индексу")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            print(f"🔨 Сборка индекса из '{args.wordlist}'...")
+            if args.hashes:
+                count = build_index_from_hashes(args.wordlist, args.output,
+                                                HASH_TYPES[args.hashes], args.bits_per_key)
+            else:
+                count = build_index_from_wordlist(args.wordlist, args.output, args.bits_per_key)
+            print(f"✅ Готово: {count} уникальных хешей, "
+                  f"{os.path.getsize(args.output) / 1024 / 1024:.1f} МБ")
+        else:
+            with BreachIndex(args.index) as index:
+                print(f"Тип хеша: {index.hash_name}")
+                print(f"Записей: {index.count}")
+                print(f"Фильтр Блума: {index.bloom_bits} бит, {index.bloom_k} хеш-функций")
+    except (OSError, BreachIndexError) as e:
+        print(f"❌ Ошибка: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Модуль для проверки паролей из файла в виде конвейера генераторов
+"""
+
+import multiprocessing
+import sys
+import time
+from collections import deque
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from audit_checkpoint import AuditCheckpoint, read_lines_at
+from metrics import METRICS
+from output_writers import ResultWriter, TextWriter
+from password_analyzer import (DEFAULT_ANALYZER, DEFAULT_ENGINE, analyze_packed_batch,
+                               analyzer_settings, init_worker)
+from password_checker import _build_packed_result, _passwords_breach_batch
+from password_policy import active_policies
+from result_cache import ResultCache, password_key
+from results import PasswordResult
+
+
+DEFAULT_WINDOW = 10000  # Паролей в обработке одновременно в потоковом режиме
+MIN_WORKER_CHUNK = 1000  # Паролей в одной задаче пула процессов
+
+
+class AuditStats:
+    """Сводная статистика проверки, накапливаемая по мере поступления результатов"""
+
+    def __init__(self):
+        self.total = 0
+        self.score_sum = 0
+        self.strong = 0
+        self.breached = 0
+        self.weak = 0
+        self.policy_failures: Dict[str, int] = {}  # Не соответствуют политике, по имени
+
+    def add(self, result: PasswordResult) -> None:
+        score = result.strength_score
+        self.total += 1
+        self.score_sum += score
+        if score >= 70:
+            self.strong += 1
+        if score < 40:
+            self.weak += 1
+        if result.breached:
+            self.breached += 1
+        if result.extra:
+            policy_masks = result.policy_masks
+            if policy_masks is not None:
+                failures = self.policy_failures
+                for name, mask in zip(*policy_masks):
+                    failures[name] = failures.get(name, 0) + bool(mask)
+
+    @property
+    def avg_score(self) -> float:
+        return self.score_sum / self.total if self.total else 0
+
+    def state(self) -> Dict:
+        """Сырые счетчики для контрольной точки"""
+        return dict(vars(self))
+
+    def restore(self, state: Dict) -> None:
+        for name in vars(self):
+            if name in state:
+                setattr(self, name, state[name])
+
+    def as_dict(self) -> Dict:
+        summary = {
+            "total": self.total,
+            "avg_score": round(self.avg_score, 1),
+            "strong": self.strong,
+            "breached": self.breached,
+            "weak": self.weak,
+        }
+        if self.policy_failures:
+            summary["policy_failures"] = dict(self.policy_failures)
+        return summary
+
+
+# --- Стадии конвейера -----------------------------------------------------
+
+
+def read_passwords(filepath: str, line_numbers: Optional[deque] = None,
+                   start: Optional[Tuple[int, int]] = None) -> Iterator[str]:
+    """
+    Лениво читает непустые пароли из файла. Номера строк выданных паролей
+    добавляются в line_numbers, если он передан.
+
+    С start=(смещение, номер строки) чтение идет с этого байтового смещения,
+    а в line_numbers добавляются пары (номер строки, смещение конца строки)
+    для контрольных точек
+    """
+    if start is not None:
+        for line_no, offset, line in read_lines_at(filepath, *start):
+            password = line.strip()
+            if password:
+                line_numbers.append((line_no, offset))
+                yield password
+        return
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            password = line.strip()
+            if password:
+                if line_numbers is not None:
+                    line_numbers.append(line_no)
+                yield password
+
+
+def in_windows(items: Iterable, size: int) -> Iterator[List]:
+    """Разбивает поток на окна не больше size элементов"""
+    iterator = iter(items)
+    while True:
+        window = list(islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+def score_windows(windows: Iterable[List[str]], pool=None,
+                  workers: int = 1) -> Iterator[Tuple[List[str], Iterable[Tuple[int, int]]]]:
+    """
+    Локальная оценка окон в компактной форме (биты критериев, оценка 0-100).
+
+    С пулом процессов окно режется на крупные пачки, чтобы передавать
+    между процессами списки, а не отдельные пароли; пока родитель
+    обрабатывает одно окно, воркеры уже считают следующее.
+    """
+    if pool is None:
+        analyze_packed = DEFAULT_ANALYZER.analyze_packed
+        for window in windows:
+            yield window, map(analyze_packed, window)
+        return
+
+    pending = deque()
+    for window in windows:
+        chunk_size = max(MIN_WORKER_CHUNK, len(window) // (workers * 4) + 1)
+        chunks = [window[i:i + chunk_size] for i in range(0, len(window), chunk_size)]
+        pending.append((window, pool.map_async(analyze_packed_batch, chunks)))
+
+        if len(pending) > 1:
+            ready_window, scored = pending.popleft()
+            yield ready_window, chain.from_iterable(scored.get())
+
+    while pending:
+        ready_window, scored = pending.popleft()
+        yield ready_window, chain.from_iterable(scored.get())
+
+
+def _cache_namespace(use_api: bool, breach_options: Dict, analysis: bool = True) -> str:
+    """
+    Пространство имен кэша результатов: результаты разных режимов не смешиваются.
+    analysis=False - только источники проверки на утечки (для выгрузок хешей)
+    """
+    namespace = "api" if use_api else "local"
+    if breach_options.get('local_index') is not None:
+        namespace += "+index"
+    if breach_options.get('mirror') is not None:
+        namespace += "+mirror"
+    if not analysis:
+        return namespace
+    # Другие словари паттернов - другие результаты анализа
+    namespace += "+patterns:" + DEFAULT_ANALYZER.matcher.fingerprint[:12]
+    if DEFAULT_ANALYZER.engine != DEFAULT_ENGINE:
+        namespace += "+" + DEFAULT_ANALYZER.engine
+    policies = active_policies()
+    if policies is not None:
+        namespace += "+policies:" + policies.fingerprint[:12]
+    return namespace
+
+
+def _lookup_windows(windows: Iterable[List[str]], result_cache: ResultCache, namespace: str,
+                    pending: deque) -> Iterator[List[str]]:
+    """
+    Ищет пароли окна в кэше результатов и выдает только промахи.
+    Повторы внутри окна анализируются один раз. Для каждого окна в pending
+    кладется (окно, ключи, места результатов): словарь из кэша или номер промаха
+    """
+    for window in windows:
+        with METRICS.stage("result_cache"):
+            keys = [password_key(password) for password in window]
+            slots: List = []
+            misses: List[str] = []
+            miss_positions: Dict[bytes, int] = {}
+
+            for password, key in zip(window, keys):
+                position = miss_positions.get(key)
+                if position is not None:
+                    result_cache.record_hit()
+                    slots.append(position)
+                    continue
+
+                cached = result_cache.get(key, namespace)
+                if cached is not None:
+                    slots.append(cached)
+                    continue
+
+                miss_positions[key] = len(misses)
+                slots.append(len(misses))
+                misses.append(password)
+
+        pending.append((window, keys, slots))
+        yield misses
+
+
+def _analyze_scored(scored: Iterable[Tuple[List[str], Iterable[Tuple[int, int]]]],
+                    use_api: bool, concurrency: int,
+                    **breach_options) -> Iterator[Tuple[List[str], List[PasswordResult]]]:
+    """Проверка на утечки для оцененных окон, выдает (окно, результаты)"""
+    for window, scores in scored:
+        with METRICS.stage("analysis"):
+            scores = list(scores)
+        with METRICS.stage("breach_check"):
+            breach_checks = _passwords_breach_batch(
+                window, use_api, concurrency=concurrency, **breach_options
+            )
+        with METRICS.stage("build_results"):
+            results = [
+                _build_packed_result(bits, breach_check, strength_score, password)
+                for password, (bits, strength_score), breach_check
+                in zip(window, scores, breach_checks)
+            ]
+        yield window, results
+
+
+def analyze_windows(windows: Iterable[List[str]], use_api: bool = True, concurrency: int = 1,
+                    pool=None, workers: int = 1, result_cache: Optional[ResultCache] = None,
+                    **breach_options) -> Iterator[Tuple[str, PasswordResult]]:
+    """
+    Анализирует каждое окно: локальная оценка и пакетная проверка на утечки
+    (один запрос на уникальный префикс внутри окна). Выдает пары (пароль, результат)
+
+    С result_cache повторяющиеся пароли (в этом запуске и, при постоянном
+    уровне кэша, в прошлых) стоят одного хеширования и одного поиска.
+    """
+    if result_cache is None:
+        scored = score_windows(windows, pool, workers)
+        for window, results in _analyze_scored(scored, use_api, concurrency, **breach_options):
+            yield from zip(window, results)
+        return
+
+    namespace = _cache_namespace(use_api, breach_options)
+    pending = deque()
+    misses = _lookup_windows(windows, result_cache, namespace, pending)
+    scored = score_windows(misses, pool, workers)
+
+    for _, miss_results in _analyze_scored(scored, use_api, concurrency, **breach_options):
+        window, keys, slots = pending.popleft()
+
+        # Сохраняем новые результаты (по первому вхождению каждого ключа)
+        stored = set()
+        for key, slot in zip(keys, slots):
+            if isinstance(slot, int) and slot not in stored:
+                stored.add(slot)
+                result_cache.put(key, miss_results[slot], namespace)
+
+        for password, slot in zip(window, slots):
+            yield password, miss_results[slot] if isinstance(slot, int) else slot
+
+
+def write_results(results: Iterable[Tuple[str, PasswordResult]], stats: AuditStats,
+                  writer: ResultWriter, line_numbers: deque,
+                  checkpoint: Optional[AuditCheckpoint] = None) -> None:
+    """
+    Передает результат по каждому паролю писателю и обновляет статистику.
+    line_numbers - номера строк паролей в порядке результатов, с checkpoint -
+    пары (номер строки, смещение конца строки) из read_passwords(start=...)
+    """
+    timed = METRICS.enabled
+    write = writer.write_password
+    next_line = line_numbers.popleft
+    for password, result in results:
+        if timed:
+            started = time.perf_counter()
+        stats.add(result)
+        if checkpoint is None:
+            write(next_line(), password, result)
+        else:
+            line_no, offset = next_line()
+            write(line_no, password, result)
+            if checkpoint.due():
+                checkpoint.save(offset, line_no, stats.state(), writer.tell())
+
+        if timed:
+            METRICS.observe("print", time.perf_counter() - started)
+            METRICS.inc("passwords_checked")
+
+
+def print_summary(stats: AuditStats, use_api: bool = True, cache=None, client=None,
+                  result_cache: Optional[ResultCache] = None) -> None:
+    """Выводит сводную статистику и рекомендации"""
+    print("\n" + "=" * 50)
+    print("СВОДНАЯ СТАТИСТИКА")
+    print("=" * 50)
+    print(f"• Всего проверено паролей: {stats.total}")
+    print(f"• Средняя оценка безопасности: {stats.avg_score:.1f}/100")
+    print(f"• Надежных паролей (≥70): {stats.strong}")
+    print(f"• Скомпрометированных паролей: {stats.breached}")
+    print(f"• Слабых паролей (<40): {stats.weak}")
+    for name, failed in stats.policy_failures.items():
+        print(f"• Не соответствуют политике '{name}': {failed}")
+
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"• Кэш диапазонов API: {cache_stats['hits']} попаданий, "
+              f"{cache_stats['misses']} промахов ({cache_stats['hit_rate']:.0%})")
+
+    if result_cache is not None:
+        result_stats = result_cache.stats()
+        print(f"• Кэш результатов: {result_stats['hits']} попаданий, "
+              f"{result_stats['misses']} промахов ({result_stats['hit_rate']:.0%})")
+        if result_stats['disk_hits']:
+            age = f", не старше {result_cache.ttl / 3600:g} ч" if result_cache.ttl is not None else ""
+            print(f"• Из них из кэша на диске (прошлые запуски{age}): "
+                  f"{result_stats['disk_hits']}")
+
+    if use_api and client is not None and client.requests_sent:
+        client_stats = client.stats()
+        print(f"• Запросов к API: {client_stats['requests']} "
+              f"(повторов: {client_stats['retries']}), задержка: "
+              f"средняя {client_stats['latency_avg_ms']:.0f} мс, "
+              f"p95 {client_stats['latency_p95_ms']:.0f} мс")
+
+    if stats.total == 0:
+        return
+
+    if stats.breached > 0:
+        print(f"\n⚠️  ВНИМАНИЕ: {stats.breached} паролей необходимо заменить!")
+        print("   Эти пароли были скомпрометированы в утечках данных.")
+
+    if stats.strong == stats.total:
+        print(f"\n🎉 Отлично! Все пароли надежны!")
+    elif stats.strong / stats.total >= 0.7:
+        print(f"\n👍 Хорошо! Большинство паролов надежны.")
+    else:
+        print(f"\n🔴 Требуется улучшение! Много слабых паролей.")
+
+    # Рекомендации по улучшению
+    print(f"\n📋 Рекомендации по улучшению безопасности:")
+    if stats.breached > 0:
+        print(f"   1. Замените {stats.breached} скомпрометированных паролей")
+    if stats.strong < stats.total:
+        print(f"   2. Улучшите {stats.total - stats.strong} слабых паролей")
+    print(f"   3. Используйте команду для генерации: python src/main.py -g -l 16")
+
+
+def run_file_audit(filepath: str, use_api: bool = True, concurrency: int = 1,
+                   stream: bool = False, window: int = DEFAULT_WINDOW, workers: int = 1,
+                   result_cache: Optional[ResultCache] = None,
+                   writer: Optional[ResultWriter] = None,
+                   checkpoint: Optional[AuditCheckpoint] = None,
+                   **breach_options) -> AuditStats:
+    """
+    Проверка паролей из файла.
+
+    Без stream файл читается целиком и проверяется одним пакетом. В потоковом
+    режиме чтение, анализ, проверка на утечки и вывод - это цепочка
+    генераторов, в обработке находится не больше window паролей, а
+    статистика считается на лету, поэтому память не растет с размером файла.
+
+    При workers > 1 локальная оценка выполняется в пуле процессов,
+    порядок результатов сохраняется. result_cache избавляет от повторного
+    анализа одинаковых паролей.
+
+    Результаты по паролям получает writer (см. output_writers); без него -
+    текстовый отчет в stdout. Писатель закрывает вызывающий код.
+
+    checkpoint (см. audit_checkpoint) периодически сохраняет место в файле
+    и статистику; если он загружен из прошлого запуска, проверка
+    продолжается с сохраненного смещения, а итог совпадает с итогом
+    проверки без прерывания. После завершения контрольная точка удаляется.
+    """
+    if writer is None:
+        writer = TextWriter(sys.stdout, owns_stream=False)
+    stats = AuditStats()
+    start = None
+    if checkpoint is not None:
+        start = (checkpoint.offset, checkpoint.line)
+        if checkpoint.resumed:
+            stats.restore(checkpoint.stats)
+            writer.records = stats.total
+            print(f"\n↩️  Продолжение со строки {checkpoint.line + 1} "
+                  f"(уже проверено паролей: {stats.total})")
+
+    line_numbers = deque()
+    if stream:
+        print(f"\nПотоковая проверка паролей (окно: {window})")
+        windows = in_windows(read_passwords(filepath, line_numbers, start), window)
+        total = None
+    else:
+        passwords = list(read_passwords(filepath, line_numbers, start))
+        print(f"\nНайдено паролей для проверки: {len(passwords)}")
+        windows = [passwords] if passwords else []
+        total = stats.total + len(passwords)
+    if isinstance(writer, TextWriter):
+        writer.total = total
+
+    pool = None
+    if workers > 1:
+        # Настройки анализатора передаются явно: при spawn/forkserver воркеры их не наследуют
+        pool = multiprocessing.Pool(workers, initializer=init_worker,
+                                    initargs=analyzer_settings())
+    try:
+        results = analyze_windows(windows, use_api, concurrency, pool, workers,
+                                  result_cache, **breach_options)
+        write_results(results, stats, writer, line_numbers, checkpoint)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    writer.write_summary(stats.as_dict())
+    writer.flush()
+    if checkpoint is not None:
+        checkpoint.discard()
+    print_summary(stats, use_api, breach_options.get('cache'), breach_options.get('client'),
+                  result_cache)
+    return stats
@@ -0,0 +1,468 @@
+"""
+Модуль оценки числа попыток подбора пароля (в духе zxcvbn).
+
+Пароль раскладывается на фрагменты: словарные слова (в том числе
+перевернутые и с заменами вида p@ssw0rd), клавиатурные проходы,
+последовательности, повторы, даты и годы; непокрытые участки считаются
+перебором. Из всех разложений динамическим программированием выбирается
+то, что требует меньше всего попыток.
+"""
+
+import math
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pattern_matcher import (
+    KIND_DICTIONARY,
+    KIND_KEYBOARD,
+    KIND_SEQUENCE,
+    PatternMatcher,
+    merge_windows,
+)
+
+
+# Предел работы на один пароль: число кандидатов-фрагментов и шагов
+# динамического программирования. Предел задан в работе, а не во времени,
+# поэтому оценка не зависит от загрузки машины
+DEFAULT_MAX_MATCHES = 200
+DEFAULT_MAX_STEPS = 5000
+MAX_ANALYZED_LENGTH = 64  # Дальше символы пароля не учитываются
+
+BRUTEFORCE_CARDINALITY = 10
+MIN_GUESSES_SINGLE_CHAR = 10
+MIN_GUESSES_MULTI_CHAR = 50
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+
+MIN_YEAR_SPACE = 20
+DAYS_IN_YEAR = 365
+
+# Клавиатурный граф: число стартовых клавиш и среднее число соседей
+KEYBOARD_STARTING_POSITIONS = 47
+KEYBOARD_AVERAGE_DEGREE = 4.6
+
+# log10 числа попыток, при котором оценка достигает 100
+SCORE_FULL_LOG10 = 12
+
+KIND_BRUTEFORCE = "bruteforce"
+KIND_REVERSED = "reversed"
+KIND_L33T = "l33t"
+KIND_REPEAT = "repeat"
+KIND_DATE = "date"
+KIND_YEAR = "year"
+
+# Замены символов на похожие: символ -> возможные буквы
+L33T_TABLE = {
+    "4": "a", "@": "a", "8": "b", "(": "c", "{": "c", "[": "c", "<": "c",
+    "3": "e", "6": "g", "9": "g", "1": "il", "!": "i", "|": "il", "0": "o",
+    "$": "s", "5": "s", "7": "lt", "+": "t", "%": "x", "2": "z",
+}
+
+_GREEDY_REPEAT = re.compile(r"(.+)\1+", re.DOTALL)
+_LAZY_REPEAT = re.compile(r"(.+?)\1+", re.DOTALL)
+_YEAR = re.compile(r"19\d\d|20\d\d")
+_DIGITS = re.compile(r"\d{4,8}")
+_DATE_WITH_SEPARATOR = re.compile(r"(?=(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4}))")
+
+# Варианты разбиения строки цифр длины 4-8 на день, месяц и год
+_DATE_SPLITS = {
+    4: ((1, 2), (2, 3)),
+    5: ((1, 3), (2, 3)),
+    6: ((1, 2), (2, 4), (4, 5)),
+    7: ((1, 3), (2, 3), (4, 5), (4, 6)),
+    8: ((2, 4), (4, 6)),
+}
+
+_FACTORIALS = [math.factorial(i) for i in range(MAX_ANALYZED_LENGTH + 2)]
+
+
+class Match(NamedTuple):
+    start: int
+    end: int
+    kind: str
+    guesses: float
+
+
+class GuessEstimate(NamedTuple):
+    guesses: float
+    log10: float
+    score: int  # 0-100
+    sequence: Tuple[Match, ...]
+    truncated: bool  # Не уложились в предел работы - оценка по неполному разбору
+
+
+def score_from_guesses(guesses: float) -> int:
+    """Оценка 0-100 по числу попыток: 10^SCORE_FULL_LOG10 и больше - 100"""
+    return max(0, min(100, int(math.log10(max(guesses, 1)) * 100 / SCORE_FULL_LOG10)))
+
+
+def uppercase_variations(token: str) -> int:
+    """Во сколько раз заглавные буквы увеличивают число попыток для слова"""
+    if token == token.lower():
+        return 1
+    if token.upper() == token or token[0].isupper() and token[1:] == token[1:].lower() \
+            or token[-1].isupper() and token[:-1] == token[:-1].lower():
+        return 2
+    upper = sum(1 for char in token if char.isupper())
+    lower = sum(1 for char in token if char.islower())
+    return sum(math.comb(upper + lower, i) for i in range(1, min(upper, lower) + 1)) or 1
+
+
+def l33t_variations(token: str, substitutions: Dict[str, str]) -> int:
+    """Во сколько раз замены символов увеличивают число попыток для слова"""
+    variations = 1
+    lowered = token.lower()
+    for subbed, letter in substitutions.items():
+        subbed_count = lowered.count(subbed)
+        unsubbed_count = lowered.count(letter)
+        if not subbed_count or not unsubbed_count:
+            variations *= 2
+        else:
+            variations *= sum(math.comb(subbed_count + unsubbed_count, i)
+                              for i in range(1, min(subbed_count, unsubbed_count) + 1))
+    return variations
+
+
+def bruteforce_guesses(length: int, whole: bool = False) -> float:
+    guesses = float(BRUTEFORCE_CARDINALITY) ** length
+    if whole:
+        return guesses
+    # Фрагмент перебора не дешевле любого другого фрагмента той же длины
+    minimum = MIN_GUESSES_SINGLE_CHAR if length == 1 else MIN_GUESSES_MULTI_CHAR
+    return max(guesses, minimum + 1)
+
+
+# Попытки для фрагментов перебора каждой длины (часть пароля и весь пароль)
+_BRUTEFORCE_PART = [0.0] + [bruteforce_guesses(n) for n in range(1, MAX_ANALYZED_LENGTH + 1)]
+_BRUTEFORCE_WHOLE = [bruteforce_guesses(n, whole=True) for n in range(MAX_ANALYZED_LENGTH + 1)]
+
+
+def sequence_guesses(token: str) -> float:
+    first = token[0]
+    if first in "aAzZ019аАяЯ":
+        base = 4
+    elif first.isdigit():
+        base = 10
+    else:
+        base = 26
+    if len(token) > 1 and ord(token[1]) < ord(first):
+        base *= 2  # Убывающие последовательности встречаются реже
+    return float(base * len(token))
+
+
+def keyboard_guesses(token: str) -> float:
+    """Прямой проход без поворотов: стартовая клавиша, направление и длина"""
+    guesses = KEYBOARD_STARTING_POSITIONS * KEYBOARD_AVERAGE_DEGREE * max(len(token) - 1, 1)
+    return guesses * uppercase_variations(token)
+
+
+def year_guesses(year: int, reference_year: int) -> float:
+    return float(max(abs(year - reference_year), MIN_YEAR_SPACE))
+
+
+def _two_to_four_digit_year(year: int) -> int:
+    if year > 99:
+        return year
+    return 1900 + year if year > 50 else 2000 + year
+
+
+def _date_year(a: int, b: int, c: int, reference_year: int) -> Optional[int]:
+    """
+    Год даты из трех чисел (день/месяц/год в любом из обычных порядков) или
+    None; из нескольких вариантов - ближайший к reference_year
+    """
+    best = None
+    for year, day_month in ((c, (a, b)), (a, (b, c))):
+        first, second = day_month
+        valid = ((1 <= first <= 31 and 1 <= second <= 12)
+                 or (1 <= second <= 31 and 1 <= first <= 12))
+        if not valid:
+            continue
+        year = _two_to_four_digit_year(year)
+        if 1000 <= year <= 2050 and (best is None
+                                      or abs(year - reference_year) < abs(best - reference_year)):
+            best = year
+    return best
+
+
+@lru_cache(maxsize=4096)
+def _digits_date_year(token: str, reference_year: int) -> Optional[int]:
+    """Год самой правдоподобной даты из 4-8 цифр без разделителей или None"""
+    best = None
+    for first, second in _DATE_SPLITS[len(token)]:
+        year = _date_year(int(token[:first]), int(token[first:second]), int(token[second:]),
+                          reference_year)
+        if year is not None and (best is None
+                                 or abs(year - reference_year) < abs(best - reference_year)):
+            best = year
+    return best
+
+
+def date_guesses(year: int, reference_year: int, separator: bool) -> float:
+    guesses = year_guesses(year, reference_year) * DAYS_IN_YEAR
+    return guesses * 4 if separator else guesses
+
+
+class GuessEstimator:
+    """
+    Оценщик числа попыток подбора.
+
+    Кандидаты-фрагменты собираются за один проход автомата PatternMatcher
+    (плюс проходы по перевернутому паролю и вариантам с заменами символов)
+    и регулярными выражениями для повторов и дат. Лучшее разложение ищется
+    динамическим программированием по концу фрагмента и числу фрагментов;
+    оценки повторяющихся подстрок запоминаются. Если кандидатов больше
+    max_matches, оставшиеся сборщики пропускаются; после max_steps шагов
+    разбора пропускается перебор между фрагментами (truncated=True).
+
+    Годы и даты оцениваются по удаленности от reference_year (по
+    умолчанию - текущий год на момент оценки)
+    """
+
+    def __init__(self, matcher: PatternMatcher, max_matches: int = DEFAULT_MAX_MATCHES,
+                 max_steps: int = DEFAULT_MAX_STEPS, reference_year: Optional[int] = None):
+        self.matcher = matcher
+        self.max_matches = max_matches
+        self.max_steps = max_steps
+        self.reference_year = reference_year
+        self._unit_guesses = lru_cache(maxsize=4096)(self._estimate_unit)
+        self._cached_estimate = lru_cache(maxsize=1024)(self._estimate)
+
+    def estimate(self, password: str) -> GuessEstimate:
+        """Оценка числа попыток; результаты запоминаются"""
+        return self._cached_estimate(password, self.reference_year or date.today().year)
+
+    def score(self, password: str) -> int:
+        """Оценка 0-100"""
+        return self.estimate(password).score
+
+    def _estimate(self, password: str, reference_year: int) -> GuessEstimate:
+        if not password:
+            return GuessEstimate(1.0, 0.0, 0, (), False)
+
+        analyzed = password[:MAX_ANALYZED_LENGTH]
+        matches, complete = self._matches(analyzed, reference_year, self.max_matches)
+        guesses, sequence, finished = self._most_guessable(analyzed, matches, self.max_steps)
+
+        # Хвост длиннее MAX_ANALYZED_LENGTH не учитывается: оценка только занижается
+        truncated = not (complete and finished) or len(password) > len(analyzed)
+
+        log10 = math.log10(max(guesses, 1))
+        return GuessEstimate(guesses, log10, score_from_guesses(guesses), sequence, truncated)
+
+    def _estimate_unit(self, token: str, reference_year: int) -> float:
+        """Число попыток для повторяемой части (без надбавки за число фрагментов)"""
+        matches, _ = self._matches(token, reference_year, math.inf)
+        return self._most_guessable(token, matches, math.inf, exclude_additive=True)[0]
+
+    # --- Сбор кандидатов --------------------------------------------------
+
+    def _matches(self, password: str, reference_year: int,
+                 max_matches: float) -> Tuple[List[Match], bool]:
+        """Кандидаты-фрагменты и признак, что отработали все сборщики"""
+        lowered = password.lower()
+        if len(lowered) != len(password):
+            lowered = password  # Позиции должны совпадать с исходным паролем
+        matches: List[Match] = []
+        collectors = (self._dictionary_matches, self._l33t_matches, self._repeat_matches,
+                      self._date_matches)
+        for collector in collectors:
+            collector(password, lowered, matches, reference_year)
+            if len(matches) > max_matches:
+                return matches, False
+        return matches, True
+
+    def _dictionary_matches(self, password: str, lowered: str, matches: List[Match],
+                            reference_year: int) -> None:
+        matcher = self.matcher
+        found = sorted(set(matcher.finditer(lowered)))
+        for start, end, kind in merge_windows(found):
+            token = password[start:end]
+            if kind == KIND_DICTIONARY:
+                rank = matcher.rank(lowered[start:end]) or 1
+                matches.append(Match(start, end, kind, rank * uppercase_variations(token)))
+            elif kind == KIND_SEQUENCE:
+                matches.append(Match(start, end, kind, sequence_guesses(token)))
+            elif kind == KIND_KEYBOARD:
+                matches.append(Match(start, end, kind, keyboard_guesses(token)))
+
+        # Перевернутые слова: поиск по перевернутому паролю
+        length = len(lowered)
+        for start, end, kind in matcher.finditer(lowered[::-1]):
+            if kind != KIND_DICTIONARY or end - start < 2:
+                continue
+            word = lowered[length - end:length - start][::-1]
+            if word == word[::-1]:
+                continue  # Палиндром уже найден как обычное слово
+            rank = matcher.rank(word) or 1
+            token = password[length - end:length - start]
+            matches.append(Match(length - end, length - start, KIND_REVERSED,
+                                 rank * uppercase_variations(token) * 2))
+
+    def _l33t_matches(self, password: str, lowered: str, matches: List[Match],
+                      reference_year: int) -> None:
+        positions = [(i, L33T_TABLE[char]) for i, char in enumerate(lowered) if char in L33T_TABLE]
+        if not positions or not any(char.isalpha() for char in lowered):
+            return  # Без букв замена не может дополнить слово
+
+        matcher = self.matcher
+        seen = set()
+        chars = list(lowered)
+        # Для неоднозначных замен (1 -> i или l) - два варианта: первые и последние буквы
+        for choice in (0, -1):
+            if choice and all(len(letters) == 1 for _, letters in positions):
+                break
+            substituted = {}
+            for i, letters in positions:
+                chars[i] = substituted[i] = letters[choice]
+            variant = "".join(chars)
+            for start, end, kind in matcher.finditer(variant):
+                if kind != KIND_DICTIONARY or (start, end) in seen:
+                    continue
+                substitutions = {lowered[i]: letter for i, letter in substituted.items()
+                                 if start <= i < end}
+                if not substitutions:
+                    continue  # Обычное словарное совпадение, уже учтено
+                seen.add((start, end))
+                rank = matcher.rank(variant[start:end]) or 1
+                token = password[start:end]
+                matches.append(Match(start, end, KIND_L33T,
+                                     rank * uppercase_variations(token)
+                                     * l33t_variations(token, substitutions)))
+
+    def _repeat_matches(self, password: str, lowered: str, matches: List[Match],
+                        reference_year: int) -> None:
+        position = 0
+        while position < len(password):
+            greedy = _GREEDY_REPEAT.search(password, position)
+            if greedy is None:
+                return
+            lazy = _LAZY_REPEAT.search(password, position)
+            if len(greedy.group(0)) > len(lazy.group(0)):
+                match = greedy
+                unit = _LAZY_REPEAT.fullmatch(greedy.group(0)).group(1)
+            else:
+                match = lazy
+                unit = lazy.group(1)
+            count = len(match.group(0)) // len(unit)
+            matches.append(Match(match.start(), match.end(), KIND_REPEAT,
+                                 self._unit_guesses(unit, reference_year) * count))
+            position = match.end()
+
+    def _date_matches(self, password: str, lowered: str, matches: List[Match],
+                      reference_year: int) -> None:
+        for match in _YEAR.finditer(password):
+            matches.append(Match(match.start(), match.end(), KIND_YEAR,
+                                 year_guesses(int(match.group(0)), reference_year)))
+
+        # Даты без разделителей: любые 4-8 цифр подряд внутри серии цифр
+        for run in _DIGITS.finditer(password):
+            digits = run.group(0)
+            for length in range(4, min(8, len(digits)) + 1):
+                for offset in range(len(digits) - length + 1):
+                    year = _digits_date_year(digits[offset:offset + length], reference_year)
+                    if year is not None:
+                        start = run.start() + offset
+                        matches.append(Match(start, start + length, KIND_DATE,
+                                             date_guesses(year, reference_year, False)))
+
+        for match in _DATE_WITH_SEPARATOR.finditer(password):
+            first, separator, second, third = match.groups()
+            year = _date_year(int(first), int(second), int(third), reference_year)
+            if year is not None:
+                length = len(first) + len(second) + len(third) + 2
+                matches.append(Match(match.start(), match.start() + length, KIND_DATE,
+                                     date_guesses(year, reference_year, True)))
+
+    # --- Выбор разложения -------------------------------------------------
+
+    def _most_guessable(self, password: str, matches: List[Match], max_steps: float,
+                        exclude_additive: bool = False) -> Tuple[float, Tuple[Match, ...], bool]:
+        """
+        Разложение пароля с минимальным числом попыток:
+        l! * произведение попыток фрагментов (+ надбавка за число фрагментов l).
+        Шаг - проверка одного продолжения разложения префикса.
+        Возвращает (попытки, фрагменты, уложились ли в max_steps)
+        """
+        n = len(password)
+        if not matches:
+            guesses = bruteforce_guesses(n, whole=True)
+            return (guesses if exclude_additive else guesses + 1,
+                    (Match(0, n, KIND_BRUTEFORCE, guesses),), True)
+
+        by_end: List[List[Match]] = [[] for _ in range(n + 1)]
+        for match in matches:
+            minimum = (1 if match.end - match.start == n
+                       else MIN_GUESSES_SINGLE_CHAR if match.end - match.start == 1
+                       else MIN_GUESSES_MULTI_CHAR)
+            if match.guesses < minimum:
+                match = match._replace(guesses=float(minimum))
+            by_end[match.end].append(match)
+
+        factorials = _FACTORIALS
+        bruteforce = _BRUTEFORCE_PART
+        if exclude_additive:
+            additive = [0] * (n + 2)
+        else:
+            additive = [MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (length - 1) if length else 0
+                        for length in range(n + 2)]
+
+        # optimal[k][l] = (попытки, произведение, начало, фрагмент или None для перебора)
+        # для лучшего разложения префикса длины k на l фрагментов
+        optimal: List[Dict[int, Tuple]] = [{} for _ in range(n + 1)]
+
+        def update(end: int, start: int, match: Optional[Match], match_guesses: float,
+                   length: int, product_before: float) -> bool:
+            product_guesses = match_guesses * product_before
+            guesses = factorials[length] * product_guesses + additive[length]
+            candidates = optimal[end]
+            for other_length, other in candidates.items():
+                if other_length <= length and other[0] <= guesses:
+                    return False
+            candidates[length] = (guesses, product_guesses, start, match)
+            return True
+
+        anchors: List[int] = []  # Префиксы, которые может оканчивать найденный фрагмент
+        finished = True
+        steps = 0
+        for end in range(1, n + 1):
+            anchored = False
+            for match in by_end[end]:
+                start = match.start
+                if not start:
+                    anchored |= update(end, 0, match, match.guesses, 1, 1.0)
+                    continue
+                steps += len(optimal[start])
+                for length, entry in optimal[start].items():
+                    anchored |= update(end, start, match, match.guesses, length + 1, entry[1])
+
+            update(end, 0, None, _BRUTEFORCE_WHOLE[end] if end == n else bruteforce[end], 1, 1.0)
+            if finished and steps > max_steps:
+                finished = False
+            # Перебор после найденных фрагментов - самая дорогая часть;
+            # после max_steps шагов она пропускается
+            if finished:
+                for start in anchors:
+                    guesses = bruteforce[end - start]
+                    steps += len(optimal[start])
+                    for length, entry in optimal[start].items():
+                        if entry[3] is not None:
+                            update(end, start, None, guesses, length + 1, entry[1])
+            if anchored:
+                anchors.append(end)
+
+        best_length = min(optimal[n], key=lambda length: optimal[n][length][0])
+        guesses = optimal[n][best_length][0]
+
+        sequence = []
+        end, length = n, best_length
+        while end > 0:
+            _, _, start, match = optimal[end][length]
+            if match is None:
+                match = Match(start, end, KIND_BRUTEFORCE,
+                              _BRUTEFORCE_WHOLE[n] if end - start == n else bruteforce[end - start])
+            sequence.append(match)
+            end, length = start, length - 1
+        sequence.reverse()
+        return guesses, tuple(sequence), finished
@@ -0,0 +1,191 @@
+"""
+Модуль для проверки выгрузок хешей (SHA-1 или NTLM) без паролей открытым текстом
+"""
+
+import sys
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from audit_checkpoint import AuditCheckpoint, read_lines_at
+from breach_index import HASH_HEX_LENGTHS
+from file_audit import DEFAULT_WINDOW, in_windows
+from metrics import METRICS
+from output_writers import ResultWriter, TextWriter
+from password_checker import _hashes_breach_batch
+
+_HEX_DIGITS = frozenset("0123456789ABCDEF")
+
+# Источники результата, означающие, что хеш действительно проверен
+_CHECKED_SOURCES = ("haveibeenpwned", "pwned_mirror", "local_db", "disabled")
+
+
+class HashAuditStats:
+    """Сводная статистика проверки хешей"""
+
+    def __init__(self):
+        self.total = 0
+        self.breached = 0
+        self.unverified = 0
+        self.invalid = 0
+
+    def add(self, result: Dict) -> None:
+        self.total += 1
+        if result['breached']:
+            self.breached += 1
+        elif result['source'] not in _CHECKED_SOURCES:
+            self.unverified += 1
+
+    def state(self) -> Dict:
+        """Сырые счетчики для контрольной точки"""
+        return dict(vars(self))
+
+    def restore(self, state: Dict) -> None:
+        for name in vars(self):
+            setattr(self, name, state[name])
+
+    def as_dict(self) -> Dict:
+        return {
+            "total": self.total,
+            "breached": self.breached,
+            "unverified": self.unverified,
+            "invalid": self.invalid,
+        }
+
+
+def parse_hash_line(line: str, hash_type: str) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Разбирает строку выгрузки: 'HASH', 'user:HASH', 'HASH:COUNT' или
+    pwdump 'user:rid:LM:NT:::'. Хешем считается последнее поле нужной
+    длины из шестнадцатеричных цифр, учетной записью - первое поле перед ним.
+    Возвращает (учетная запись или None, хеш в верхнем регистре) или None
+    """
+    hex_length = HASH_HEX_LENGTHS[hash_type]
+    fields = line.strip().split(":")
+    for position in range(len(fields) - 1, -1, -1):
+        field = fields[position].strip().upper()
+        if len(field) == hex_length and _HEX_DIGITS.issuperset(field):
+            return (fields[0] if position else None), field
+    return None
+
+
+def read_hashes(filepath: str, hash_type: str, stats: HashAuditStats,
+                start: Optional[Tuple[int, int]] = None,
+                positions: Optional[deque] = None) -> Iterator[Tuple[int, Optional[str], str]]:
+    """
+    Лениво читает (номер строки, учетная запись, хеш); нераспознанные строки считаются.
+
+    С start=(смещение, номер строки) чтение идет с этого байтового смещения,
+    а в positions для каждого хеша добавляется (смещение конца строки,
+    число нераспознанных строк до нее) для контрольных точек
+    """
+    if start is not None:
+        for line_no, offset, line in read_lines_at(filepath, *start, errors='replace'):
+            if not line.strip():
+                continue
+            parsed = parse_hash_line(line, hash_type)
+            if parsed is None:
+                stats.invalid += 1
+                continue
+            positions.append((offset, stats.invalid))
+            yield (line_no,) + parsed
+        return
+
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            parsed = parse_hash_line(line, hash_type)
+            if parsed is None:
+                stats.invalid += 1
+                continue
+            yield (line_no,) + parsed
+
+
+def check_hash_windows(windows: Iterable[list], hash_type: str, use_api: bool = True,
+                       concurrency: int = 1,
+                       **breach_options) -> Iterator[Tuple[int, Optional[str], str, Dict]]:
+    """Проверяет окна хешей пакетно, выдает (номер строки, учетная запись, хеш, результат)"""
+    for window in windows:
+        with METRICS.stage("breach_check"):
+            results = _hashes_breach_batch(
+                [hex_hash for _, _, hex_hash in window], hash_type, use_api,
+                concurrency=concurrency, **breach_options
+            )
+        METRICS.inc("hashes_checked", len(window))
+        for (line_no, account, hex_hash), result in zip(window, results):
+            yield line_no, account, hex_hash, result
+
+
+def print_hash_summary(stats: HashAuditStats, hash_type: str, client=None) -> None:
+    print("\n" + "=" * 50)
+    print("СВОДНАЯ СТАТИСТИКА")
+    print("=" * 50)
+    print(f"• Проверено хешей {hash_type.upper()}: {stats.total}")
+    print(f"• Скомпрометированных: {stats.breached}")
+    if stats.unverified:
+        print(f"• Не удалось проверить (ошибки API): {stats.unverified}")
+    if stats.invalid:
+        print(f"• Пропущено строк без хеша {hash_type.upper()}: {stats.invalid}")
+
+    if client is not None and client.requests_sent:
+        client_stats = client.stats()
+        print(f"• Запросов к API: {client_stats['requests']} "
+              f"(повторов: {client_stats['retries']}), задержка: "
+              f"средняя {client_stats['latency_avg_ms']:.0f} мс, "
+              f"p95 {client_stats['latency_p95_ms']:.0f} мс")
+
+    if stats.breached:
+        print(f"\n⚠️  ВНИМАНИЕ: {stats.breached} учетных записей используют "
+              f"скомпрометированные пароли!")
+    elif stats.total:
+        print(f"\n🎉 Скомпрометированных паролей не найдено")
+
+
+def run_hash_audit(filepath: str, hash_type: str = "sha1", use_api: bool = True,
+                   concurrency: int = 1, window: int = DEFAULT_WINDOW,
+                   writer: Optional[ResultWriter] = None,
+                   checkpoint: Optional[AuditCheckpoint] = None,
+                   **breach_options) -> HashAuditStats:
+    """
+    Проверка выгрузки хешей на утечки.
+
+    Файл всегда читается потоково окнами по window хешей, поэтому память
+    не зависит от размера выгрузки. В текстовом отчете (по умолчанию)
+    выводятся только скомпрометированные учетные записи (по имени или
+    номеру строки), сами хеши не печатаются; другие форматы - см. output_writers.
+    checkpoint - как в file_audit.run_file_audit.
+    """
+    if writer is None:
+        writer = TextWriter(sys.stdout, owns_stream=False)
+    stats = HashAuditStats()
+    start = None
+    positions = deque()
+    if checkpoint is not None:
+        start = (checkpoint.offset, checkpoint.line)
+        if checkpoint.resumed:
+            stats.restore(checkpoint.stats)
+            writer.records = stats.total
+            print(f"\n↩️  Продолжение со строки {checkpoint.line + 1} "
+                  f"(уже проверено хешей: {stats.total})")
+    print(f"\nПроверка хешей {hash_type.upper()} (окно: {window})")
+    windows = in_windows(read_hashes(filepath, hash_type, stats, start, positions), window)
+
+    write = writer.write_hash
+    for line_no, account, hex_hash, result in check_hash_windows(windows, hash_type, use_api,
+                                                                 concurrency, **breach_options):
+        stats.add(result)
+        write(line_no, account, hex_hash, result)
+        if checkpoint is not None:
+            offset, invalid = positions.popleft()
+            if checkpoint.due():
+                # Читатель ушел вперед: нераспознанные строки считаются до текущей
+                state = stats.state()
+                state["invalid"] = invalid
+                checkpoint.save(offset, line_no, state, writer.tell())
+
+    writer.write_summary(stats.as_dict())
+    writer.flush()
+    if checkpoint is not None:
+        checkpoint.discard()
+    print_hash_summary(stats, hash_type, breach_options.get('client'))
+    return stats
@@ -4,9 +4,15 @@
 """
 
 import argparse
+import os
 import sys
-from password_checker import check_password, check_passwords_from_file
-from password_generator import generate_password, generate_passwords
+# Здесь только легкие модули; проверка паролей, requests, sqlite3 и индекс
+# загружаются в main(), когда режим запуска действительно их использует
+from breach_cache import DEFAULT_CACHE_PATH, DEFAULT_TTL
+from breach_client import API_BASE_URL
+from result_cache import DEFAULT_RESULT_TTL
+from metrics import METRICS, FORMATS as METRICS_FORMATS, MetricsReporter
+from password_generator import generate_password, generate_passwords, write_passwords_to
 
 
 def print_banner():
@@ -30,6 +36,40 @@ def main():
   %(prog)s -g -l 16                Сгенерировать пароль из 16 символов
   %(prog)s -f passwords.txt        Проверить пароли из файла
   %(prog)s -c "test" --no-api      Проверить без подключения к интернету
+  %(prog)s -f passwords.txt --cache  Кэшировать ответы API на диске
+  %(prog)s -f passwords.txt --result-cache-db results.db
+                                   Не проверять заново пароли из прошлых запусков
+  %(prog)s -f passwords.txt --concurrency 16  Параллельные запросы к API
+  %(prog)s -f passwords.txt --concurrency 32 --rate 200
+  %(prog)s -f dump.txt --stream    Потоковая проверка большого файла
+  %(prog)s -f dump.txt --no-api --workers 8
+                                   Локальная проверка на 8 процессах
+  %(prog)s -f passwords.txt --no-api --local-index rockyou.idx
+                                   Проверить по локальному индексу утечек
+  %(prog)s -f passwords.txt --mirror ~/pwned-mirror --no-api
+                                   Проверить без сети по зеркалу (src/pwned_mirror.py sync)
+  %(prog)s -f ntds.txt --hashes ntlm --concurrency 16
+                                   Проверить выгрузку NTLM-хешей (user:hash или pwdump)
+  %(prog)s -c "Tr0ub4dor&3" --engine guesses
+                                   Оценка по числу попыток подбора (словари, даты, повторы)
+  %(prog)s -f passwords.txt --no-api --wordlist words.txt
+                                   Искать в паролях слова из своего словаря
+  %(prog)s -f passwords.txt --policy policies.json
+                                   Проверить соответствие политикам из файла
+  %(prog)s -f dump.txt --stream --format jsonl --output results.jsonl
+                                   Результаты по номерам строк в JSONL (также csv, summary)
+  %(prog)s -f dump.txt --checkpoint audit.ckpt --resume
+                                   Продолжить прерванную проверку с места остановки
+  %(prog)s -f passwords.txt --api-url http://127.0.0.1:8000
+                                   Проверить через локальный сервер (src/mock_server.py)
+  %(prog)s -f dump.txt --metrics-out metrics.prom --metrics-format prometheus
+                                   Сохранить метрики по стадиям проверки
+  %(prog)s --generate-multiple 100 --min-score 90 --in-flight 32
+                                   Только пароли с оценкой от 90, не найденные в утечках
+  %(prog)s --bulk 1000000 -l 16 --output creds.txt --processes 4
+                                   Потоковая генерация миллиона паролей в файл
+  %(prog)s --serve --no-api --listen 127.0.0.1:8080
+                                   Сервис: POST /check {"password": "..."}, POST /batch
   
 Для подробной справки: %(prog)s --help
         """
@@ -50,6 +90,12 @@ def main():
         metavar="FILEPATH"
     )
     
+    group.add_argument(
+        "--serve",
+        help="Запустить сервис проверки паролей (HTTP API с /check и /batch)",
+        action="store_true"
+    )
+    
     group.add_argument(
         "-g", "--generate",
         help="Сгенерировать безопасный пароль",
@@ -63,6 +109,13 @@ def main():
         metavar="COUNT"
     )
     
+    group.add_argument(
+        "--bulk",
+        help="Сгенерировать COUNT паролей потоком (по одному на строке, без проверки)",
+        type=int,
+        metavar="COUNT"
+    )
+    
     parser.add_argument(
         "-l", "--length",
         help="Длина генерируемого пароля (по умолчанию: 12)",
@@ -71,12 +124,240 @@ def main():
         choices=range(8, 65)  # От 8 до 64 символов
     )
     
+    parser.add_argument(
+        "--min-score",
+        help="Выдавать только пароли с оценкой не ниже N и не найденные в утечках "
+             "(слабые кандидаты заменяются новыми)",
+        type=int,
+        choices=range(0, 101),
+        metavar="N"
+    )
+    
+    parser.add_argument(
+        "--in-flight",
+        help="Сколько кандидатов одновременно проверяется через API при --min-score "
+             "(по умолчанию: 16)",
+        type=int,
+        default=16,
+        metavar="N"
+    )
+    
+    parser.add_argument(
+        "--output",
+        help="Записать сгенерированные пароли (--bulk) или результаты проверки файла (-f) "
+             "в файл вместо вывода на экран",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--format",
+        help="Формат результатов проверки файла: text, jsonl, csv или summary "
+             "(только сводка); по умолчанию: text",
+        choices=("text", "jsonl", "csv", "summary"),
+        default="text"
+    )
+    
+    parser.add_argument(
+        "--processes",
+        help="Число процессов для --bulk (по умолчанию: 1)",
+        type=int,
+        default=1,
+        metavar="N"
+    )
+    
     parser.add_argument(
         "--no-api",
         help="Не проверять через API (только локальная проверка)",
         action="store_true"
     )
     
+    parser.add_argument(
+        "--api-url",
+        help=f"Адрес API диапазонов хешей (по умолчанию: {API_BASE_URL})",
+        default=API_BASE_URL,
+        metavar="URL"
+    )
+    
+    parser.add_argument(
+        "--cache",
+        help=f"Кэшировать ответы API на диске (по умолчанию: {DEFAULT_CACHE_PATH})",
+        nargs="?",
+        const=DEFAULT_CACHE_PATH,
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--cache-ttl",
+        help=f"Срок жизни записей кэша в часах (по умолчанию: {DEFAULT_TTL // 3600})",
+        type=float,
+        default=DEFAULT_TTL / 3600,
+        metavar="HOURS"
+    )
+    
+    parser.add_argument(
+        "--cache-max-mb",
+        help="Максимальный размер кэша в мегабайтах (по умолчанию: 512)",
+        type=int,
+        default=512,
+        metavar="MB"
+    )
+    
+    parser.add_argument(
+        "--local-index",
+        help="Локальный индекс утечек (собирается: python src/breach_index.py build)",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--mirror",
+        help="Локальное зеркало Pwned Passwords (скачивается: python src/pwned_mirror.py sync)",
+        metavar="DIR"
+    )
+    
+    parser.add_argument(
+        "--engine",
+        help="Числовая оценка: classic - по длине и классам символов, "
+             "guesses - по числу попыток подбора (по умолчанию: classic)",
+        choices=("classic", "guesses"),
+        default="classic"
+    )
+    
+    parser.add_argument(
+        "--wordlist",
+        help="Дополнительный словарь для поиска паттернов (слово на строке, можно несколько раз)",
+        action="append",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--policy",
+        help="Файл парольных политик (JSON): проверять соответствие каждой из них",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        help="Число одновременных запросов к API при проверке файла (по умолчанию: 1)",
+        type=int,
+        default=1,
+        metavar="N"
+    )
+    
+    parser.add_argument(
+        "--rate",
+        help="Запросов к API в секунду при --concurrency и --in-flight; после ответа 429 "
+             "частота снижается и постепенно восстанавливается (по умолчанию: 50)",
+        type=float,
+        default=50.0,
+        metavar="N"
+    )
+    
+    parser.add_argument(
+        "--hashes",
+        help="Файл содержит хеши SHA-1 или NTLM (по одному на строке или user:hash), "
+             "а не пароли",
+        choices=("sha1", "ntlm")
+    )
+    
+    parser.add_argument(
+        "--stream",
+        help="Потоковая проверка файла с постоянным расходом памяти",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--window",
+        help="Размер окна потоковой проверки (по умолчанию: 10000)",
+        type=int,
+        default=10000,
+        metavar="N"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        help="Число процессов для локальной оценки паролей из файла (по умолчанию: 1)",
+        type=int,
+        default=1,
+        metavar="N"
+    )
+    
+    parser.add_argument(
+        "--checkpoint",
+        help="Периодически сохранять место проверки файла и статистику в PATH "
+             "(включает --stream); без --cache ответы API кэшируются в PATH.ranges. "
+             "После успешного завершения оба файла удаляются",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        help="Продолжить прерванную проверку с контрольной точки --checkpoint",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--checkpoint-interval",
+        help="Секунд между сохранениями контрольной точки (по умолчанию: 30)",
+        type=float,
+        default=30.0,
+        metavar="SECONDS"
+    )
+    
+    parser.add_argument(
+        "--result-cache",
+        help="Кэшировать результаты повторяющихся паролей при проверке файла (в памяти)",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--result-cache-db",
+        help="Сохранять результаты между запусками в SQLite (хранятся только SHA-1; "
+             "включает --result-cache)",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--result-cache-ttl",
+        help=f"Срок жизни кэшированных результатов в часах "
+             f"(по умолчанию: {DEFAULT_RESULT_TTL // 3600})",
+        type=float,
+        default=DEFAULT_RESULT_TTL / 3600,
+        metavar="HOURS"
+    )
+    
+    parser.add_argument(
+        "--listen",
+        help="Адрес сервиса HOST:PORT (по умолчанию: 127.0.0.1:8080)",
+        default="127.0.0.1:8080",
+        metavar="HOST:PORT"
+    )
+    
+    parser.add_argument(
+        "--unix-socket",
+        help="Слушать Unix-сокет вместо TCP-адреса",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--metrics-out",
+        help="Сохранить метрики (время по стадиям, счетчики запросов) в файл",
+        metavar="PATH"
+    )
+    
+    parser.add_argument(
+        "--metrics-format",
+        help="Формат метрик: json или prometheus (по умолчанию: json)",
+        choices=METRICS_FORMATS,
+        default="json"
+    )
+    
+    parser.add_argument(
+        "--metrics-interval",
+        help="Обновлять файл метрик каждые N секунд во время проверки",
+        type=float,
+        metavar="SECONDS"
+    )
+    
     parser.add_argument(
         "--simple",
         help="Упрощенный вывод (только результат)",
@@ -98,19 +379,221 @@ def main():
     
     args = parser.parse_args()
     
+    if args.bulk is not None and args.output is None:
+        # В stdout идут только пароли, чтобы вывод можно было перенаправить
+        args.simple = True
+    
+    if args.file and args.format != "text" and args.output is None:
+        # stdout занят записями результатов, баннер и итог не печатаются
+        args.simple = True
+    
     if not args.simple:
         print_banner()
         print("=" * 60)
     
+    cache = None
+    checkpoint_cache = False
+    client = None
+    local_index = None
+    mirror = None
+    result_cache = None
+    reporter = None
+    
     try:
-        if args.generate:
+        if args.hashes and not args.file:
+            print("❌ Ошибка: --hashes используется только вместе с -f/--file")
+            sys.exit(1)
+        
+        if args.format != "text" and not args.file:
+            print("❌ Ошибка: --format используется только вместе с -f/--file")
+            sys.exit(1)
+        
+        if args.output is not None and args.bulk is None and not args.file:
+            print("❌ Ошибка: --output используется только вместе с --bulk или -f/--file")
+            sys.exit(1)
+        
+        if args.checkpoint and not args.file:
+            print("❌ Ошибка: --checkpoint используется только вместе с -f/--file")
+            sys.exit(1)
+        
+        if args.resume and not args.checkpoint:
+            print("❌ Ошибка: для --resume укажите файл контрольной точки: --checkpoint PATH")
+            sys.exit(1)
+        
+        if args.metrics_out:
+            if args.metrics_interval is not None and args.metrics_interval <= 0:
+                print("❌ Ошибка: --metrics-interval должно быть больше 0")
+                sys.exit(1)
+            METRICS.enable()
+            reporter = MetricsReporter(METRICS, args.metrics_out, args.metrics_format,
+                                       args.metrics_interval).start()
+        
+        # Генерация с --simple ничего не проверяет: ни кэши, ни сеть ей не нужны
+        checks_passwords = not (args.bulk is not None
+                                or args.simple and (args.generate or args.generate_multiple)
+                                and args.min_score is None)
+        if checks_passwords:
+            from password_checker import check_password, check_passwords_from_file
+        
+        if checks_passwords and args.wordlist:
+            from password_analyzer import configure_patterns
+            try:
+                matcher = configure_patterns(args.wordlist)
+            except OSError as e:
+                print(f"❌ Ошибка: не удалось прочитать словарь: {e}")
+                sys.exit(1)
+            if args.verbose:
+                print(f"📚 Паттернов в автомате: {matcher.pattern_count}")
+        
+        if checks_passwords and args.engine != "classic":
+            # Движок меняется до создания пула процессов и сервиса
+            from password_analyzer import configure_engine
+            configure_engine(args.engine)
+        
+        if checks_passwords and args.policy:
+            if args.file and args.hashes:
+                print("❌ Ошибка: --policy не применяется к выгрузкам хешей")
+                sys.exit(1)
+            from password_policy import PolicyError, configure_policies
+            try:
+                policies = configure_policies(args.policy)
+            except (OSError, PolicyError) as e:
+                print(f"❌ Ошибка: не удалось загрузить политики: {e}")
+                sys.exit(1)
+            if args.verbose:
+                print(f"📜 Политик: {len(policies.names)} ({', '.join(policies.names)})")
+        
+        # Без --cache проверка с контрольной точкой кэширует ответы API рядом с
+        # ней: при --resume диапазоны после последнего сохранения не запрашиваются снова
+        checkpoint_cache = bool(args.file and args.checkpoint and not args.cache
+                                and checks_passwords and not args.no_api)
+        if checks_passwords and (args.cache or checkpoint_cache) and not args.no_api:
+            from breach_cache import RangeCache
+            if args.api_url != API_BASE_URL and args.cache == DEFAULT_CACHE_PATH:
+                # Ответы тестового сервера не должны попасть в общий кэш настоящего API
+                print("❌ Ошибка: с --api-url укажите отдельный путь кэша: --cache PATH")
+                sys.exit(1)
+            if checkpoint_cache:
+                from audit_checkpoint import ranges_cache_path
+                cache_path = ranges_cache_path(args.checkpoint)
+            else:
+                cache_path = args.cache
+            cache = RangeCache(
+                cache_path,
+                ttl=args.cache_ttl * 3600,
+                max_bytes=args.cache_max_mb * 1024 * 1024
+            )
+            METRICS.add_collector("range_cache", cache.stats)
+        
+        if checks_passwords and args.local_index:
+            from breach_index import BreachIndex
+            local_index = BreachIndex(args.local_index)
+            expected = args.hashes if args.file and args.hashes else "sha1"
+            if local_index.hash_name != expected:
+                print(f"❌ Ошибка: индекс '{args.local_index}' содержит хеши "
+                      f"{local_index.hash_name}, а нужен {expected}")
+                sys.exit(1)
+        
+        if checks_passwords and args.mirror:
+            from pwned_mirror import PwnedMirror
+            if args.file and args.hashes == "ntlm":
+                print("❌ Ошибка: зеркало хранит только хеши SHA-1")
+                sys.exit(1)
+            mirror = PwnedMirror(args.mirror)
+            METRICS.add_collector("mirror", mirror.stats)
+        
+        if checks_passwords and not args.no_api:
+            if args.rate <= 0:
+                print("❌ Ошибка: --rate должно быть больше 0")
+                sys.exit(1)
+            from breach_client import BreachClient
+            # Один клиент на весь запуск: соединения с API переиспользуются
+            client = BreachClient(args.api_url,
+                                  pool_size=max(16, args.concurrency, args.in_flight),
+                                  verbose=not args.serve, rate=args.rate)
+            METRICS.add_collector("api_client", client.stats)
+        
+        # Общие параметры проверки на утечки для всех режимов
+        breach_options = {
+            "cache": cache,
+            "client": client,
+            "local_index": local_index,
+            "mirror": mirror
+        }
+        
+        if args.serve:
+            from service import PasswordService, parse_listen, serve
+            if args.concurrency < 1:
+                print("❌ Ошибка: --concurrency должно быть не меньше 1")
+                sys.exit(1)
+            try:
+                host, port = parse_listen(args.listen)
+            except ValueError as e:
+                print(f"❌ Ошибка: {e}")
+                sys.exit(1)
+            # Метрики сервиса отдаются по GET /metrics
+            METRICS.enable()
+            service = PasswordService(not args.no_api, args.concurrency, **breach_options)
+            serve(service, host, port, args.unix_socket, log_requests=args.verbose)
+        
+        elif args.bulk is not None:
+            if args.bulk < 1:
+                print("❌ Ошибка: количество должно быть не меньше 1")
+                sys.exit(1)
+            if args.processes < 1:
+                print("❌ Ошибка: --processes должно быть не меньше 1")
+                sys.exit(1)
+            write_passwords_to(args.output, args.bulk, args.length, args.processes)
+            if args.output and not args.simple:
+                print(f"\n✨ Сгенерировано паролей: {args.bulk} -> {args.output}")
+        
+        elif args.min_score is not None and (args.generate or args.generate_multiple):
+            from breach_client import PasswordAPIError
+            from verified_generator import VerifiedGenerator
+            count = args.generate_multiple or 1
+            if count < 1:
+                print("❌ Ошибка: количество должно быть не меньше 1")
+                sys.exit(1)
+            if args.in_flight < 1:
+                print("❌ Ошибка: --in-flight должно быть не меньше 1")
+                sys.exit(1)
+            
+            generator = VerifiedGenerator(args.length, args.min_score, use_api=not args.no_api,
+                                          in_flight=args.in_flight, **breach_options)
+            METRICS.add_collector("generator", generator.stats)
+            
+            def show(password, result):
+                # Пароль выводится сразу после проверки, не дожидаясь остальных
+                if args.simple:
+                    print(password, flush=True)
+                else:
+                    print(f"{generator.accepted}. {password}  "
+                          f"(оценка {result['strength_score']}/100, "
+                          f"{result['breach_check']['message'].lower()})")
+            
+            if not args.simple:
+                print(f"\n✨ Генерация {count} паролей с оценкой от {args.min_score}:\n")
+            try:
+                generator.run(count, on_accept=show)
+            except (ValueError, PasswordAPIError) as e:
+                print(f"❌ Ошибка: {e}")
+                sys.exit(1)
+            finally:
+                if not args.simple:
+                    stats = generator.stats()
+                    print(f"\n📊 Кандидатов: {stats['generated']}, отброшено слабых: "
+                          f"{stats['rejected_weak']}, найденных в утечках: "
+                          f"{stats['rejected_breached']}, непроверенных: {stats['unverified']}")
+        
+        elif args.generate:
             password = generate_password(args.length)
             if args.simple:
                 print(password)
             else:
                 print(f"\n✨ Сгенерированный пароль: {password}")
                 print("\n🔍 Проверяем его безопасность...")
-                check_password(password, use_api=not args.no_api, verbose=not args.simple)
+                check_password(password, use_api=not args.no_api, verbose=not args.simple,
+                               **breach_options)
         
         elif args.generate_multiple:
             count = args.generate_multiple
@@ -126,21 +609,53 @@ def main():
                 print(f"\n✨ Сгенерировано {count} паролей:")
                 for i, pwd in enumerate(passwords, 1):
                     print(f"\n{i}. {pwd}")
-                    check_password(pwd, use_api=not args.no_api, verbose=False)
+                    check_password(pwd, use_api=not args.no_api, verbose=False,
+                                   **breach_options)
                     print("-" * 40)
         
         elif args.check:
             if args.simple:
-                result = check_password(args.check, use_api=not args.no_api, verbose=False)
+                result = check_password(args.check, use_api=not args.no_api, verbose=False,
+                                        **breach_options)
                 print(f"{result['strength_score']}")
             else:
                 print(f"\n🔍 Проверка пароля...")
-                check_password(args.check, use_api=not args.no_api, verbose=True)
+                check_password(args.check, use_api=not args.no_api, verbose=True,
+                               **breach_options)
         
         elif args.file:
-            check_passwords_from_file(args.file, use_api=not args.no_api)
+            if args.concurrency < 1:
+                print("❌ Ошибка: --concurrency должно быть не меньше 1")
+                sys.exit(1)
+            if args.window < 1:
+                print("❌ Ошибка: --window должно быть не меньше 1")
+                sys.exit(1)
+            if args.workers < 1:
+                print("❌ Ошибка: --workers должно быть не меньше 1")
+                sys.exit(1)
+            if args.checkpoint_interval <= 0:
+                print("❌ Ошибка: --checkpoint-interval должно быть больше 0")
+                sys.exit(1)
+            if (args.result_cache or args.result_cache_db) and not args.hashes:
+                from result_cache import ResultCache
+                result_cache = ResultCache(
+                    path=args.result_cache_db,
+                    ttl=args.result_cache_ttl * 3600
+                )
+                METRICS.add_collector("result_cache", result_cache.stats)
+            check_passwords_from_file(args.file, use_api=not args.no_api,
+                                      concurrency=args.concurrency,
+                                      # Контрольные точки сохраняются между окнами
+                                      stream=args.stream or bool(args.checkpoint),
+                                      window=args.window,
+                                      workers=args.workers, result_cache=result_cache,
+                                      hash_type=args.hashes, output_format=args.format,
+                                      output_path=args.output,
+                                      checkpoint_path=args.checkpoint, resume=args.resume,
+                                      checkpoint_interval=args.checkpoint_interval,
+                                      **breach_options)
         
-        if not args.simple:
+        if not args.simple and not args.serve:
             print("\n" + "=" * 60)
             print("✅ Проверка завершена!")
     
@@ -153,6 +668,29 @@ def main():
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        if reporter is not None:
+            # Итоговая выгрузка, пока кэши еще открыты
+            try:
+                reporter.stop()
+                if not args.simple:
+                    print(f"📈 Метрики сохранены: {args.metrics_out}")
+            except OSError as e:
+                print(f"❌ Не удалось сохранить метрики: {e}")
+        if cache is not None:
+            cache.close()
+            if checkpoint_cache and not os.path.exists(args.checkpoint):
+                # Контрольная точка удалена - проверка завершена, кэш больше не нужен
+                from audit_checkpoint import remove_ranges_cache
+                remove_ranges_cache(args.checkpoint)
+        if client is not None:
+            client.close()
+        if local_index is not None:
+            local_index.close()
+        if mirror is not None:
+            mirror.close()
+        if result_cache is not None:
+            result_cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+"""
+Модуль метрик: время по стадиям проверки, счетчики запросов и выгрузка в JSON/Prometheus
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Tuple
+
+
+METRIC_PREFIX = "password_analyzer"
+FORMATS = ("json", "prometheus")
+
+# Границы корзин гистограммы в секундах: от хеширования (мкс) до сетевых ожиданий (с)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0
+)
+
+
+def _format_value(value: float) -> str:
+    """Число для формата Prometheus без потери точности у больших счетчиков"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последняя корзина - +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else repr(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_seconds": self.sum,
+            "avg_seconds": self.sum / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class _StageTimer:
+    """Контекстный менеджер, замеряющий блок кода как стадию; длительность - в elapsed"""
+
+    __slots__ = ("_metrics", "_stage", "_start", "elapsed")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self._metrics = metrics
+        self._stage = stage
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        self._metrics.observe(self._stage, self.elapsed)
+
+
+class _NullTimer:
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Реестр метрик процесса: гистограммы длительности по стадиям
+    (hash, analysis, network, retry_wait, print, ...) и счетчики.
+
+    Выключенный реестр ничего не записывает, поэтому инструментирование
+    горячего пути почти ничего не стоит, пока метрики не запрошены.
+    Сборщики (add_collector) добавляют значения, которые удобнее читать
+    в момент выгрузки, например статистику кэшей.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._counters: Dict[str, float] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started = time.monotonic()
+            self._counters.clear()
+            self._stages.clear()
+            self._collectors.clear()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Увеличивает счетчик name"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Записывает длительность стадии"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def stage(self, name: str):
+        """Замеряет блок with как стадию name"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def add_collector(self, name: str, collector: Callable[[], Dict]) -> None:
+        """Регистрирует функцию, возвращающую числовые значения на момент выгрузки"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> Dict:
+        """Текущие значения всех метрик"""
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            counters = dict(self._counters)
+            stages = {name: h.snapshot() for name, h in self._stages.items()}
+            collectors = list(self._collectors.items())
+
+        gauges = {}
+        for name, collector in collectors:
+            try:
+                values = collector()
+            except Exception:  # Источник уже закрыт - пропускаем
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{name}_{key}"] = float(value)
+
+        checked = counters.get("passwords_checked", 0)
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": uptime,
+            "passwords_per_second": checked / uptime if uptime else 0.0,
+            "counters": counters,
+            "gauges": gauges,
+            "stages": stages,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Снимок в текстовом формате Prometheus (exposition format 0.0.4)"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        metric("uptime_seconds", "gauge", "Run duration in seconds")
+        lines.append(f"{METRIC_PREFIX}_uptime_seconds {snapshot['uptime_seconds']:.6f}")
+        metric("passwords_per_second", "gauge", "Checked passwords per second")
+        lines.append(f"{METRIC_PREFIX}_passwords_per_second "
+                     f"{snapshot['passwords_per_second']:.6f}")
+
+        for name, value in sorted(snapshot["counters"].items()):
+            metric(f"{name}_total", "counter", f"Total {name.replace('_', ' ')}")
+            lines.append(f"{METRIC_PREFIX}_{name}_total {_format_value(value)}")
+
+        for name, value in sorted(snapshot["gauges"].items()):
+            metric(name, "gauge", name.replace("_", " ").capitalize())
+            lines.append(f"{METRIC_PREFIX}_{name} {_format_value(value)}")
+
+        if snapshot["stages"]:
+            name = f"{METRIC_PREFIX}_stage_duration_seconds"
+            lines.append(f"# HELP {name} Time spent per processing stage")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, data in sorted(snapshot["stages"].items()):
+                for bound, count in data["buckets"].items():
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {data["sum_seconds"]:.9f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {data["count"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str, fmt: str = "json") -> None:
+        """Атомарно записывает снимок в файл (читатель не увидит половину файла)"""
+        text = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+class MetricsReporter:
+    """Периодически выгружает метрики в файл в фоновом потоке и один раз при остановке"""
+
+    def __init__(self, metrics: Metrics, path: str, fmt: str = "json",
+                 interval: Optional[float] = None):
+        self.metrics = metrics
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.metrics.dump(self.path, self.fmt)
+            except OSError:
+                pass  # Промежуточная выгрузка не должна прерывать проверку
+
+    def start(self) -> "MetricsReporter":
+        if self.interval:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает поток и делает итоговую выгрузку"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.metrics.dump(self.path, self.fmt)
+
+
+# Общий реестр процесса; включается из CLI флагом --metrics-out
+METRICS = Metrics()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Локальный сервер-заменитель API Pwned Passwords (/range/{prefix}) для
+нагрузочного тестирования и воспроизведения ошибок
+
+Запуск:
+    python src/mock_server.py --port 8000 --latency-ms 50 --error-rate 0.05
+    python src/main.py -f passwords.txt --api-url http://127.0.0.1:8000
+"""
+
+import argparse
+import functools
+import hashlib
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+DEFAULT_PORT = 8000
+DEFAULT_RANGE_SIZE = 800  # Примерно столько строк в ответе настоящего API
+HASH_HEX_LENGTH = 40
+NTLM_HEX_LENGTH = 32
+
+
+def generated_range(prefix: str, size: int = DEFAULT_RANGE_SIZE, mode: str = "sha1") -> str:
+    """Детерминированный синтетический ответ для префикса (суффиксы SHA-1 или NTLM)"""
+    suffix_length = (HASH_HEX_LENGTH if mode == "sha1" else NTLM_HEX_LENGTH) - 5
+    lines = []
+    for i in range(size):
+        digest = hashlib.sha1(f"{prefix}:{i}".encode()).hexdigest().upper()
+        lines.append(f"{digest[:suffix_length]}:{int(digest[35:], 16) + 1}")
+    return "\r\n".join(lines)
+
+
+def _corpus_key(prefix: str, mode: str = "sha1") -> str:
+    return prefix if mode == "sha1" else f"{mode}:{prefix}"
+
+
+def load_corpus(path: str) -> Dict[str, str]:
+    """
+    Загружает корпус в виде {префикс: тело ответа}. Строки файла - либо
+    'SHA1:COUNT' или 'NTLM:COUNT' в формате выгрузки Pwned Passwords, либо
+    пароли открытым текстом (повторы суммируются в счетчик). Диапазоны
+    NTLM хранятся под ключом 'ntlm:PREFIX'
+    """
+    counts: Dict[str, int] = defaultdict(int)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            digest, sep, count = line.partition(":")
+            if (sep and len(digest) in (HASH_HEX_LENGTH, NTLM_HEX_LENGTH)
+                    and count.strip().isdigit()
+                    and all(c in "0123456789abcdefABCDEF" for c in digest)):
+                counts[digest.upper()] += int(count)
+            else:
+                counts[hashlib.sha1(line.encode("utf-8")).hexdigest().upper()] += 1
+
+    ranges: Dict[str, list] = defaultdict(list)
+    for digest in sorted(counts):
+        mode = "sha1" if len(digest) == HASH_HEX_LENGTH else "ntlm"
+        ranges[_corpus_key(digest[:5], mode)].append(f"{digest[5:]}:{counts[digest]}")
+    return {prefix: "\r\n".join(lines) for prefix, lines in ranges.items()}
+
+
+class MockRangeServer:
+    """
+    HTTP-сервер /range/{prefix} с настраиваемой задержкой и ошибками.
+
+    Ответы берутся из корпуса (если задан) или генерируются детерминированно.
+    error_rate - доля ответов 503, rate_limit_rate - доля ответов 429 с
+    Retry-After; rps_limit дополнительно отвечает 429 на запросы сверх
+    заданного числа в секунду, как это делает настоящий API.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 corpus: Optional[Dict[str, str]] = None, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 rps_limit: Optional[float] = None, retry_after: int = 1,
+                 range_size: int = DEFAULT_RANGE_SIZE, seed: Optional[int] = None):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rps_limit = rps_limit
+        self.retry_after = retry_after
+        self.range_size = range_size
+
+        self.requests = 0
+        self.errors_injected = 0
+        self.rate_limited = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._generated = functools.lru_cache(maxsize=65536)(generated_range)
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        host = self._server.server_address[0]
+        return f"http://{host}:{self.port}"
+
+    def range_body(self, prefix: str, mode: str = "sha1") -> str:
+        if self.corpus is not None:
+            return self.corpus.get(_corpus_key(prefix, mode), "")
+        return self._generated(prefix, self.range_size, mode)
+
+    def _decide(self) -> Optional[int]:
+        """Код ошибки, который нужно вернуть на этот запрос, или None"""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            if roll < self.error_rate:
+                self.errors_injected += 1
+                return 503
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.rate_limited += 1
+                return 429
+
+            if self.rps_limit:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] > 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rps_limit:
+                    self.rate_limited += 1
+                    return 429
+                self._recent.append(now)
+            return None
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _make_handler(self):
+        server = self
+
+        class RangeHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Иначе заголовки и тело ждут задержанного ACK (~40 мс на запрос)
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                mode = "ntlm" if "mode=ntlm" in query.split("&") else "sha1"
+                if not path.startswith("/range/"):
+                    self._reply(404, b"Not found")
+                    return
+
+                prefix = path[len("/range/"):].upper()
+                if len(prefix) != 5 or any(c not in "0123456789ABCDEF" for c in prefix):
+                    self._reply(400, b"The hash prefix was not in a valid format")
+                    return
+
+                delay = server._delay()
+                if delay:
+                    time.sleep(delay)
+
+                status = server._decide()
+                if status == 429:
+                    self._reply(429, b"Rate limit exceeded",
+                                {"Retry-After": str(server.retry_after)})
+                elif status is not None:
+                    self._reply(status, b"Service unavailable")
+                else:
+                    body = server.range_body(prefix, mode).encode("ascii")
+                    # ETag как у настоящего API: повторный запрос с If-None-Match получает 304
+                    etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self._reply(304, b"", {"ETag": etag})
+                    else:
+                        self._reply(200, body, {"ETag": etag})
+
+            def _reply(self, status: int, body: bytes, headers: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return RangeHandler
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors_injected": self.errors_injected,
+                "rate_limited": self.rate_limited,
+            }
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "MockRangeServer":
+        """Запускает сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Локальный сервер-заменитель API Pwned Passwords"
+    )
+    parser.add_argument("--host", help="Адрес (по умолчанию: 127.0.0.1)", default="127.0.0.1")
+    parser.add_argument("--port", help=f"Порт (по умолчанию: {DEFAULT_PORT})", type=int,
+                        default=DEFAULT_PORT)
+    parser.add_argument("--corpus", help="Файл с паролями или строками SHA1:COUNT",
+                        metavar="PATH")
+    parser.add_argument("--latency-ms", help="Задержка ответа в мс", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", help="Разброс задержки в мс", type=float, default=0.0)
+    parser.add_argument("--error-rate", help="Доля ответов 503 (0-1)", type=float, default=0.0)
+    parser.add_argument("--rate-limit", help="Доля ответов 429 (0-1)", type=float, default=0.0)
+    parser.add_argument("--rps-limit", help="Отвечать 429 сверх N запросов в секунду",
+                        type=float, metavar="N")
+    parser.add_argument("--retry-after", help="Значение Retry-After для 429 (сек)", type=int,
+                        default=1)
+    parser.add_argument("--seed", help="Зерно генератора ошибок", type=int)
+    args = parser.parse_args()
+
+    for name in ("error_rate", "rate_limit"):
+        if not 0 <= getattr(args, name) <= 1:
+            print(f"❌ Ошибка: --{name.replace('_', '-')} должно быть от 0 до 1")
+            sys.exit(1)
+
+    corpus = None
+    if args.corpus:
+        try:
+            corpus = load_corpus(args.corpus)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"❌ Ошибка чтения корпуса: {e}")
+            sys.exit(1)
+
+    try:
+        server = MockRangeServer(
+            args.host, args.port, corpus,
+            latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+            error_rate=args.error_rate, rate_limit_rate=args.rate_limit,
+            rps_limit=args.rps_limit, retry_after=args.retry_after, seed=args.seed
+        )
+    except OSError as e:
+        print(f"❌ Не удалось запустить сервер: {e}")
+        sys.exit(1)
+
+    source = f"корпус '{args.corpus}' ({len(corpus)} префиксов)" if corpus else "генерация"
+    print(f"🚀 Сервер диапазонов: {server.url}/range/{{prefix}} ({source})")
+    print(f"   Проверка: python src/main.py -c 'пароль' --api-url {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        stats = server.stats()
+        print(f"\n⏹️  Остановлен. Запросов: {stats['requests']}, "
+              f"ошибок: {stats['errors_injected']}, 429: {stats['rate_limited']}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Модуль вывода результатов проверки файла: текст, JSONL, CSV или только сводка.
+
+Записи копятся и пишутся пачками через большой буфер. В JSONL и CSV
+пароль открытым текстом не попадает никогда: запись идентифицируется
+номером строки входного файла (для выгрузок хешей - еще учетной записью
+и хешем).
+"""
+
+import csv
+import json
+import os
+import sys
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from results import PasswordResult
+
+OUTPUT_FORMATS = ("text", "jsonl", "csv", "summary")
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # Байт в буфере файла
+BATCH_LINES = 4096  # Строк, после которых накопленное передается в файл
+
+PASSWORD_FIELDS = ("line", "strength_score", "strength", "complexity_score",
+                   "breached", "breach_count", "source", "is_secure")
+POLICY_FIELD = "failed_policies"  # Добавляется, если заданы политики
+HASH_FIELDS = ("line", "account", "hash", "breached", "breach_count", "source")
+
+_CSV_BOOLEANS = {True: "true", False: "false"}
+
+
+def _csv_value(value):
+    if type(value) is bool:
+        return _CSV_BOOLEANS[value]
+    if type(value) is list:
+        return ";".join(value)
+    return value
+
+
+def password_record(line_no: int, result: PasswordResult) -> Dict:
+    """Плоская запись результата проверки пароля (без самого пароля)"""
+    breach_check = result.breach
+    record = {
+        "line": line_no,
+        "strength_score": result.strength_score,
+        "strength": result.strength,
+        "complexity_score": result.complexity_score,
+        "breached": result.breached,
+        "breach_count": breach_check.get('count', 0),
+        "source": breach_check.get('source', 'unknown'),
+        "is_secure": result.is_secure,
+    }
+    if result.extra and result.policy_masks is not None:
+        record[POLICY_FIELD] = result.failed_policies()
+    return record
+
+
+def hash_record(line_no: int, account: Optional[str], hex_hash: str, result: Dict) -> Dict:
+    """Плоская запись результата проверки хеша"""
+    return {
+        "line": line_no,
+        "account": account,
+        "hash": hex_hash,
+        "breached": result['breached'],
+        "breach_count": result.get('count', 0),
+        "source": result.get('source', 'unknown'),
+    }
+
+
+class ResultWriter:
+    """
+    Базовый буферизованный писатель результатов.
+
+    Строки накапливаются в списке и уходят в поток одним write на
+    BATCH_LINES строк; сам поток открыт с буфером DEFAULT_BUFFER_SIZE.
+    """
+
+    machine_readable = True
+
+    def __init__(self, stream: TextIO, owns_stream: bool = True):
+        self._stream = stream
+        self._owns_stream = owns_stream
+        self._lines: List[str] = []
+        self.records = 0
+
+    @property
+    def uses_stdout(self) -> bool:
+        """Пишет ли в stdout: тогда для машинных форматов остальной вывод уходит в stderr"""
+        return not self._owns_stream
+
+    def _emit(self, text: str) -> None:
+        self._lines.append(text)
+        if len(self._lines) >= BATCH_LINES:
+            self._write_batch()
+
+    def write_password(self, line_no: int, password: str, result: PasswordResult) -> None:
+        """Результат по паролю; по умолчанию только учитывается в records"""
+        self.records += 1
+
+    def write_hash(self, line_no: int, account: Optional[str], hex_hash: str,
+                   result: Dict) -> None:
+        """Результат по хешу; по умолчанию только учитывается в records"""
+        self.records += 1
+
+    def write_summary(self, summary: Dict) -> None:
+        """Итоговая статистика; по умолчанию в поток не пишется"""
+
+    def _write_batch(self) -> None:
+        if self._lines:
+            self._stream.write("".join(self._lines))
+            self._lines.clear()
+
+    def flush(self) -> None:
+        """Дописывает все накопленное, например перед выводом сводки на экран"""
+        self._write_batch()
+        self._stream.flush()
+
+    def tell(self) -> Optional[int]:
+        """Позиция в файле вывода после записи всего накопленного; для stdout - None"""
+        self.flush()
+        return self._stream.tell() if self._owns_stream else None
+
+    def close(self) -> None:
+        self._write_batch()
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TextWriter(ResultWriter):
+    """Краткий текстовый отчет по каждому паролю (прежний консольный вывод)"""
+
+    machine_readable = False
+
+    def __init__(self, stream: TextIO, owns_stream: bool = True, total: Optional[int] = None):
+        super().__init__(stream, owns_stream)
+        self.total = total
+
+    def write_password(self, line_no: int, password: str, result: PasswordResult) -> None:
+        self.records += 1
+        if self.total is not None:
+            header = f"[{self.records}/{self.total}]"
+        else:
+            header = f"[{self.records}]"
+        stars = "*" * min(len(password), 10) + ("*" if len(password) > 10 else "")
+        text = (f"\n{header} Проверка пароля...\n"
+                f"   Пароль: {stars}\n"
+                f"   Оценка: {result.strength_score}/100 - {result.strength}\n")
+        if result.breached:
+            text += "   ⚠️  Скомпрометирован!\n"
+        self._emit(text)
+
+    def write_hash(self, line_no: int, account: Optional[str], hex_hash: str,
+                   result: Dict) -> None:
+        # В тексте - только скомпрометированные учетные записи, без хешей
+        self.records += 1
+        if result['breached']:
+            label = account or f"строка {line_no}"
+            self._emit(f"   ⚠️  {label}: {result['message']}\n")
+
+
+class JsonlWriter(ResultWriter):
+    """Одна JSON-запись на строку"""
+
+    def _emit_record(self, record: Dict) -> None:
+        self.records += 1
+        self._emit(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def write_password(self, line_no: int, password: str, result: PasswordResult) -> None:
+        self._emit_record(password_record(line_no, result))
+
+    def write_hash(self, line_no: int, account: Optional[str], hex_hash: str,
+                   result: Dict) -> None:
+        self._emit_record(hash_record(line_no, account, hex_hash, result))
+
+
+class CsvWriter(ResultWriter):
+    """
+    CSV с заголовком; колонки - поля первой записи (зависят от вида
+    проверки и от того, заданы ли политики)
+    """
+
+    def __init__(self, stream: TextIO, owns_stream: bool = True):
+        super().__init__(stream, owns_stream)
+        self._csv = csv.writer(self, lineterminator="\n")
+        self._fields: Optional[Tuple[str, ...]] = None
+
+    def write(self, text: str) -> None:
+        # csv.writer пишет сюда, а не напрямую в поток - строки копятся в пачке
+        self._emit(text)
+
+    def _write_row(self, record: Dict) -> None:
+        if self._fields is None:
+            self._fields = tuple(record)
+            if not self.records:
+                self._csv.writerow(self._fields)
+        self.records += 1
+        # Логические значения - как в JSON, списки - через ";"
+        self._csv.writerow([_csv_value(value) for value in map(record.get, self._fields)])
+
+    def write_password(self, line_no: int, password: str, result: PasswordResult) -> None:
+        self._write_row(password_record(line_no, result))
+
+    def write_hash(self, line_no: int, account: Optional[str], hex_hash: str,
+                   result: Dict) -> None:
+        self._write_row(hash_record(line_no, account, hex_hash, result))
+
+
+class SummaryWriter(ResultWriter):
+    """Только итоговая сводка в JSON, без записей по отдельным паролям"""
+
+    def write_summary(self, summary: Dict) -> None:
+        self._emit(json.dumps(summary, ensure_ascii=False, indent=2) + "\n")
+
+
+_WRITERS = {
+    "text": TextWriter,
+    "jsonl": JsonlWriter,
+    "csv": CsvWriter,
+    "summary": SummaryWriter,
+}
+
+
+def open_writer(output_format: str = "text", path: Optional[str] = None,
+                buffer_size: int = DEFAULT_BUFFER_SIZE,
+                position: Optional[int] = None) -> ResultWriter:
+    """
+    Писатель нужного формата в файл path или в stdout, если путь не задан.
+    position - продолжить запись в существующий файл с этой позиции
+    (все после нее отбрасывается), например при продолжении проверки
+    """
+    writer_class = _WRITERS.get(output_format)
+    if writer_class is None:
+        raise ValueError(f"Неизвестный формат вывода: {output_format} "
+                         f"(доступны: {', '.join(OUTPUT_FORMATS)})")
+
+    if path is None:
+        sys.stdout.flush()
+        stream = open(sys.stdout.fileno(), "w", encoding="utf-8", newline="",
+                      buffering=buffer_size, closefd=False)
+        return writer_class(stream, owns_stream=False)
+
+    if position is not None and os.path.exists(path):
+        if os.path.getsize(path) < position:
+            raise ValueError(f"Файл вывода '{path}' короче сохраненной позиции {position}")
+        stream = open(path, "r+", encoding="utf-8", newline="", buffering=buffer_size)
+        stream.seek(position)
+        stream.truncate()
+    else:
+        stream = open(path, "w", encoding="utf-8", newline="", buffering=buffer_size)
+    return writer_class(stream, owns_stream=True)
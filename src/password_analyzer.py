@@ -0,0 +1,332 @@
+"""
+Модуль для быстрого локального анализа паролей
+"""
+
+import re
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from guess_estimator import GuessEstimator
+from pattern_matcher import PatternMatcher, builtin_patterns, read_wordlist
+
+
+# Топ-100 самых слабых паролей, от самых частых к редким
+COMMON_PASSWORDS_RANKED = (
+    "123456", "password", "12345678", "qwerty", "123456789",
+    "12345", "1234", "111111", "1234567", "dragon",
+    "123123", "baseball", "abc123", "football", "monkey",
+    "letmein", "696969", "shadow", "master", "666666",
+    "qwertyuiop", "123321", "mustang", "1234567890",
+    "michael", "654321", "superman", "1qaz2wsx", "7777777",
+    "121212", "000000", "qazwsx", "123qwe", "killer",
+    "trustno1", "jordan", "jennifer", "zxcvbnm", "asdfgh",
+    "hunter", "buster", "soccer", "harley", "batman",
+    "andrew", "tigger", "sunshine", "iloveyou", "2000",
+    "charlie", "robert", "thomas", "hockey", "ranger",
+    "daniel", "starwars", "klaster", "112233", "george",
+    "computer", "michelle", "jessica", "pepper", "1111",
+    "zxcvbn", "555555", "11111111", "131313", "freedom",
+    "777777", "pass", "maggie", "159753", "aaaaaa",
+    "ginger", "princess", "joshua", "cheese", "amanda",
+    "summer", "love", "ashley", "nicole", "chelsea",
+    "biteme", "matthew", "access", "yankees", "987654321",
+    "dallas", "austin", "thunder", "taylor", "matrix"
+)
+COMMON_PASSWORDS = frozenset(COMMON_PASSWORDS_RANKED)
+
+# Пароли, при точном совпадении с которыми не выполняется критерий "без паттернов";
+# вместе с COMMON_PASSWORDS они же - встроенный словарь для поиска подстрок
+# (короткие слова засчитываются только целиком, см. build_pattern_matcher)
+PATTERN_COMMON_PASSWORDS_RANKED = (
+    "password", "123456", "qwerty", "admin", "welcome",
+    "monkey", "letmein", "dragon", "baseball", "football",
+    "master", "hello", "freedom", "whatever", "qazwsx",
+    "password1", "superman", "1q2w3e4r", "1qaz2wsx"
+)
+PATTERN_COMMON_PASSWORDS = frozenset(PATTERN_COMMON_PASSWORDS_RANKED)
+
+# Классы символов для критериев сложности (включая кириллицу)
+_UPPER = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ" + "".join(map(chr, range(ord("А"), ord("Я") + 1))))
+_LOWER = frozenset("abcdefghijklmnopqrstuvwxyz" + "".join(map(chr, range(ord("а"), ord("я") + 1))))
+_SPECIAL = frozenset('!@#$%^&*(),.?":{}|<>')
+
+# Классы символов для числовой оценки (только ASCII)
+_ASCII_UPPER = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_ASCII_LOWER = frozenset("abcdefghijklmnopqrstuvwxyz")
+_ASCII_DIGITS = frozenset("0123456789")
+_ASCII_ALNUM = _ASCII_UPPER | _ASCII_LOWER | _ASCII_DIGITS
+
+# Повторы одного символа (максимальные серии)
+_RUNS = re.compile(r'(.)\1{2,}')
+# Десятичные цифры Unicode, если пароль не ASCII
+_UNICODE_DIGIT = re.compile(r'\d')
+
+# Способы числовой оценки: classic - по длине и классам символов,
+# guesses - по числу попыток подбора (guess_estimator)
+ENGINES = ("classic", "guesses")
+DEFAULT_ENGINE = "classic"
+
+# Критерии сложности в порядке битов упакованного результата
+DETAIL_KEYS = (
+    "length_ok",
+    "has_upper",
+    "has_lower",
+    "has_digit",
+    "has_special",
+    "no_common_patterns"
+)
+
+
+def complexity_from_bits(bits: int) -> Dict:
+    """Восстанавливает результат check_password_complexity из битовой маски критериев"""
+    details = {key: bool(bits >> i & 1) for i, key in enumerate(DETAIL_KEYS)}
+    score = bin(bits).count("1")
+    return {
+        "strength": strength_label(score),
+        "score": score,
+        "details": details
+    }
+
+
+def build_pattern_matcher(wordlists: Iterable[str] = (),
+                          extra_patterns: Iterable[Tuple[str, str]] = ()) -> PatternMatcher:
+    """
+    Автомат паттернов: последовательности, клавиатурные проходы (латиница и
+    кириллица), встроенный словарь и слова из файлов wordlists. Слова
+    добавляются в порядке частоты: сначала встроенные, затем из файлов;
+    слова короче MIN_SUBSTRING_WORD_LENGTH считаются паттерном, только
+    если составляют весь пароль.
+    extra_patterns - дополнительные пары (шаблон, вид), например
+    запрещенные политикой слова
+    """
+    def words():
+        yield from COMMON_PASSWORDS_RANKED
+        yield from PATTERN_COMMON_PASSWORDS_RANKED
+        for path in wordlists:
+            yield from read_wordlist(path)
+
+    return PatternMatcher(chain(builtin_patterns(words()), extra_patterns))
+
+
+def strength_label(score: int) -> str:
+    """Текстовый уровень безопасности по оценке сложности (0-7)"""
+    if score >= 6:
+        return "Очень сильный"
+    elif score >= 4:
+        return "Средний"
+    elif score >= 2:
+        return "Слабый"
+    return "Очень слабый"
+
+
+class PasswordAnalyzer:
+    """
+    Предкомпилированный анализатор пароля.
+
+    Вычисляет признаки пароля один раз (множество символов, классы
+    символов, повторы, последовательности и клавиатурные паттерны) и
+    строит по ним и результат check_password_complexity, и оценку
+    check_password_strength_score. Словарные слова, клавиатурные проходы и
+    последовательности ищутся как подстроки автоматом PatternMatcher,
+    который строится при первом анализе.
+
+    engine="guesses" заменяет числовую оценку оценкой по числу попыток
+    подбора (GuessEstimator); критерии сложности от движка не зависят.
+    """
+
+    def __init__(self, common_passwords=COMMON_PASSWORDS,
+                 pattern_common_passwords=PATTERN_COMMON_PASSWORDS,
+                 matcher: Optional[PatternMatcher] = None,
+                 engine: str = DEFAULT_ENGINE):
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный движок оценки: {engine} (доступны: {', '.join(ENGINES)})")
+        self.common_passwords = frozenset(common_passwords)
+        self.pattern_common_passwords = frozenset(pattern_common_passwords)
+        self.engine = engine
+        self.wordlists: Tuple[str, ...] = ()  # Словари, из которых построен автомат
+        self._matcher = matcher
+        self._estimator: Optional[GuessEstimator] = None
+
+    @property
+    def matcher(self) -> PatternMatcher:
+        if self._matcher is None:
+            self._matcher = build_pattern_matcher()
+        return self._matcher
+
+    @property
+    def estimator(self) -> GuessEstimator:
+        if self._estimator is None or self._estimator.matcher is not self.matcher:
+            self._estimator = GuessEstimator(self.matcher)
+        return self._estimator
+
+    def analyze(self, password: str) -> Tuple[Dict, int]:
+        """
+        Возвращает пару (результат анализа сложности, оценка 0-100).
+        В результат добавляются найденные паттерны: список фрагментов
+        {"start", "end", "kind", "token"} по позициям в пароле, а с движком
+        guesses - еще и десятичный логарифм числа попыток guesses_log10
+        """
+        bits, score = self.analyze_packed(password)
+        complexity = complexity_from_bits(bits)
+        complexity["patterns"] = self.patterns(password)
+        if self.engine == "guesses" and password:
+            # Оценка уже посчитана в analyze_packed и берется из кэша оценщика
+            complexity["guesses_log10"] = round(self.estimator.estimate(password).log10, 2)
+        return complexity, score
+
+    def patterns(self, password: str) -> List[Dict]:
+        """Словарные слова, клавиатурные проходы и последовательности в пароле"""
+        lowered = password.lower()
+        # Редкие символы меняют длину при понижении регистра - тогда позиции по lowered
+        source = password if len(lowered) == len(password) else lowered
+        return [
+            {"start": start, "end": end, "kind": kind, "token": source[start:end]}
+            for start, end, kind in self.matcher.spans(lowered)
+        ]
+
+    def analyze_packed(self, password: str) -> Tuple[int, int]:
+        """
+        Компактная форма analyze: (битовая маска критериев DETAIL_KEYS, оценка 0-100)
+        без списка найденных паттернов. Удобна для передачи между процессами и хранения
+        """
+        if not password:
+            return 0, 0
+
+        length = len(password)
+        lowered = password.lower()
+        chars = set(password)
+        unique_chars = len(chars)
+
+        has_ascii_digit = not _ASCII_DIGITS.isdisjoint(chars)
+        if has_ascii_digit or password.isascii():
+            has_digit = has_ascii_digit
+        else:
+            has_digit = _UNICODE_DIGIT.search(password) is not None
+
+        # Самый длинный повтор одного символа
+        longest_run = 0
+        for match in _RUNS.finditer(password):
+            run = match.end() - match.start()
+            if run > longest_run:
+                longest_run = run
+
+        is_digit = password.isdigit()
+
+        # --- Анализ сложности (0-7), биты в порядке DETAIL_KEYS ---
+        no_common_patterns = not (
+            lowered in self.pattern_common_passwords
+            or unique_chars < 4  # Слишком мало уникальных символов
+            or longest_run >= 4  # 4+ одинаковых символов подряд
+            or (self._matcher or self.matcher).contains_any(lowered)
+            or (is_digit and length < 12)  # Только цифры и короткий
+        )
+        bits = (
+            (length >= 8)
+            | (not _UPPER.isdisjoint(chars)) << 1
+            | (not _LOWER.isdisjoint(chars)) << 2
+            | has_digit << 3
+            | (not _SPECIAL.isdisjoint(chars)) << 4
+            | no_common_patterns << 5
+        )
+
+        if self.engine == "guesses":
+            return bits, self.estimator.score(password)
+
+        # --- Числовая оценка (0-100) ---
+        score = 0
+
+        # Длина пароля (максимум 30 баллов)
+        if length >= 12:
+            score += 30
+        elif length >= 8:
+            score += 20
+        elif length >= 6:
+            score += 10
+
+        # Разнообразие символов (максимум 40 баллов)
+        char_types = (
+            (not _ASCII_LOWER.isdisjoint(chars))
+            + (not _ASCII_UPPER.isdisjoint(chars))
+            + has_digit
+            + (not chars <= _ASCII_ALNUM)
+        )
+        score += char_types * 10
+
+        # Энтропия (максимум 30 баллов)
+        score += min(unique_chars / length * 30, 30)
+
+        # Штрафы за слабые паттерны
+        if longest_run >= 3:  # 3+ одинаковых символа подряд
+            score -= 20
+        if is_digit or password.isalpha():
+            score -= 15
+        if lowered in self.common_passwords:
+            score = 0  # Если пароль в списке слабых - обнуляем оценку
+
+        return bits, max(0, min(100, int(score)))
+
+    def complexity(self, password: str) -> Dict:
+        """Результат в формате check_password_complexity"""
+        return self.analyze(password)[0]
+
+    def strength_score(self, password: str) -> int:
+        """Результат в формате check_password_strength_score (без списка паттернов)"""
+        return self.analyze_packed(password)[1]
+
+
+DEFAULT_ANALYZER = PasswordAnalyzer()
+
+
+_ENGINE_ANALYZERS: Dict[str, PasswordAnalyzer] = {}
+
+
+def get_analyzer(engine: Optional[str] = None) -> PasswordAnalyzer:
+    """Анализатор с тем же автоматом, что и по умолчанию, но с другим движком оценки"""
+    if engine is None or engine == DEFAULT_ANALYZER.engine:
+        return DEFAULT_ANALYZER
+    analyzer = _ENGINE_ANALYZERS.get(engine)
+    if analyzer is None or analyzer.matcher is not DEFAULT_ANALYZER.matcher:
+        analyzer = PasswordAnalyzer(matcher=DEFAULT_ANALYZER.matcher, engine=engine)
+        _ENGINE_ANALYZERS[engine] = analyzer
+    return analyzer
+
+
+def configure_engine(engine: str) -> None:
+    """Меняет движок оценки анализатора по умолчанию (до создания пула процессов)"""
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный движок оценки: {engine} (доступны: {', '.join(ENGINES)})")
+    DEFAULT_ANALYZER.engine = engine
+
+
+def configure_patterns(wordlists: Iterable[str]) -> PatternMatcher:
+    """
+    Перестраивает автомат анализатора по умолчанию с дополнительными словарями.
+    Вызывается до создания пула процессов, чтобы воркеры получили тот же автомат
+    """
+    DEFAULT_ANALYZER.wordlists = tuple(wordlists)
+    DEFAULT_ANALYZER._matcher = build_pattern_matcher(DEFAULT_ANALYZER.wordlists)
+    DEFAULT_ANALYZER._estimator = None  # Оценщик перестроится на новом автомате
+    return DEFAULT_ANALYZER._matcher
+
+
+def analyzer_settings() -> Tuple[str, Tuple[str, ...]]:
+    """Движок и словари анализатора по умолчанию - аргументы init_worker"""
+    return DEFAULT_ANALYZER.engine, DEFAULT_ANALYZER.wordlists
+
+
+def init_worker(engine: str, wordlists: Tuple[str, ...]) -> None:
+    """
+    Инициализатор процесса пула: повторяет настройки родительского процесса.
+    При fork они уже скопированы и ничего не перестраивается; при spawn и
+    forkserver воркер начинает с чистого модуля
+    """
+    if DEFAULT_ANALYZER.engine != engine:
+        configure_engine(engine)
+    if DEFAULT_ANALYZER.wordlists != tuple(wordlists):
+        configure_patterns(wordlists)
+
+
+def analyze_packed_batch(passwords: List[str]) -> List[Tuple[int, int]]:
+    """Анализ пачки паролей анализатором по умолчанию (для пула процессов)"""
+    analyze_packed = DEFAULT_ANALYZER.analyze_packed
+    return [analyze_packed(password) for password in passwords]
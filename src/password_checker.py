@@ -2,298 +2,343 @@
 Модуль для проверки паролей на безопасность
 """
 
+import contextlib
+import functools
 import hashlib
-import re
-import requests
+import os
+import sys
 import time
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
+from breach_cache import RangeCache, range_key
+from breach_client import BreachClient, PasswordAPIError, get_default_client
+from password_analyzer import COMMON_PASSWORDS, DEFAULT_ANALYZER, get_analyzer
+from metrics import METRICS
+from pattern_matcher import KIND_LABELS as PATTERN_KIND_LABELS
+from password_policy import active_policies
+from result_cache import ResultCache
+from results import (
+    COMMON_RESULT,
+    DISABLED_RESULT,
+    LOCAL_INDEX_RESULT,
+    NOT_FOUND_RESULTS,
+    Breach,
+    BreachResult,
+    PasswordResult,
+    as_dict,
+)
 
-class PasswordAPIError(Exception):
-    """Кастомное исключение для ошибок API"""
-    pass
+if TYPE_CHECKING:
+    # Индекс и зеркало открывает вызывающий код
+    from breach_index import BreachIndex
+    from pwned_mirror import PwnedMirror
 
 
 def check_password_complexity(password: str) -> Dict:
     """Проверка пароля на соответствие политикам сложности"""
+    return DEFAULT_ANALYZER.complexity(password)
+
+
+def get_common_passwords_list() -> set:
+    """Возвращает список самых распространенных паролей"""
+    return set(COMMON_PASSWORDS)
+
+
+def _breach_found_result(count: int, source: str = "haveibeenpwned") -> BreachResult:
+    """Результат проверки для пароля, найденного в утечках"""
+    return BreachResult.found(count, source)
+
+
+def _breach_not_found_result(source: str = "haveibeenpwned") -> BreachResult:
+    """Результат проверки для пароля, не найденного в утечках (общий объект)"""
+    return NOT_FOUND_RESULTS[source]
+
+
+def _mirror_result(count: Optional[int]) -> Optional[BreachResult]:
+    """Результат по ответу зеркала; None - нужного шарда в зеркале нет"""
+    if count is None:
+        return None
+    if count:
+        return _breach_found_result(count, "pwned_mirror")
+    return _breach_not_found_result("pwned_mirror")
+
+
+def _local_breach_result(password: str, use_api: bool,
+                         local_index: Optional["BreachIndex"] = None,
+                         mirror: Optional["PwnedMirror"] = None) -> Optional[BreachResult]:
+    """
+    Проверки, не требующие запроса к API: локальная база, зеркало
+    Pwned Passwords и отключенный API. Возвращает None, если нужно обращаться к API
+    """
+    if password in COMMON_PASSWORDS or password.lower() in COMMON_PASSWORDS:
+        return COMMON_RESULT
     
-    # Добавляем проверку на пустой пароль
-    if not password:
-        return {
-            "strength": "Очень слабый",
-            "score": 0,
-            "details": {
-                "length_ok": False,
-                "has_upper": False,
-                "has_lower": False,
-                "has_digit": False,
-                "has_special": False,
-                "no_common_patterns": False
-            }
-        }
+    if local_index is not None and local_index.contains(password):
+        return LOCAL_INDEX_RESULT
     
-    results = {
-        "length_ok": len(password) >= 8,
-        "has_upper": bool(re.search(r'[A-ZА-Я]', password)),
-        "has_lower": bool(re.search(r'[a-zа-я]', password)),
-        "has_digit": bool(re.search(r'\d', password)),
-        "has_special": bool(re.search(r'[!@#$%^&*(),.?":{}|<>]', password)),
-        "no_common_patterns": not any([
-            password.lower() in [
-                "password", "123456", "qwerty", "admin", "welcome",
-                "monkey", "letmein", "dragon", "baseball", "football",
-                "master", "hello", "freedom", "whatever", "qazwsx",
-                "password1", "superman", "1q2w3e4r", "1qaz2wsx"
-            ],
-            len(set(password)) < 4,  # Слишком мало уникальных символов
-            re.search(r'(.)\1{3,}', password),  # 4+ одинаковых символов подряд
-            re.search(r'(0123|1234|2345|3456|4567|5678|6789|7890)', password),
-            re.search(r'(qwer|asdf|zxcv|йцук|фыва|ячсм)', password.lower()),
-            password.isdigit() and len(password) < 12,  # Только цифры и короткий
-        ])
-    }
+    if mirror is not None:
+        mirror_result = _mirror_result(mirror.lookup(password))
+        if mirror_result is not None:
+            return mirror_result
     
-    score = sum(results.values())
-    
-    if score >= 6:
-        strength = "Очень сильный"
-    elif score >= 4:
-        strength = "Средний"
-    elif score >= 2:
-        strength = "Слабый"
-    else:
-        strength = "Очень слабый"
-    
-    return {
-        "strength": strength,
-        "score": score,
-        "details": results
-    }
+    if not use_api:
+        return DISABLED_RESULT
+    
+    return None
 
 
-def get_common_passwords_list() -> set:
-    """Возвращает список самых распространенных паролей"""
-    # Топ-100 самых слабых паролей
-    common_passwords = {
-        "123456", "password", "12345678", "qwerty", "123456789",
-        "12345", "1234", "111111", "1234567", "dragon",
-        "123123", "baseball", "abc123", "football", "monkey",
-        "letmein", "696969", "shadow", "master", "666666",
-        "qwertyuiop", "123321", "mustang", "1234567890",
-        "michael", "654321", "superman", "1qaz2wsx", "7777777",
-        "121212", "000000", "qazwsx", "123qwe", "killer",
-        "trustno1", "jordan", "jennifer", "zxcvbnm", "asdfgh",
-        "hunter", "buster", "soccer", "harley", "batman",
-        "andrew", "tigger", "sunshine", "iloveyou", "2000",
-        "charlie", "robert", "thomas", "hockey", "ranger",
-        "daniel", "starwars", "klaster", "112233", "george",
-        "computer", "michelle", "jessica", "pepper", "1111",
-        "zxcvbn", "555555", "11111111", "131313", "freedom",
-        "777777", "pass", "maggie", "159753", "aaaaaa",
-        "ginger", "princess", "joshua", "cheese", "amanda",
-        "summer", "love", "ashley", "nicole", "chelsea",
-        "biteme", "matthew", "access", "yankees", "987654321",
-        "dallas", "austin", "thunder", "taylor", "matrix"
-    }
-    return common_passwords
+def _match_range_suffix(body: str, suffix: str, source: str = "haveibeenpwned") -> BreachResult:
+    """Ищет суффикс хеша в ответе /range/{prefix} и формирует результат"""
+    hashes = (line.split(':') for line in body.splitlines())
+    for h, count in hashes:
+        if h == suffix:
+            return _breach_found_result(int(count), source)
+
+    return _breach_not_found_result(source)
+
 
+def _parse_range(body: str) -> Dict[str, int]:
+    """Разбирает ответ /range/{prefix} в словарь суффикс -> количество утечек"""
+    counts = {}
+    for line in body.splitlines():
+        h, _, count = line.partition(':')
+        if count:
+            counts[h] = int(count)
+    return counts
 
-def check_password_breach(password: str, use_api: bool = True, max_retries: int = 2) -> Dict:
+
+def _get_range(prefix: str, max_retries: int = 2, cache: Optional[RangeCache] = None,
+               client: Optional[BreachClient] = None, mode: str = "sha1"):
+    """Возвращает диапазон для префикса из кэша или из API: (тело, None) или (None, ошибка)"""
+    body = cache.get(range_key(prefix, mode)) if cache is not None else None
+    if body is None:
+        # Проверяем через API HaveIBeenPwned с повторными попытками
+        if client is None:
+            client = get_default_client()
+        body, error = client.fetch_range(prefix, max_retries, mode)
+        if error is not None:
+            return None, error
+        if cache is not None:
+            cache.put(range_key(prefix, mode), body)
+    return body, None
+
+
+def check_password_breach(password: str, use_api: bool = True, max_retries: int = 2,
+                          cache: Optional[RangeCache] = None,
+                          client: Optional[BreachClient] = None,
+                          local_index: Optional["BreachIndex"] = None,
+                          mirror: Optional["PwnedMirror"] = None) -> Dict:
     """
     Проверка пароля на наличие в утечках
     Возвращает словарь с результатами проверки
+
+    Если передан cache (RangeCache), ответы API по префиксу берутся
+    из кэша на диске и запрашиваются по сети только при промахе.
+    Запросы выполняет client (BreachClient), по умолчанию общий для процесса.
+    local_index (BreachIndex) расширяет локальную базу большим списком утечек.
+    mirror (PwnedMirror) отвечает вместо API без сети, если его шард скачан.
     """
     
     # Сначала проверяем локальную базу распространенных паролей
-    common_passwords = get_common_passwords_list()
-    if password in common_passwords or password.lower() in common_passwords:
-        return {
-            "breached": True,
-            "count": 1000000,  # Условно большое число
-            "message": "Пароль найден в списке самых распространенных паролей!",
-            "source": "local_db"
-        }
+    local_result = _local_breach_result(password, use_api, local_index, mirror)
+    if local_result is not None:
+        return as_dict(local_result)
     
-    if not use_api:
-        return {
-            "breached": False,
-            "count": 0,
-            "message": "Проверка через API отключена",
-            "source": "disabled"
-        }
+    # Хешируем пароль в SHA-1 - API получает только первые 5 символов
+    with METRICS.stage("hash"):
+        sha1_hash = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+    prefix = sha1_hash[:5]
+    suffix = sha1_hash[5:]
     
-    # Проверяем через API HaveIBeenPwned с повторными попытками
-    for attempt in range(max_retries + 1):
-        try:
-            # Хешируем пароль в SHA-1
-            sha1_hash = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
-            prefix = sha1_hash[:5]
-            suffix = sha1_hash[5:]
-            
-            # Настраиваем заголовки для запроса
-            headers = {
-                'User-Agent': 'Password-Analyzer-CLI/1.0',
-                'Accept': 'application/json'
-            }
-            
-            # Отправляем запрос к API с таймаутом
-            url = f"https://api.pwnedpasswords.com/range/{prefix}"
-            
-            print(f"  Попытка подключения к API ({attempt + 1}/{max_retries + 1})...")
-            
-            response = requests.get(
-                url, 
-                headers=headers, 
-                timeout=10  # Увеличиваем таймаут
-            )
-            
-            if response.status_code == 200:
-                # Парсим ответ
-                hashes = (line.split(':') for line in response.text.splitlines())
-                for h, count in hashes:
-                    if h == suffix:
-                        return {
-                            "breached": True,
-                            "count": int(count),
-                            "message": f"Пароль найден в {count:,} утечках!".replace(",", " "),
-                            "source": "haveibeenpwned"
-                        }
-                
-                return {
-                    "breached": False,
-                    "count": 0,
-                    "message": "Пароль не найден в известных утечках",
-                    "source": "haveibeenpwned"
-                }
-            
-            elif response.status_code == 429:
-                # Слишком много запросов
-                if attempt < max_retries:
-                    wait_time = 2 ** attempt  # Экспоненциальная задержка
-                    print(f"  Слишком много запросов. Ждем {wait_time} секунд...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return {
-                        "breached": False,
-                        "count": 0,
-                        "message": "Превышен лимит запросов к API. Попробуйте позже.",
-                        "source": "rate_limit"
-                    }
-            
-            else:
-                # Другие ошибки HTTP
-                return {
-                    "breached": False,
-                    "count": 0,
-                    "message": f"Ошибка API: {response.status_code}",
-                    "source": "http_error"
-                }
-        
-        except requests.exceptions.Timeout:
-            if attempt < max_retries:
-                print(f"  Таймаут. Повторная попытка через 2 секунды...")
-                time.sleep(2)
-                continue
-            return {
-                "breached": False,
-                "count": 0,
-                "message": "Таймаут при подключении к API",
-                "source": "timeout"
-            }
-        
-        except requests.exceptions.ConnectionError as e:
-            if attempt < max_retries:
-                print(f"  Ошибка подключения. Повтор через 3 секунды...")
-                time.sleep(3)
+    body, error = _get_range(prefix, max_retries, cache, client)
+    if error is not None:
+        return error
+    
+    with METRICS.stage("range_parse"):
+        return _match_range_suffix(body, suffix).to_dict()
+
+
+def check_passwords_breach_batch(passwords: List[str], use_api: bool = True,
+                                 max_retries: int = 2,
+                                 cache: Optional[RangeCache] = None,
+                                 concurrency: int = 1,
+                                 client: Optional[BreachClient] = None,
+                                 local_index: Optional["BreachIndex"] = None,
+                                 mirror: Optional["PwnedMirror"] = None) -> List[Dict]:
+    """
+    Пакетная проверка паролей на наличие в утечках.
+
+    Хеширует весь список, группирует пароли по 5-символьному префиксу
+    SHA-1 и запрашивает каждый уникальный префикс один раз. Результаты
+    совпадают с вызовом check_password_breach для каждого пароля и
+    возвращаются в том же порядке.
+
+    При concurrency > 1 диапазоны запрашиваются параллельно движком
+    из async_breach с общим ограничителем частоты запросов.
+    """
+    return [as_dict(result) for result in _passwords_breach_batch(
+        passwords, use_api, max_retries, cache, concurrency, client, local_index, mirror
+    )]
+
+
+def _passwords_breach_batch(passwords: List[str], use_api: bool = True,
+                            max_retries: int = 2,
+                            cache: Optional[RangeCache] = None,
+                            concurrency: int = 1,
+                            client: Optional[BreachClient] = None,
+                            local_index: Optional["BreachIndex"] = None,
+                            mirror: Optional["PwnedMirror"] = None) -> List[Breach]:
+    """check_passwords_breach_batch с компактными результатами (results.BreachResult)"""
+    results: List[Optional[Breach]] = [None] * len(passwords)
+    groups: Dict[str, List] = {}
+    
+    with METRICS.stage("hash"):
+        for i, password in enumerate(passwords):
+            local_result = _local_breach_result(password, use_api, local_index, mirror)
+            if local_result is not None:
+                results[i] = local_result
                 continue
             
-            # Подробная диагностика ошибки подключения
-            error_msg = "Не удалось подключиться к API"
-            if "SSL" in str(e):
-                error_msg += " (ошибка SSL сертификата)"
-            elif "Proxy" in str(e):
-                error_msg += " (проблема с прокси)"
-            
-            return {
-                "breached": False,
-                "count": 0,
-                "message": error_msg,
-                "source": "connection_error",
-                "details": str(e)
-            }
+            sha1_hash = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+            groups.setdefault(sha1_hash[:5], []).append((i, sha1_hash[5:]))
+    
+    _resolve_groups(groups, results, max_retries, cache, concurrency, client)
+    return results
+
+
+def _resolve_groups(groups: Dict[str, List], results: List[Optional[Breach]], max_retries: int,
+                    cache: Optional[RangeCache], concurrency: int,
+                    client: Optional[BreachClient], mode: str = "sha1") -> None:
+    """
+    Заполняет results по группам {префикс: [(номер, суффикс), ...]}:
+    один запрос диапазона на префикс
+    """
+    ranges = None
+    if concurrency > 1 and groups:
+        from async_breach import fetch_ranges
+        ranges = fetch_ranges(groups, concurrency=concurrency, max_retries=max_retries,
+                              cache=cache, client=client, mode=mode)
+    
+    for prefix, members in groups.items():
+        if ranges is not None:
+            body, error = ranges[prefix]
+        else:
+            body, error = _get_range(prefix, max_retries, cache, client, mode)
+        if error is not None:
+            for i, _ in members:
+                results[i] = dict(error)
+            continue
         
-        except requests.exceptions.RequestException as e:
-            return {
-                "breached": False,
-                "count": 0,
-                "message": f"Ошибка при запросе к API: {str(e)[:50]}",
-                "source": "request_error"
-            }
-    
-    return {
-        "breached": False,
-        "count": 0,
-        "message": "Не удалось выполнить проверку после нескольких попыток",
-        "source": "max_retries_exceeded"
-    }
+        with METRICS.stage("range_parse"):
+            counts = _parse_range(body)
+            for i, suffix in members:
+                count = counts.get(suffix)
+                if count is not None:
+                    results[i] = _breach_found_result(count)
+                else:
+                    results[i] = _breach_not_found_result()
+
+
+@functools.lru_cache(maxsize=None)
+def _common_sha1_hashes() -> frozenset:
+    """SHA-1 распространенных паролей для проверки уже хешированного ввода"""
+    return frozenset(hashlib.sha1(p.encode('utf-8')).hexdigest().upper()
+                     for p in COMMON_PASSWORDS)
+
+
+def _local_hash_result(hex_hash: str, hash_type: str, use_api: bool,
+                       local_index: Optional["BreachIndex"] = None,
+                       mirror: Optional["PwnedMirror"] = None) -> Optional[BreachResult]:
+    """Аналог _local_breach_result для хеша; None - нужно обращаться к API"""
+    # Для NTLM списка нет: hashlib на OpenSSL 3 не умеет MD4
+    if hash_type == "sha1" and hex_hash in _common_sha1_hashes():
+        return COMMON_RESULT
+    
+    if local_index is not None and local_index.contains_hex(hex_hash):
+        return LOCAL_INDEX_RESULT
+    
+    if mirror is not None and hash_type == "sha1":
+        mirror_result = _mirror_result(mirror.lookup_hex(hex_hash))
+        if mirror_result is not None:
+            return mirror_result
+    
+    if not use_api:
+        return DISABLED_RESULT
+    
+    return None
+
+
+def check_hashes_breach_batch(hashes: List[str], hash_type: str = "sha1",
+                              use_api: bool = True, max_retries: int = 2,
+                              cache: Optional[RangeCache] = None,
+                              concurrency: int = 1,
+                              client: Optional[BreachClient] = None,
+                              local_index: Optional["BreachIndex"] = None,
+                              mirror: Optional["PwnedMirror"] = None) -> List[Dict]:
+    """
+    Пакетная проверка уже хешированных паролей (SHA-1 или NTLM, шестнадцатеричные
+    строки в верхнем регистре). Хеширование и анализ сложности пропускаются,
+    хеши сразу группируются по префиксу, как в check_passwords_breach_batch.
+    NTLM запрашиваются через /range/{prefix}?mode=ntlm.
+
+    local_index должен быть собран из хешей того же типа; mirror хранит только SHA-1.
+    """
+    return [as_dict(result) for result in _hashes_breach_batch(
+        hashes, hash_type, use_api, max_retries, cache, concurrency, client, local_index, mirror
+    )]
+
+
+def _hashes_breach_batch(hashes: List[str], hash_type: str = "sha1",
+                         use_api: bool = True, max_retries: int = 2,
+                         cache: Optional[RangeCache] = None,
+                         concurrency: int = 1,
+                         client: Optional[BreachClient] = None,
+                         local_index: Optional["BreachIndex"] = None,
+                         mirror: Optional["PwnedMirror"] = None) -> List[Breach]:
+    """check_hashes_breach_batch с компактными результатами (results.BreachResult)"""
+    results: List[Optional[Breach]] = [None] * len(hashes)
+    groups: Dict[str, List] = {}
+    
+    for i, hex_hash in enumerate(hashes):
+        local_result = _local_hash_result(hex_hash, hash_type, use_api, local_index, mirror)
+        if local_result is not None:
+            results[i] = local_result
+            continue
+        groups.setdefault(hex_hash[:5], []).append((i, hex_hash[5:]))
+    
+    _resolve_groups(groups, results, max_retries, cache, concurrency, client, hash_type)
+    return results
 
 
 def check_password_strength_score(password: str) -> int:
     """Расчет числовой оценки силы пароля (0-100)"""
-    if not password:
-        return 0
-    
-    score = 0
-    
-    # Длина пароля (максимум 30 баллов)
-    length = len(password)
-    if length >= 12:
-        score += 30
-    elif length >= 8:
-        score += 20
-    elif length >= 6:
-        score += 10
-    
-    # Разнообразие символов (максимум 40 баллов)
-    char_types = 0
-    if re.search(r'[a-z]', password):
-        char_types += 1
-    if re.search(r'[A-Z]', password):
-        char_types += 1
-    if re.search(r'\d', password):
-        char_types += 1
-    if re.search(r'[^a-zA-Z0-9]', password):
-        char_types += 1
-    
-    score += char_types * 10
-    
-    # Энтропия (максимум 30 баллов)
-    unique_chars = len(set(password))
-    entropy_score = min(unique_chars / length * 30, 30)
-    score += entropy_score
-    
-    # Штрафы за слабые паттерны
-    if re.search(r'(.)\1{2,}', password):  # 3+ одинаковых символа подряд
-        score -= 20
-    if password.isdigit() or password.isalpha():
-        score -= 15
-    if password.lower() in get_common_passwords_list():
-        score = 0  # Если пароль в списке слабых - обнуляем оценку
-    
-    return max(0, min(100, int(score)))
-
-
-def check_password(password: str, use_api: bool = True, verbose: bool = True) -> Dict:
-    """Основная функция проверки пароля"""
+    return DEFAULT_ANALYZER.strength_score(password)
+
+
+def check_password(password: str, use_api: bool = True, verbose: bool = True,
+                   cache: Optional[RangeCache] = None,
+                   client: Optional[BreachClient] = None,
+                   local_index: Optional["BreachIndex"] = None,
+                   mirror: Optional["PwnedMirror"] = None,
+                   engine: Optional[str] = None) -> Dict:
+    """
+    Основная функция проверки пароля
+
+    engine - движок числовой оценки ("classic" или "guesses"); по умолчанию
+    используется движок анализатора по умолчанию
+    """
+    
+    started = time.perf_counter()
+    METRICS.inc("passwords_checked")
     
     if verbose:
         print("\n" + "=" * 40)
         print("РЕЗУЛЬТАТЫ ПРОВЕРКИ")
         print("=" * 40)
     
-    # Проверка сложности
-    complexity = check_password_complexity(password)
+    # Проверка сложности и числовая оценка - за один анализ
+    with METRICS.stage("analysis") as analysis:
+        complexity, strength_score = get_analyzer(engine).analyze(password)
     
     if verbose:
         print(f"\n1. Анализ сложности:")
@@ -304,9 +349,14 @@ def check_password(password: str, use_api: bool = True, verbose: bool = True) ->
         print(f"   • Содержит цифры: {'✓' if complexity['details']['has_digit'] else '✗'}")
         print(f"   • Содержит спецсимволы: {'✓' if complexity['details']['has_special'] else '✗'}")
         print(f"   • Без очевидных паттернов: {'✓' if complexity['details']['no_common_patterns'] else '✗'}")
+        for pattern in complexity.get('patterns', ()):
+            print(f"     - {PATTERN_KIND_LABELS[pattern['kind']]}: '{pattern['token']}' "
+                  f"(символы {pattern['start'] + 1}-{pattern['end']})")
     
     # Проверка на утечки
-    breach_check = check_password_breach(password, use_api)
+    with METRICS.stage("breach_check") as breach:
+        breach_check = check_password_breach(password, use_api, cache=cache, client=client,
+                                             local_index=local_index, mirror=mirror)
     
     if verbose:
         print(f"\n2. Проверка в базах утечек:")
@@ -317,12 +367,11 @@ def check_password(password: str, use_api: bool = True, verbose: bool = True) ->
             print(f"   ⚠️  ВНИМАНИЕ: Этот пароль скомпрометирован!")
             print(f"   ⚠️  Рекомендуется немедленно его заменить!")
     
-    # Расчет общей оценки
-    strength_score = check_password_strength_score(password)
-    
     if verbose:
         print(f"\n3. Общая оценка безопасности:")
         print(f"   • Оценка (0-100): {strength_score}/100")
+        if 'guesses_log10' in complexity:
+            print(f"   • Попыток для подбора: ~10^{complexity['guesses_log10']:.1f}")
         
         # Визуализация оценки
         bars = "█" * (strength_score // 5) + "░" * (20 - (strength_score // 5))
@@ -359,7 +408,8 @@ def check_password(password: str, use_api: bool = True, verbose: bool = True) ->
             if not complexity['details']['has_special']:
                 recommendations.append("Добавьте специальные символы")
             if not complexity['details']['no_common_patterns']:
-                recommendations.append("Избегайте очевидных паттернов")
+                recommendations.append("Избегайте очевидных паттернов: словарных слов, "
+                                       "клавиатурных проходов и последовательностей")
             if breach_check['breached']:
                 recommendations.append("Немедленно замените пароль")
             
@@ -372,75 +422,174 @@ def check_password(password: str, use_api: bool = True, verbose: bool = True) ->
             print("   • Включайте двухфакторную аутентификацию где возможно")
             print("   • Регулярно меняйте важные пароли")
     
-    return {
+    if verbose and METRICS.enabled:
+        # Остальное время вызова ушло на вывод отчета в консоль
+        METRICS.observe("print", time.perf_counter() - started - analysis.elapsed - breach.elapsed)
+    
+    result = _build_result(complexity, breach_check, strength_score, password)
+    
+    if verbose and 'policies' in result:
+        policies = active_policies()
+        print(f"\n5. Соответствие политикам:")
+        for name, violations in result['policies'].items():
+            if not violations:
+                print(f"   ✓ {name}")
+                continue
+            print(f"   ✗ {name}")
+            policy = policies.policy(name)
+            for rule in violations:
+                print(f"     - {policy.describe(rule)}")
+    
+    return result
+
+
+def _build_result(complexity: Dict, breach_check: Breach, strength_score: int,
+                  password: Optional[str] = None) -> Dict:
+    """
+    Собирает итоговый словарь результата проверки пароля. Если заданы
+    политики (password_policy) и передан пароль, в результат добавляются
+    нарушенные правила по каждой политике: {"policies": {имя: [правила]}}
+    """
+    breach_check = as_dict(breach_check)
+    result = {
         "complexity": complexity,
         "breach_check": breach_check,
         "strength_score": strength_score,
         "is_secure": complexity['score'] >= 6 and not breach_check['breached'] and strength_score >= 70
     }
+    if password is not None:
+        policies = active_policies()
+        if policies is not None:
+            result["policies"] = policies.violations(result, password)
+    return result
 
 
-def check_passwords_from_file(filepath: str, use_api: bool = True) -> None:
-    """Проверка нескольких паролей из файла"""
+def _build_packed_result(bits: int, breach_check: Breach, strength_score: int,
+                         password: Optional[str] = None) -> PasswordResult:
+    """
+    Собирает компактный результат (results.PasswordResult) из битов критериев
+    сложности. Если заданы политики (password_policy) и передан пароль, в
+    результат добавляются нарушенные правила по каждой политике:
+    {"policies": {имя: [правила]}}
+    """
+    result = PasswordResult(bits, strength_score, breach_check)
+    if password is not None:
+        policies = active_policies()
+        if policies is not None:
+            result.set_policies(policies.names, policies.evaluate(
+                password, strength_score, result.complexity_score, result.breached
+            ))
+    return result
+
+
+def check_passwords_from_file(filepath: str, use_api: bool = True,
+                              cache: Optional[RangeCache] = None,
+                              concurrency: int = 1,
+                              client: Optional[BreachClient] = None,
+                              local_index: Optional["BreachIndex"] = None,
+                              mirror: Optional["PwnedMirror"] = None,
+                              stream: bool = False,
+                              window: Optional[int] = None,
+                              workers: int = 1,
+                              result_cache: Optional[ResultCache] = None,
+                              hash_type: Optional[str] = None,
+                              output_format: str = "text",
+                              output_path: Optional[str] = None,
+                              checkpoint_path: Optional[str] = None,
+                              resume: bool = False,
+                              checkpoint_interval: Optional[float] = None) -> None:
+    """
+    Проверка нескольких паролей из файла
+
+    При stream=True файл обрабатывается потоково окнами по window паролей
+    с постоянным расходом памяти (см. file_audit.run_file_audit).
+    При workers > 1 локальная оценка распределяется по процессам.
+    result_cache (ResultCache) исключает повторную проверку одинаковых паролей.
+    hash_type ("sha1" или "ntlm") - в файле выгрузка хешей, а не пароли
+    (см. hash_audit.run_hash_audit).
+    output_format ("text", "jsonl", "csv" или "summary") и output_path задают
+    вывод результатов (см. output_writers); если JSONL, CSV или сводка
+    пишутся в stdout, остальной вывод уходит в stderr.
+    checkpoint_path - периодически сохранять контрольную точку (раз в
+    checkpoint_interval секунд); resume - продолжить с сохраненной точки
+    (см. audit_checkpoint).
+    """
+    from file_audit import DEFAULT_WINDOW, _cache_namespace, run_file_audit
     
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            passwords = [line.strip() for line in f if line.strip()]
-        
-        print(f"\nНайдено паролей для проверки: {len(passwords)}")
-        
-        results = []
-        for i, password in enumerate(passwords, 1):
-            print(f"\n[{i}/{len(passwords)}] Проверка пароля...")
-            result = check_password(password, use_api, verbose=False)
-            results.append(result)
-            
-            # Краткий вывод для каждого пароля
-            stars = "*" * min(len(password), 10) + ("*" if len(password) > 10 else "")
-            print(f"   Пароль: {stars}")
-            print(f"   Оценка: {result['strength_score']}/100 - {result['complexity']['strength']}")
-            if result['breach_check']['breached']:
-                print(f"   ⚠️  Скомпрометирован!")
-        
-        # Сводная статистика
-        strong_count = sum(1 for r in results if r['strength_score'] >= 70)
-        breached_count = sum(1 for r in results if r['breach_check']['breached'])
-        avg_score = sum(r['strength_score'] for r in results) / len(results) if results else 0
-        
-        print("\n" + "=" * 50)
-        print("СВОДНАЯ СТАТИСТИКА")
-        print("=" * 50)
-        print(f"• Всего проверено паролей: {len(passwords)}")
-        print(f"• Средняя оценка безопасности: {avg_score:.1f}/100")
-        print(f"• Надежных паролей (≥70): {strong_count}")
-        print(f"• Скомпрометированных паролей: {breached_count}")
-        print(f"• Слабых паролей (<40): {sum(1 for r in results if r['strength_score'] < 40)}")
-        
-        if breached_count > 0:
-            print(f"\n⚠️  ВНИМАНИЕ: {breached_count} паролей необходимо заменить!")
-            print("   Эти пароли были скомпрометированы в утечках данных.")
-        
-        if strong_count == len(passwords):
-            print(f"\n🎉 Отлично! Все пароли надежны!")
-        elif strong_count / len(passwords) >= 0.7:
-            print(f"\n👍 Хорошо! Большинство паролов надежны.")
-        else:
-            print(f"\n🔴 Требуется улучшение! Много слабых паролей.")
-        
-        # Рекомендации по улучшению
-        print(f"\n📋 Рекомендации по улучшению безопасности:")
-        if breached_count > 0:
-            print(f"   1. Замените {breached_count} скомпрометированных паролей")
-        if strong_count < len(passwords):
-            print(f"   2. Улучшите {len(passwords) - strong_count} слабых паролей")
-        print(f"   3. Используйте команду для генерации: python src/main.py -g -l 16")
+    if use_api and client is None:
+        client = get_default_client()
+    
+    checkpoint = None
+    if checkpoint_path is not None:
+        from audit_checkpoint import DEFAULT_CHECKPOINT_INTERVAL, AuditCheckpoint, CheckpointError
+        # Продолжить можно только в том же режиме и в тот же вывод
+        params = {
+            "hashes": hash_type,
+            "mode": _cache_namespace(use_api, {"local_index": local_index, "mirror": mirror},
+                                     analysis=hash_type is None),
+            "format": output_format,
+            "output": os.path.abspath(output_path) if output_path is not None else None,
+        }
+        checkpoint = AuditCheckpoint(checkpoint_path, filepath, params,
+                                     checkpoint_interval or DEFAULT_CHECKPOINT_INTERVAL)
+        if resume:
+            try:
+                if not checkpoint.load():
+                    print(f"ℹ️  Контрольная точка '{checkpoint_path}' не найдена, "
+                          f"проверка с начала файла")
+            except CheckpointError as e:
+                print(f"❌ Ошибка: {e}")
+                return
+            except FileNotFoundError:
+                print(f"❌ Ошибка: Файл '{filepath}' не найден!")
+                return
+    
+    with contextlib.ExitStack() as stack:
+        writer = None
+        if output_format != "text" or output_path is not None:
+            from output_writers import open_writer
+            position = checkpoint.output_position if checkpoint is not None else None
+            try:
+                writer = stack.enter_context(open_writer(output_format, output_path,
+                                                         position=position))
+            except (OSError, ValueError) as e:
+                print(f"❌ Ошибка: не удалось открыть файл вывода '{output_path}': {e}")
+                return
+            if writer.uses_stdout and writer.machine_readable:
+                stack.enter_context(contextlib.redirect_stdout(sys.stderr))
         
-    except FileNotFoundError:
-        print(f"❌ Ошибка: Файл '{filepath}' не найден!")
-        print(f"   Убедитесь, что файл существует по указанному пути.")
-    except PermissionError:
-        print(f"❌ Ошибка: Нет прав для чтения файла '{filepath}'")
-    except UnicodeDecodeError:
-        print(f"❌ Ошибка: Невозможно прочитать файл '{filepath}' как текст в кодировке UTF-8")
-    except Exception as e:
-        print(f"❌ Неожиданная ошибка при чтении файла: {e}")
\ No newline at end of file
+        try:
+            if hash_type is not None:
+                from hash_audit import run_hash_audit
+                run_hash_audit(filepath, hash_type, use_api, concurrency=concurrency,
+                               window=window or DEFAULT_WINDOW, writer=writer,
+                               checkpoint=checkpoint, cache=cache, client=client,
+                               local_index=local_index, mirror=mirror)
+                return
+            run_file_audit(
+                filepath, use_api, concurrency=concurrency,
+                stream=stream, window=window or DEFAULT_WINDOW, workers=workers,
+                result_cache=result_cache, writer=writer, checkpoint=checkpoint,
+                cache=cache, client=client, local_index=local_index, mirror=mirror
+            )
+        except FileNotFoundError:
+            print(f"❌ Ошибка: Файл '{filepath}' не найден!")
+            print(f"   Убедитесь, что файл существует по указанному пути.")
+        except PermissionError:
+            print(f"❌ Ошибка: Нет прав для чтения файла '{filepath}'")
+        except UnicodeDecodeError:
+            print(f"❌ Ошибка: Невозможно прочитать файл '{filepath}' как текст в кодировке UTF-8")
+        except Exception as e:
+            print(f"❌ Неожиданная ошибка при чтении файла: {e}")
+            _print_resume_hint(checkpoint)
+        except KeyboardInterrupt:
+            _print_resume_hint(checkpoint)
+            raise
+
+
+def _print_resume_hint(checkpoint) -> None:
+    """Подсказка после прерывания, если есть точка, с которой можно продолжить"""
+    if checkpoint is not None and checkpoint.exists:
+        print(f"\n💾 Проверено до строки {checkpoint.line}, контрольная точка: "
+              f"{checkpoint.path}")
+        print(f"   Продолжить: добавьте --resume к той же команде")
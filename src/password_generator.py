@@ -2,8 +2,81 @@
 Модуль для генерации безопасных паролей
 """
 
-import random
+import os
 import string
+import sys
+from typing import BinaryIO, Iterator, List, Optional
+
+
+LOWERCASE = string.ascii_lowercase
+UPPERCASE = string.ascii_uppercase
+DIGITS = string.digits
+SPECIAL = '!@#$%^&*()_+-=[]{}|;:,.<>?'
+ALPHABET = LOWERCASE + UPPERCASE + DIGITS + SPECIAL
+
+MIN_LENGTH = 4  # По одному символу из каждой категории
+DEFAULT_BATCH = 65536  # Паролей в одном блоке при потоковой генерации
+
+# Байт b из os.urandom принимается, только если b < _LIMIT, и дает символ
+# ALPHABET[b % len(ALPHABET)]: все символы равновероятны, без смещения по модулю
+_LIMIT = 256 - 256 % len(ALPHABET)
+_SYMBOLS = bytes(ord(ALPHABET[b % len(ALPHABET)]) if b < _LIMIT else 0 for b in range(256))
+_REJECTED = bytes(range(_LIMIT, 256))
+
+# Каждый символ алфавита заменяется меткой своей категории: 1-4
+_CLASS_MARKS = bytearray(256)
+for _mark, _chars in enumerate((DIGITS, SPECIAL, UPPERCASE, LOWERCASE), 1):
+    for _char in _chars:
+        _CLASS_MARKS[ord(_char)] = _mark
+_CLASS_MARKS = bytes(_CLASS_MARKS)
+
+
+def _random_symbols(count: int) -> bytes:
+    """count равновероятных символов алфавита из криптографического источника"""
+    chunks = []
+    needed = count
+    while needed > 0:
+        # С запасом на отброшенные байты (принимается ~69%)
+        chunk = os.urandom(needed * 3 // 2 + 64).translate(_SYMBOLS, _REJECTED)
+        chunks.append(chunk)
+        needed -= len(chunk)
+    return b"".join(chunks)[:count]
+
+
+def _covers_all_classes(marks: bytes) -> bool:
+    """Есть ли все категории среди меток; самые редкие проверяются первыми"""
+    # Поиск целого числа в bytes - это memchr, на порядок быстрее поиска подстроки
+    return 1 in marks and 2 in marks and 3 in marks and 4 in marks
+
+
+def _check_length(length: int) -> None:
+    if length < MIN_LENGTH:
+        raise ValueError(f"Длина пароля должна быть не меньше {MIN_LENGTH}")
+
+
+def generate_batch(count: int, length: int = 12) -> List[bytes]:
+    """
+    count паролей в виде байтов ASCII.
+
+    Пароль - length независимых равновероятных символов; пароли без
+    какой-либо из четырех категорий отбрасываются целиком и генерируются
+    заново, поэтому все подходящие пароли равновероятны.
+    """
+    _check_length(length)
+    passwords: List[bytes] = []
+    while len(passwords) < count:
+        missing = count - len(passwords)
+        # Запас на отброшенные пароли, чтобы обычно хватало одного прохода
+        draw = missing + missing // 2 + 16
+        symbols = _random_symbols(draw * length)
+        marks = symbols.translate(_CLASS_MARKS)
+        for start in range(0, draw * length, length):
+            end = start + length
+            if _covers_all_classes(marks[start:end]):
+                passwords.append(symbols[start:end])
+                if len(passwords) == count:
+                    break
+    return passwords
 
 
 def generate_password(length=12):
@@ -12,43 +85,67 @@ def generate_password(length=12):
     if length < 8:
         print("Предупреждение: пароли короче 8 символов ненадежны!")
     
-    # Определяем наборы символов
-    lowercase = string.ascii_lowercase
-    uppercase = string.ascii_uppercase
-    digits = string.digits
-    special = '!@#$%^&*()_+-=[]{}|;:,.<>?'
-    
-    # Гарантируем наличие хотя бы одного символа из каждой категории
-    password_chars = [
-        random.choice(lowercase),
-        random.choice(uppercase),
-        random.choice(digits),
-        random.choice(special)
-    ]
-    
-    # Заполняем остаток длины случайными символами из всех категорий
-    all_chars = lowercase + uppercase + digits + special
-    password_chars += random.choices(all_chars, k=length - 4)
-    
-    # Перемешиваем символы
-    random.shuffle(password_chars)
-    
-    return ''.join(password_chars)
+    # Случайность из os.urandom; в пароле есть хотя бы один символ каждой категории
+    return generate_batch(1, length)[0].decode('ascii')
 
 
 def generate_passwords(count=5, length=12):
     """Генерация нескольких паролей"""
     
-    passwords = []
-    for i in range(count):
-        password = generate_password(length)
-        passwords.append(password)
-    
-    return passwords
+    return [password.decode('ascii') for password in generate_batch(count, length)]
+
+
+def _batch_sizes(count: int, batch_size: int) -> Iterator[int]:
+    full, rest = divmod(count, batch_size)
+    for _ in range(full):
+        yield batch_size
+    if rest:
+        yield rest
+
+
+def _generate_block(args) -> bytes:
+    """Блок паролей, разделенных переводом строки (задача для пула процессов)"""
+    count, length = args
+    return b"\n".join(generate_batch(count, length)) + b"\n"
+
+
+def write_passwords(out: BinaryIO, count: int, length: int = 12, processes: int = 1,
+                    batch_size: int = DEFAULT_BATCH) -> int:
+    """
+    Потоково записывает count паролей (по одному на строке) в бинарный поток.
+
+    В памяти одновременно находится не больше нескольких блоков по
+    batch_size паролей. При processes > 1 блоки генерируются в пуле
+    процессов; os.urandom не имеет состояния, которое копировалось
+    бы между процессами. Возвращает число записанных паролей.
+    """
+    _check_length(length)
+    tasks = ((size, length) for size in _batch_sizes(count, batch_size))
+
+    if processes > 1:
+        import multiprocessing
+        with multiprocessing.Pool(processes) as pool:
+            for block in pool.imap_unordered(_generate_block, tasks):
+                out.write(block)
+    else:
+        for task in tasks:
+            out.write(_generate_block(task))
+
+    out.flush()
+    return count
+
+
+def write_passwords_to(path: Optional[str], count: int, length: int = 12,
+                       processes: int = 1) -> int:
+    """write_passwords в файл по пути path или в stdout, если путь не задан"""
+    if path is None:
+        return write_passwords(sys.stdout.buffer, count, length, processes)
+    with open(path, "wb") as f:
+        return write_passwords(f, count, length, processes)
 
 
 if __name__ == "__main__":
     # Пример использования
     print("Пример сгенерированных паролей:")
     for i, pwd in enumerate(generate_passwords(3, 16), 1):
-        print(f"{i}. {pwd}")
\ No newline at end of file
+        print(f"{i}. {pwd}")
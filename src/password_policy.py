@@ -0,0 +1,382 @@
+"""
+Модуль парольных политик из файла конфигурации (JSON).
+
+Пример файла:
+
+    {
+      "policies": [
+        {"name": "corp", "min_length": 12, "require": ["upper", "lower", "digit"],
+         "banned_patterns": ["dictionary", "keyboard"], "banned_words": ["acme"],
+         "max_repeat": 2, "min_score": 60},
+        {"name": "legacy", "min_length": 8, "min_classes": 2, "reject_breached": false}
+      ]
+    }
+"""
+
+import hashlib
+import json
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from password_analyzer import (
+    _LOWER,
+    _SPECIAL,
+    _UPPER,
+    COMMON_PASSWORDS,
+    DEFAULT_ANALYZER,
+    PATTERN_COMMON_PASSWORDS,
+    build_pattern_matcher,
+)
+from pattern_matcher import KIND_DICTIONARY, KIND_KEYBOARD, KIND_SEQUENCE, PatternMatcher
+
+
+CHAR_CLASSES = ("upper", "lower", "digit", "special")
+
+# "common" - пароль целиком из встроенного списка самых частых
+BANNED_PATTERNS = (KIND_DICTIONARY, KIND_SEQUENCE, KIND_KEYBOARD, "common")
+
+# Правила в порядке битов маски нарушений
+RULES = (
+    "min_length",
+    "max_length",
+    "require",
+    "min_classes",
+    "max_repeat",
+    "banned_patterns",
+    "banned_words",
+    "min_score",
+    "min_complexity",
+    "reject_breached",
+)
+_RULE_BITS = {rule: 1 << i for i, rule in enumerate(RULES)}
+
+_CLASS_LABELS = {
+    "upper": "заглавные буквы",
+    "lower": "строчные буквы",
+    "digit": "цифры",
+    "special": "спецсимволы",
+}
+
+_PATTERN_LABELS = {
+    KIND_DICTIONARY: "словарные слова",
+    KIND_SEQUENCE: "последовательности",
+    KIND_KEYBOARD: "клавиатурные проходы",
+    "common": "распространенный пароль",
+}
+
+# Серии одного символа длиной от 2
+_REPEATS = re.compile(r'(.)\1+')
+
+_NO_LIMIT = sys.maxsize
+
+
+class PolicyError(ValueError):
+    """Ошибка в описании политики"""
+    pass
+
+
+class Policy(NamedTuple):
+    """Описание одной политики; не заданные в файле правила не проверяются"""
+    name: str
+    min_length: int = 0
+    max_length: Optional[int] = None
+    require: Tuple[str, ...] = ()  # Обязательные классы символов из CHAR_CLASSES
+    min_classes: int = 0  # Сколько разных классов должно быть хотя бы
+    special_chars: Optional[str] = None  # Свой набор спецсимволов
+    max_repeat: Optional[int] = None  # Самая длинная серия одного символа
+    banned_patterns: Tuple[str, ...] = ()  # Виды из BANNED_PATTERNS
+    banned_words: Tuple[str, ...] = ()  # Запрещенные подстроки (без учета регистра)
+    min_score: int = 0  # Оценка 0-100
+    min_complexity: int = 0  # Число выполненных критериев сложности (0-6)
+    reject_breached: bool = True
+
+    def describe(self, rule: str) -> str:
+        """Текст нарушения правила rule"""
+        if rule == "min_length":
+            return f"Длина меньше {self.min_length} символов"
+        if rule == "max_length":
+            return f"Длина больше {self.max_length} символов"
+        if rule == "require":
+            return "Нет обязательных символов: " + ", ".join(_CLASS_LABELS[c] for c in self.require)
+        if rule == "min_classes":
+            return f"Меньше {self.min_classes} классов символов"
+        if rule == "max_repeat":
+            return f"Больше {self.max_repeat} одинаковых символов подряд"
+        if rule == "banned_patterns":
+            return "Запрещенные паттерны: " + ", ".join(_PATTERN_LABELS[p]
+                                                         for p in self.banned_patterns)
+        if rule == "banned_words":
+            return "Содержит запрещенное слово"
+        if rule == "min_score":
+            return f"Оценка ниже {self.min_score}/100"
+        if rule == "min_complexity":
+            return f"Выполнено меньше {self.min_complexity} критериев сложности"
+        return "Пароль найден в утечках"
+
+
+def _check_int(name: str, field: str, value, minimum: int = 0) -> int:
+    if type(value) is not int or value < minimum:
+        raise PolicyError(f"Политика '{name}': {field} должно быть целым числом "
+                          f"не меньше {minimum}")
+    return value
+
+
+def _check_choices(name: str, field: str, values, choices: Tuple[str, ...]) -> Tuple[str, ...]:
+    if not isinstance(values, list) or any(value not in choices for value in values):
+        raise PolicyError(f"Политика '{name}': {field} - список из {', '.join(choices)}")
+    return tuple(dict.fromkeys(values))
+
+
+def parse_policy(spec: Dict) -> Policy:
+    """Проверяет описание политики из файла и возвращает Policy"""
+    if not isinstance(spec, dict):
+        raise PolicyError("Политика должна быть объектом JSON")
+    name = spec.get("name")
+    if not isinstance(name, str) or not name:
+        raise PolicyError("У политики должно быть непустое имя (name)")
+    unknown = set(spec) - set(Policy._fields)
+    if unknown:
+        raise PolicyError(f"Политика '{name}': неизвестные поля {', '.join(sorted(unknown))}")
+
+    fields: Dict = {"name": name}
+    for field in ("min_length", "min_classes", "min_score", "min_complexity"):
+        if field in spec:
+            fields[field] = _check_int(name, field, spec[field])
+    for field in ("max_length", "max_repeat"):
+        if spec.get(field) is not None:
+            fields[field] = _check_int(name, field, spec[field], minimum=1)
+    if "require" in spec:
+        fields["require"] = _check_choices(name, "require", spec["require"], CHAR_CLASSES)
+    if "banned_patterns" in spec:
+        fields["banned_patterns"] = _check_choices(name, "banned_patterns",
+                                                   spec["banned_patterns"], BANNED_PATTERNS)
+    if "banned_words" in spec:
+        words = spec["banned_words"]
+        if not isinstance(words, list) or not all(isinstance(w, str) and w for w in words):
+            raise PolicyError(f"Политика '{name}': banned_words - список непустых строк")
+        fields["banned_words"] = tuple(dict.fromkeys(word.lower() for word in words))
+    if spec.get("special_chars") is not None:
+        if not isinstance(spec["special_chars"], str) or not spec["special_chars"]:
+            raise PolicyError(f"Политика '{name}': special_chars - непустая строка")
+        fields["special_chars"] = spec["special_chars"]
+    if "reject_breached" in spec:
+        if type(spec["reject_breached"]) is not bool:
+            raise PolicyError(f"Политика '{name}': reject_breached - true или false")
+        fields["reject_breached"] = spec["reject_breached"]
+
+    policy = Policy(**fields)
+    if policy.min_classes > len(CHAR_CLASSES):
+        raise PolicyError(f"Политика '{name}': min_classes не больше {len(CHAR_CLASSES)}")
+    if policy.max_length is not None and policy.max_length < policy.min_length:
+        raise PolicyError(f"Политика '{name}': max_length меньше min_length")
+    return policy
+
+
+def load_policies(path: str) -> List[Policy]:
+    """
+    Читает политики из JSON: {"policies": [...]}, список политик или одна политика
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise PolicyError(f"Файл политик '{path}' - не JSON: {e}")
+
+    if isinstance(data, dict) and "policies" in data:
+        data = data["policies"]
+    specs = data if isinstance(data, list) else [data]
+    if not specs:
+        raise PolicyError(f"В файле '{path}' нет ни одной политики")
+
+    policies = [parse_policy(spec) for spec in specs]
+    names = [policy.name for policy in policies]
+    if len(set(names)) != len(names):
+        raise PolicyError(f"В файле '{path}' повторяются имена политик")
+    return policies
+
+
+class PolicySet:
+    """
+    Набор политик, скомпилированный в один проверяющий проход.
+
+    Признаки пароля, нужные хотя бы одной политике, вычисляются один раз
+    на все политики: классы символов - по таблице "символ -> биты классов"
+    (в ней сразу все наборы спецсимволов всех политик), паттерны и
+    запрещенные слова - одним проходом автомата, серии - одним поиском.
+    Каждая политика после этого - несколько сравнений целых чисел, поэтому
+    проверка по нескольким политикам стоит почти как по одной.
+    """
+
+    def __init__(self, policies: Iterable[Policy]):
+        self.policies = tuple(policies)
+        self.names = tuple(policy.name for policy in self.policies)
+
+        # Биты классов: 0 - заглавные, 1 - строчные, 2 - цифры, дальше -
+        # по биту на каждый различный набор спецсимволов
+        special_sets: Dict[frozenset, int] = {}
+        for policy in self.policies:
+            chars = frozenset(policy.special_chars) if policy.special_chars else _SPECIAL
+            special_sets.setdefault(chars, 1 << (3 + len(special_sets)))
+        self._special_sets = tuple(special_sets.items())
+        self._char_bits: Dict[str, int] = {}
+
+        # Биты найденных паттернов: виды автомата, "common", затем по биту
+        # на запрещенные слова каждой политики
+        pattern_bits = {kind: 1 << i for i, kind in enumerate(BANNED_PATTERNS)}
+        banned_words: List[Tuple[str, str]] = []
+
+        self._compiled = []
+        for index, policy in enumerate(self.policies):
+            special_bit = special_sets[frozenset(policy.special_chars)
+                                       if policy.special_chars else _SPECIAL]
+            class_bits = {"upper": 1, "lower": 2, "digit": 4, "special": special_bit}
+            banned = 0
+            for kind in policy.banned_patterns:
+                banned |= pattern_bits[kind]
+            if policy.banned_words:
+                kind = f"banned:{index}"
+                pattern_bits[kind] = 1 << len(pattern_bits)
+                banned_words.extend((word, kind) for word in policy.banned_words)
+                words_bit = pattern_bits[kind]
+            else:
+                words_bit = 0
+            self._compiled.append((
+                policy.min_length,
+                policy.max_length or _NO_LIMIT,
+                sum(class_bits[name] for name in policy.require),
+                sum(class_bits.values()),
+                policy.min_classes,
+                policy.max_repeat or _NO_LIMIT,
+                banned,
+                words_bit,
+                policy.min_score,
+                policy.min_complexity,
+                policy.reject_breached,
+            ))
+
+        self._pattern_bits = pattern_bits
+        self._banned_words = tuple(banned_words)
+        self._needs_runs = any(policy.max_repeat for policy in self.policies)
+        self._needs_common = any("common" in policy.banned_patterns for policy in self.policies)
+        self._needs_matcher = bool(banned_words) or any(
+            kind != "common" for policy in self.policies for kind in policy.banned_patterns
+        )
+        self._matcher: Optional[PatternMatcher] = None
+
+        fingerprint = hashlib.sha1()
+        for policy in self.policies:
+            fingerprint.update(json.dumps(policy._asdict(), sort_keys=True).encode("utf-8"))
+        self.fingerprint = fingerprint.hexdigest()
+
+    @property
+    def matcher(self) -> PatternMatcher:
+        """
+        Автомат анализатора по умолчанию; если политики запрещают свои слова -
+        отдельный автомат с теми же словарями и этими словами
+        """
+        if not self._banned_words:
+            return DEFAULT_ANALYZER.matcher
+        if self._matcher is None:
+            self._matcher = build_pattern_matcher(DEFAULT_ANALYZER.wordlists, self._banned_words)
+        return self._matcher
+
+    def _classify(self, char: str) -> int:
+        bits = (char in _UPPER) | (char in _LOWER) << 1 | char.isdecimal() << 2
+        for chars, bit in self._special_sets:
+            if char in chars:
+                bits |= bit
+        self._char_bits[char] = bits
+        return bits
+
+    def evaluate(self, password: str, strength_score: int, complexity_score: int,
+                 breached: bool) -> List[int]:
+        """
+        Маска нарушенных правил (биты по RULES) для каждой политики,
+        0 - пароль политике соответствует. Оценки и результат проверки на
+        утечки берутся из уже выполненного анализа
+        """
+        length = len(password)
+
+        char_bits = self._char_bits
+        classify = self._classify
+        classes = 0
+        for char in set(password):
+            bits = char_bits.get(char)
+            classes |= classify(char) if bits is None else bits
+
+        longest_run = 0
+        if self._needs_runs and password:
+            longest_run = 1
+            for match in _REPEATS.finditer(password):
+                run = match.end() - match.start()
+                if run > longest_run:
+                    longest_run = run
+
+        found = 0
+        if self._needs_matcher or self._needs_common:
+            lowered = password.lower()
+            if self._needs_matcher:
+                pattern_bits = self._pattern_bits
+                for kind in self.matcher.found_kinds(lowered):
+                    found |= pattern_bits.get(kind, 0)
+            if self._needs_common and (lowered in COMMON_PASSWORDS
+                                       or lowered in PATTERN_COMMON_PASSWORDS):
+                found |= self._pattern_bits["common"]
+
+        masks = []
+        for (min_length, max_length, required, class_mask, min_classes, max_repeat,
+             banned, words_bit, min_score, min_complexity, reject_breached) in self._compiled:
+            failed = 0
+            if length < min_length:
+                failed |= 1
+            if length > max_length:
+                failed |= 2
+            if classes & required != required:
+                failed |= 4
+            if min_classes and bin(classes & class_mask).count("1") < min_classes:
+                failed |= 8
+            if longest_run > max_repeat:
+                failed |= 16
+            if found & banned:
+                failed |= 32
+            if found & words_bit:
+                failed |= 64
+            if strength_score < min_score:
+                failed |= 128
+            if complexity_score < min_complexity:
+                failed |= 256
+            if breached and reject_breached:
+                failed |= 512
+            masks.append(failed)
+        return masks
+
+    def violations(self, result: Dict, password: str) -> Dict[str, List[str]]:
+        """Нарушенные правила по имени политики для результата check_password"""
+        masks = self.evaluate(password, result['strength_score'], result['complexity']['score'],
+                              result['breach_check']['breached'])
+        return {
+            name: [rule for rule in RULES if mask & _RULE_BITS[rule]]
+            for name, mask in zip(self.names, masks)
+        }
+
+    def policy(self, name: str) -> Policy:
+        return self.policies[self.names.index(name)]
+
+
+ACTIVE_POLICIES: Optional[PolicySet] = None
+
+
+def configure_policies(path: Optional[str]) -> Optional[PolicySet]:
+    """
+    Загружает политики из файла и делает их действующими для всех проверок
+    (None - отключить). Вызывается до создания пула процессов и сервиса
+    """
+    global ACTIVE_POLICIES
+    ACTIVE_POLICIES = PolicySet(load_policies(path)) if path is not None else None
+    return ACTIVE_POLICIES
+
+
+def active_policies() -> Optional[PolicySet]:
+    """Действующие политики или None, если они не заданы"""
+    return ACTIVE_POLICIES
@@ -0,0 +1,337 @@
+"""
+Модуль поиска словарных слов, клавиатурных проходов и последовательностей
+в пароле одним линейным проходом (автомат Ахо-Корасик)
+"""
+
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+KIND_DICTIONARY = "dictionary"
+KIND_SEQUENCE = "sequence"
+KIND_KEYBOARD = "keyboard"
+
+KIND_LABELS = {
+    KIND_DICTIONARY: "Словарное слово",
+    KIND_SEQUENCE: "Последовательность",
+    KIND_KEYBOARD: "Клавиатурный проход",
+}
+
+# Вид входной пары: словарное слово, которое засчитывается как паттерн,
+# только если составляет всю строку (finditer и оценщик видят его как обычное)
+KIND_WHOLE_WORD = "whole_word"
+
+# При совпадении одного и того же фрагмента остается вид с меньшим номером
+KIND_PRIORITY = {KIND_DICTIONARY: 0, KIND_SEQUENCE: 1, KIND_KEYBOARD: 2}
+
+MIN_WORD_LENGTH = 4
+# Более короткие слова - частые куски обычных слов ("pass", "love", "summer"),
+# поэтому внутри строки они паттерном не считаются
+MIN_SUBSTRING_WORD_LENGTH = 7
+WALK_WINDOW = 4  # Проходы и последовательности ищутся окнами такой длины
+
+# Раскладки по рядам; символы одного столбца стоят на одной позиции
+KEYBOARD_LAYOUTS = {
+    "qwerty": ("1234567890-=", "qwertyuiop[]", "asdfghjkl;'", "zxcvbnm,./"),
+    "йцукен": ("1234567890-=", "йцукенгшщзхъ", "фывапролджэ", "ячсмитьбю."),
+}
+
+SEQUENCES = (
+    "01234567890",
+    "abcdefghijklmnopqrstuvwxyz",
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    "абвгдежзийклмнопрстуфхцчшщъыьэюя",  # Без "ё", как ее часто и набирают
+)
+
+# Предел запомненных переходов автомата: дальше переходы вычисляются каждый раз
+MAX_CACHED_TRANSITIONS = 1 << 20
+
+# Символ кодируется в ключе перехода вместе с состоянием: state << 21 | ord(char)
+_CHAR_BITS = 21
+
+
+def keyboard_lines(rows: Tuple[str, ...]) -> List[str]:
+    """
+    Прямые линии клавиатурного графа: ряды, столбцы, зигзаги между
+    соседними рядами (1q2w3e...) и столбцы подряд (1qaz2wsx...)
+    """
+    lines = list(rows)
+    width = max(len(row) for row in rows)
+    columns = ["".join(row[i] for row in rows if i < len(row)) for i in range(width)]
+    lines.extend(column for column in columns if len(column) > 1)
+    lines.append("".join(columns))
+    for upper, lower in zip(rows, rows[1:]):
+        lines.append("".join(a + b for a, b in zip(upper, lower)))
+    return lines
+
+
+def windows(lines: Iterable[str], size: int = WALK_WINDOW) -> Iterator[str]:
+    """Все фрагменты длины size каждой линии в обоих направлениях"""
+    for line in lines:
+        for text in (line, line[::-1]):
+            for start in range(len(text) - size + 1):
+                yield text[start:start + size]
+
+
+def read_wordlist(path: str, min_length: int = MIN_WORD_LENGTH) -> Iterator[str]:
+    """Слова из файла (по одному на строке) в нижнем регистре"""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            word = line.strip().lower()
+            if len(word) >= min_length:
+                yield word
+
+
+class PatternMatcher:
+    """
+    Автомат Ахо-Корасик над набором (шаблон, вид).
+
+    Строится один раз; поиск всех вхождений всех шаблонов - один проход
+    по строке с переходами по ссылкам неудач. Переходы хранятся в одном
+    словаре с целочисленными ключами, а не в словаре на каждое
+    состояние, поэтому автомат на сотни тысяч слов занимает умеренно памяти.
+    Итоговые переходы (после ссылок неудач) запоминаются при поиске, так
+    что на повторяющихся входах каждый символ стоит одного обращения к словарю.
+
+    Слова вида KIND_WHOLE_WORD хранятся как словарные: finditer и rank
+    их видят, а contains_any, found_kinds и spans засчитывают их, только
+    если слово совпадает со всей строкой.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        goto: Dict[int, int] = {}
+        depth = [0]
+        kinds: Dict[int, List[str]] = {}
+        ranks: Dict[int, int] = {}
+        whole_words: Set[int] = set()
+        substring_words: Set[int] = set()
+        fingerprint = hashlib.sha1()
+        count = 0
+
+        for pattern, kind in patterns:
+            if not pattern:
+                continue
+            whole = kind == KIND_WHOLE_WORD
+            if whole:
+                kind = KIND_DICTIONARY
+            state = 0
+            for char in pattern:
+                code = ord(char)
+                key = state << _CHAR_BITS | code
+                child = goto.get(key)
+                if child is None:
+                    child = len(depth)
+                    goto[key] = child
+                    depth.append(depth[state] + 1)
+                state = child
+            if kind == KIND_DICTIONARY:
+                (whole_words if whole else substring_words).add(state)
+            state_kinds = kinds.setdefault(state, [])
+            if kind not in state_kinds:
+                state_kinds.append(kind)
+                if kind == KIND_DICTIONARY:
+                    ranks[state] = len(ranks) + 1
+                fingerprint.update(f"{kind}:{pattern}\n".encode("utf-8"))
+                count += 1
+        # Слово, добавленное и целиком, и как подстрока, ищется как подстрока
+        whole_words -= substring_words
+        for state in sorted(whole_words):
+            fingerprint.update(f"{KIND_WHOLE_WORD}:{state}\n".encode("utf-8"))
+
+        # Ссылки неудач по возрастанию глубины (как при обходе в ширину):
+        # к моменту обработки перехода ссылка его начального состояния готова;
+        # выходы наследуются по ссылкам неудач
+        fail = [0] * len(depth)
+        outputs: Dict[int, Tuple[Tuple[int, str], ...]] = {}
+        # Те же выходы без слов, которые засчитываются только целиком
+        substring_outputs: Dict[int, Tuple[Tuple[int, str], ...]] = {}
+        code_mask = (1 << _CHAR_BITS) - 1
+        for key, child in sorted(goto.items(), key=lambda item: depth[item[1]]):
+            state = key >> _CHAR_BITS
+            if state:
+                code = key & code_mask
+                target = fail[state]
+                while True:
+                    next_state = goto.get(target << _CHAR_BITS | code)
+                    if next_state is not None:
+                        fail[child] = next_state
+                        break
+                    if not target:
+                        break
+                    target = fail[target]
+
+            own = tuple((depth[child], kind) for kind in kinds.get(child, ()))
+            inherited = outputs.get(fail[child], ())
+            if own or inherited:
+                outputs[child] = own + inherited
+            if child in whole_words:
+                own = tuple(output for output in own if output[1] != KIND_DICTIONARY)
+            inherited = substring_outputs.get(fail[child], ())
+            if own or inherited:
+                substring_outputs[child] = own + inherited
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self._substring_outputs = substring_outputs
+        # Состояние слова -> его длина: слово совпало со всей строкой, если
+        # проход закончился в этом состоянии и длина равна длине строки
+        self._whole_words = {state: depth[state] for state in whole_words}
+        self._ranks = ranks
+        # Готовые переходы (с учетом ссылок неудач), заполняются по мере поиска
+        self._delta: Dict[int, int] = {}
+        self.pattern_count = count
+        self.state_count = len(depth)
+        self.fingerprint = fingerprint.hexdigest()
+
+    def rank(self, word: str) -> Optional[int]:
+        """
+        Порядковый номер слова среди словарных шаблонов (1 - первое добавленное).
+        Словари добавляются от частых слов к редким, поэтому номер - оценка частоты
+        """
+        return self._ranks.get(self._state(word))
+
+    def _state(self, word: str) -> Optional[int]:
+        """Состояние бора, соответствующее слову целиком (None - такого пути нет)"""
+        goto = self._goto
+        state = 0
+        for char in word:
+            state = goto.get(state << _CHAR_BITS | ord(char))
+            if state is None:
+                return None
+        return state
+
+    def _transition(self, state: int, code: int) -> int:
+        """Переход с учетом ссылок неудач; результат запоминается в _delta"""
+        key = state << _CHAR_BITS | code
+        goto = self._goto
+        fail = self._fail
+        while True:
+            next_state = goto.get(state << _CHAR_BITS | code)
+            if next_state is not None:
+                break
+            if not state:
+                next_state = 0
+                break
+            state = fail[state]
+        if len(self._delta) < MAX_CACHED_TRANSITIONS:
+            self._delta[key] = next_state
+        return next_state
+
+    def contains_any(self, text: str) -> bool:
+        """Есть ли в строке хотя бы одно вхождение (останавливается на первом)"""
+        delta = self._delta
+        transition = self._transition
+        outputs = self._substring_outputs
+        state = 0
+        for char in text:
+            code = ord(char)
+            next_state = delta.get(state << _CHAR_BITS | code)
+            state = transition(state, code) if next_state is None else next_state
+            if state in outputs:
+                return True
+        return self._whole_words.get(state) == len(text)
+
+    def found_kinds(self, text: str) -> Set[str]:
+        """Виды всех шаблонов, встретившихся в строке (без позиций)"""
+        delta = self._delta
+        transition = self._transition
+        outputs = self._substring_outputs
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            code = ord(char)
+            next_state = delta.get(state << _CHAR_BITS | code)
+            state = transition(state, code) if next_state is None else next_state
+            if state in outputs:
+                found.update(kind for _, kind in outputs[state])
+        if self._whole_words.get(state) == len(text):
+            found.add(KIND_DICTIONARY)
+        return found
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Все вхождения: (начало, конец, вид) в порядке окончания"""
+        return self._finditer(text, self._outputs)
+
+    def _finditer(self, text: str,
+                  outputs: Dict[int, Tuple[Tuple[int, str], ...]]) -> Iterator[Tuple[int, int, str]]:
+        delta = self._delta
+        transition = self._transition
+        state = 0
+        for end, char in enumerate(text, 1):
+            code = ord(char)
+            next_state = delta.get(state << _CHAR_BITS | code)
+            state = transition(state, code) if next_state is None else next_state
+            found = outputs.get(state)
+            if found:
+                for length, kind in found:
+                    yield end - length, end, kind
+
+    def spans(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Итоговые фрагменты (начало, конец, вид), отсортированные по началу.
+
+        Идущие подряд окна прохода или последовательности склеиваются в
+        один фрагмент ("qwer" + "wert" -> "qwert"); фрагмент, целиком
+        лежащий внутри другого, и такой же фрагмент менее важного вида
+        отбрасываются. Слова, засчитываемые только целиком, входят сюда,
+        лишь когда совпадают со всей строкой
+        """
+        found = set(self._finditer(text, self._substring_outputs))
+        if self._state(text) in self._whole_words:
+            found.add((0, len(text), KIND_DICTIONARY))
+        merged = merge_windows(sorted(found))
+        if not merged:
+            return []
+
+        result = []
+        for start, end, kind in merged:
+            covered = any(
+                (s <= start and end <= e and (s, e) != (start, end))
+                or ((s, e) == (start, end) and KIND_PRIORITY[k] < KIND_PRIORITY[kind])
+                for s, e, k in merged
+            )
+            if not covered and (start, end, kind) not in result:
+                result.append((start, end, kind))
+        result.sort()
+        return result
+
+
+def merge_windows(found: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """
+    Склеивает идущие подряд окна проходов и последовательностей из
+    отсортированного списка вхождений; словарные вхождения не меняются
+    """
+    merged: List[List] = []
+    for start, end, kind in found:
+        if kind != KIND_DICTIONARY:
+            for span in reversed(merged):
+                if span[2] == kind and span[0] < start and span[1] + 1 == end:
+                    span[1] = end
+                    break
+            else:
+                merged.append([start, end, kind])
+        else:
+            merged.append([start, end, kind])
+    return [(start, end, kind) for start, end, kind in merged]
+
+
+def builtin_patterns(words: Iterable[str] = (),
+                     min_word_length: int = MIN_WORD_LENGTH,
+                     min_substring_length: int = MIN_SUBSTRING_WORD_LENGTH
+                     ) -> Iterator[Tuple[str, str]]:
+    """
+    Последовательности, клавиатурные проходы обеих раскладок и слова;
+    слова короче min_substring_length засчитываются только целиком
+    """
+    for pattern in windows(SEQUENCES):
+        yield pattern, KIND_SEQUENCE
+    for rows in KEYBOARD_LAYOUTS.values():
+        for pattern in windows(keyboard_lines(rows)):
+            yield pattern, KIND_KEYBOARD
+    for word in words:
+        word = word.lower()
+        if len(word) >= min_substring_length:
+            yield word, KIND_DICTIONARY
+        elif len(word) >= min_word_length:
+            yield word, KIND_WHOLE_WORD
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Модуль локального зеркала Pwned Passwords: все 16^5 диапазонов SHA-1
+в компактных бинарных шардах для проверки без сети
+
+Запуск:
+    python src/pwned_mirror.py sync ~/pwned-mirror --concurrency 32 --rate 300
+    python src/pwned_mirror.py sync ~/pwned-mirror --refresh
+    python src/main.py -f passwords.txt --mirror ~/pwned-mirror --no-api
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Шард - 256 диапазонов с общими первыми тремя символами префикса (000..FFF)
+SHARD_COUNT = 4096
+RANGES_PER_SHARD = 256
+RANGE_COUNT = SHARD_COUNT * RANGES_PER_SHARD  # 16^5
+
+SHARD_MAGIC = b"PWMIR1\0\0"
+# magic, число записей, резерв; затем 257 смещений (в записях) по четвертому-пятому символу
+_HEADER = struct.Struct("<8sII")
+_OFFSETS = struct.Struct(f"<{RANGES_PER_SHARD + 1}I")
+_DATA_OFFSET = _HEADER.size + _OFFSETS.size
+
+# Запись: 20 байт SHA-1 + число утечек (uint32, big-endian), записи отсортированы
+DIGEST_BYTES = 20
+RECORD_BYTES = DIGEST_BYTES + 4
+MAX_COUNT = 0xFFFFFFFF
+
+DEFAULT_MAX_OPEN_SHARDS = 256  # Открытых mmap одновременно (ограничение дескрипторов)
+PROGRESS_EVERY = 64  # Шардов между строками прогресса
+
+
+class PwnedMirrorError(Exception):
+    """Каталог не является зеркалом или шард поврежден"""
+    pass
+
+
+def shard_name(index: int) -> str:
+    return f"{index:03X}"
+
+
+def _shard_path(directory: str, index: int) -> str:
+    return os.path.join(directory, shard_name(index) + ".bin")
+
+
+def _meta_path(directory: str, index: int) -> str:
+    return os.path.join(directory, shard_name(index) + ".json")
+
+
+def _valid_shard(data) -> bool:
+    if len(data) < _DATA_OFFSET:
+        return False
+    magic, count, _ = _HEADER.unpack_from(data, 0)
+    return magic == SHARD_MAGIC and len(data) == _DATA_OFFSET + count * RECORD_BYTES
+
+
+# --- Чтение -------------------------------------------------------------
+
+
+class PwnedMirror:
+    """
+    Зеркало, открываемое через mmap.
+
+    Поиск хеша: номер шарда и диапазона берутся из первых 20 бит хеша,
+    границы диапазона - из таблицы смещений шарда, дальше бинарный
+    поиск по записям фиксированной ширины (~10 сравнений на диапазон).
+    Шарды открываются лениво, давно не использованные закрываются.
+    """
+
+    def __init__(self, directory: str, max_open: int = DEFAULT_MAX_OPEN_SHARDS):
+        if not os.path.isdir(directory):
+            raise PwnedMirrorError(f"Каталог зеркала не найден: {directory}")
+        self.directory = directory
+        self.max_open = max_open
+        self.lookups = 0
+        self.missing = 0
+        self._open: "OrderedDict[int, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shard(self, index: int) -> Optional[mmap.mmap]:
+        """mmap шарда или None, если шард еще не скачан"""
+        entry = self._open.get(index)
+        if entry is not None:
+            self._open.move_to_end(index)
+            return entry[1]
+
+        try:
+            f = open(_shard_path(self.directory, index), "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            data = None
+        if data is None or not _valid_shard(data):
+            if data is not None:
+                data.close()
+            f.close()
+            raise PwnedMirrorError(f"Шард поврежден: {_shard_path(self.directory, index)}")
+
+        self._open[index] = (f, data)
+        if len(self._open) > self.max_open:
+            _, (old_file, old_data) = self._open.popitem(last=False)
+            old_data.close()
+            old_file.close()
+        return data
+
+    def lookup_digest(self, digest: bytes) -> Optional[int]:
+        """
+        Число утечек для SHA-1 (сырые 20 байт): 0 - хеша нет в зеркале,
+        None - нужный шард еще не скачан
+        """
+        shard = (digest[0] << 4) | (digest[1] >> 4)
+        sub = ((digest[1] & 0x0F) << 4) | (digest[2] >> 4)
+
+        with self._lock:
+            self.lookups += 1
+            data = self._shard(shard)
+            if data is None:
+                self.missing += 1
+                return None
+
+            lo, hi = struct.unpack_from("<2I", data, _HEADER.size + 4 * sub)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                start = _DATA_OFFSET + mid * RECORD_BYTES
+                probe = data[start:start + DIGEST_BYTES]
+                if probe < digest:
+                    lo = mid + 1
+                elif probe > digest:
+                    hi = mid
+                else:
+                    return int.from_bytes(data[start + DIGEST_BYTES:start + RECORD_BYTES], "big")
+        return 0
+
+    def lookup_hex(self, hex_hash: str) -> Optional[int]:
+        return self.lookup_digest(bytes.fromhex(hex_hash))
+
+    def lookup(self, password: str) -> Optional[int]:
+        return self.lookup_digest(hashlib.sha1(password.encode("utf-8")).digest())
+
+    def shards_present(self) -> int:
+        return sum(1 for i in range(SHARD_COUNT) if os.path.exists(_shard_path(self.directory, i)))
+
+    def stats(self) -> Dict:
+        return {"lookups": self.lookups, "missing_shard": self.missing,
+                "open_shards": len(self._open)}
+
+    def close(self) -> None:
+        with self._lock:
+            for f, data in self._open.values():
+                data.close()
+                f.close()
+            self._open.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_mirror(directory: Optional[str]) -> Optional[PwnedMirror]:
+    """Открывает зеркало, если путь задан"""
+    return PwnedMirror(directory) if directory else None
+
+
+# --- Запись шардов ------------------------------------------------------
+
+
+def parse_range_records(prefix: str, body: str) -> bytes:
+    """Ответ /range/{prefix} в отсортированные записи; строки-заполнители (count 0) пропускаются"""
+    records = []
+    for line in body.splitlines():
+        suffix, _, count = line.partition(":")
+        count = int(count) if count.strip() else 0
+        if count > 0:
+            records.append(bytes.fromhex(prefix + suffix.strip())
+                           + min(count, MAX_COUNT).to_bytes(4, "big"))
+    records.sort()
+    return b"".join(records)
+
+
+def _read_shard_ranges(path: str) -> Optional[List[bytes]]:
+    """Записи существующего шарда по диапазонам (для переиспользования при ответе 304)"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if not _valid_shard(data):
+        return None
+    offsets = _OFFSETS.unpack_from(data, _HEADER.size)
+    return [data[_DATA_OFFSET + offsets[i] * RECORD_BYTES:_DATA_OFFSET + offsets[i + 1] * RECORD_BYTES]
+            for i in range(RANGES_PER_SHARD)]
+
+
+def _load_meta(directory: str, index: int) -> Dict:
+    try:
+        with open(_meta_path(directory, index), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _replace_file(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_shard(directory: str, index: int, ranges: List[bytes], meta: Dict) -> int:
+    """Атомарно записывает шард и его ETag; возвращает число записей"""
+    offsets = [0]
+    for records in ranges:
+        offsets.append(offsets[-1] + len(records) // RECORD_BYTES)
+    count = offsets[-1]
+    _replace_file(_shard_path(directory, index),
+                  _HEADER.pack(SHARD_MAGIC, count, 0) + _OFFSETS.pack(*offsets) + b"".join(ranges))
+    # Метаданные пишутся после шарда: при сбое между ними следующий
+    # запуск просто скачает диапазоны заново, без потери согласованности
+    _replace_file(_meta_path(directory, index),
+                  json.dumps(meta, sort_keys=True).encode("utf-8"))
+    return count
+
+
+# --- Синхронизация ------------------------------------------------------
+
+
+class SyncStats:
+    """Счетчики синхронизации"""
+
+    def __init__(self, total_shards: int):
+        self.total_shards = total_shards
+        self.skipped = 0  # Уже скачаны (продолжение после прерывания)
+        self.written = 0
+        self.unchanged = 0  # Все диапазоны ответили 304
+        self.failed = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.records = 0
+        self.started = time.monotonic()
+
+    @property
+    def processed(self) -> int:
+        return self.skipped + self.written + self.unchanged + self.failed
+
+    def as_dict(self) -> Dict:
+        return {
+            "total_shards": self.total_shards,
+            "skipped": self.skipped,
+            "written": self.written,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "records": self.records,
+            "elapsed_seconds": time.monotonic() - self.started,
+        }
+
+
+class _ShardJob:
+    """Скачивание одного шарда: 256 диапазонов, условные запросы по сохраненным ETag"""
+
+    def __init__(self, directory: str, index: int, refresh: bool):
+        self.index = index
+        self.ranges: List[Optional[bytes]] = [None] * RANGES_PER_SHARD
+        self.meta = _load_meta(directory, index) if refresh else {}
+        self.old_ranges = _read_shard_ranges(_shard_path(directory, index)) if refresh else None
+        if self.old_ranges is None:
+            self.meta = {}
+        self.etags: Dict[str, str] = dict(self.meta.get("etags", {}))
+        self.remaining = RANGES_PER_SHARD
+        self.changed = False
+        self.failed = False
+
+    def prefix(self, sub: int) -> str:
+        return f"{shard_name(self.index)}{sub:02X}"
+
+    def conditional_headers(self, sub: int) -> Optional[Dict]:
+        etag = self.etags.get(f"{sub:02X}")
+        return {"If-None-Match": etag} if etag else None
+
+    def complete(self, sub: int, response) -> None:
+        if response.status_code == 304:
+            self.ranges[sub] = self.old_ranges[sub]
+        else:
+            self.ranges[sub] = parse_range_records(self.prefix(sub), response.text)
+            self.changed = True
+            etag = response.headers.get("ETag")
+            if etag:
+                self.etags[f"{sub:02X}"] = etag
+            else:
+                self.etags.pop(f"{sub:02X}", None)
+        self.remaining -= 1
+
+
+async def _sync_async(directory: str, shards: Iterable[int], stats: SyncStats,
+                      concurrency: int, rate: float, max_retries: int,
+                      client, refresh: bool, verbose: bool) -> None:
+    from async_breach import TokenBucket, _request_range_async
+
+    limiter = TokenBucket(rate, capacity=concurrency)
+    stop = False
+
+    def jobs() -> Iterator[_ShardJob]:
+        for index in shards:
+            if not refresh and os.path.exists(_shard_path(directory, index)):
+                stats.skipped += 1
+                continue
+            yield _ShardJob(directory, index, refresh)
+
+    def tasks() -> Iterator[Tuple[_ShardJob, int]]:
+        # Шарды идут по порядку, поэтому в памяти лишь несколько незавершенных
+        for job in jobs():
+            for sub in range(RANGES_PER_SHARD):
+                yield job, sub
+
+    def report() -> None:
+        if verbose and stats.processed % PROGRESS_EVERY == 0:
+            rate_now = stats.requests / max(time.monotonic() - stats.started, 1e-9)
+            print(f"  Шардов: {stats.processed}/{stats.total_shards}, "
+                  f"запросов: {stats.requests} ({rate_now:.0f}/с), "
+                  f"без изменений (304): {stats.not_modified}, ошибок: {stats.failed}",
+                  flush=True)
+
+    def finish(job: _ShardJob) -> None:
+        if job.failed:
+            stats.failed += 1
+        elif job.changed:
+            stats.records += write_shard(directory, job.index, job.ranges,
+                                         {"etags": job.etags, "synced_at": time.time()})
+            stats.written += 1
+        else:
+            stats.unchanged += 1
+        report()
+
+    queue = tasks()
+
+    async def worker():
+        nonlocal stop
+        for job, sub in queue:
+            if stop:
+                return
+            if job.failed:
+                # Шард уже не будет записан: остальные его диапазоны не запрашиваем
+                job.remaining -= 1
+            else:
+                response, error = await _request_range_async(
+                    job.prefix(sub), client, limiter, executor, max_retries,
+                    headers=job.conditional_headers(sub)
+                )
+                stats.requests += 1
+                if error is not None:
+                    job.failed = True
+                    job.remaining -= 1
+                    if error["source"] == "circuit_open":
+                        stop = True
+                        if verbose:
+                            print(f"❌ {error['message']}; синхронизация прервана")
+                else:
+                    if response.status_code == 304:
+                        stats.not_modified += 1
+                    job.complete(sub, response)
+            if job.remaining == 0:
+                finish(job)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def sync_mirror(directory: str, concurrency: int = 16, rate: Optional[float] = None,
+                refresh: bool = False, max_retries: int = 3, client=None,
+                shards: Optional[Iterable[int]] = None, verbose: bool = True) -> SyncStats:
+    """
+    Скачивает зеркало в directory не больше чем concurrency запросами одновременно.
+
+    Готовые шарды пропускаются, поэтому прерванная синхронизация
+    продолжается с места остановки. С refresh=True все шарды
+    перепроверяются условными запросами (If-None-Match по сохраненным
+    ETag): неизменившиеся диапазоны берутся из текущего шарда, шард
+    перезаписывается только при изменениях. Шард с ошибкой хотя бы
+    одного диапазона не записывается и будет скачан при следующем запуске.
+    """
+    from async_breach import DEFAULT_RATE
+    from breach_client import get_default_client
+
+    os.makedirs(directory, exist_ok=True)
+    shards = list(shards) if shards is not None else list(range(SHARD_COUNT))
+    stats = SyncStats(len(shards))
+    if client is None:
+        client = get_default_client()
+    asyncio.run(_sync_async(directory, shards, stats, concurrency, rate or DEFAULT_RATE,
+                            max_retries, client, refresh, verbose))
+    return stats
+
+
+def _parse_shard_range(value: str) -> range:
+    """'000-0FF' или '1A3' -> диапазон номеров шардов"""
+    start, _, end = value.partition("-")
+    first = int(start, 16)
+    last = int(end, 16) if end else first
+    if not 0 <= first <= last < SHARD_COUNT:
+        raise ValueError(f"Некорректный диапазон шардов: {value}")
+    return range(first, last + 1)
+
+
+def main():
+    from breach_client import API_BASE_URL
+
+    parser = argparse.ArgumentParser(description="Локальное зеркало Pwned Passwords")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync = subparsers.add_parser("sync", help="Скачать или обновить зеркало")
+    sync.add_argument("directory", help="Каталог зеркала")
+    sync.add_argument("--concurrency", help="Одновременных запросов (по умолчанию: 16)",
+                      type=int, default=16)
+    sync.add_argument("--rate", help="Запросов в секунду (по умолчанию: 50)", type=float)
+    sync.add_argument("--refresh", help="Перепроверить скачанные шарды по ETag",
+                      action="store_true")
+    sync.add_argument("--shards", help="Только шарды из диапазона, например 000-0FF")
+    sync.add_argument("--api-url", help=f"Адрес API (по умолчанию: {API_BASE_URL})",
+                      default=API_BASE_URL)
+
+    info = subparsers.add_parser("info", help="Показать состояние зеркала")
+    info.add_argument("directory", help="Каталог зеркала")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "sync":
+            from breach_client import BreachClient
+            if args.concurrency < 1:
+                print("❌ Ошибка: --concurrency должно быть не меньше 1")
+                sys.exit(1)
+            shards = _parse_shard_range(args.shards) if args.shards else None
+            client = BreachClient(args.api_url, pool_size=args.concurrency, verbose=False)
+            print(f"🔄 Синхронизация зеркала в '{args.directory}'...")
+            try:
+                stats = sync_mirror(args.directory, args.concurrency, args.rate, args.refresh,
+                                    client=client, shards=shards)
+            finally:
+                client.close()
+            print(f"✅ Записано шардов: {stats.written}, без изменений: {stats.unchanged}, "
+                  f"уже были: {stats.skipped}, с ошибками: {stats.failed}")
+            print(f"   Запросов: {stats.requests}, ответов 304: {stats.not_modified}, "
+                  f"за {stats.as_dict()['elapsed_seconds']:.1f} с")
+            if stats.failed:
+                print("   Запустите синхронизацию еще раз, чтобы докачать шарды с ошибками")
+                sys.exit(1)
+        else:
+            with PwnedMirror(args.directory) as mirror:
+                present = mirror.shards_present()
+                size = sum(os.path.getsize(_shard_path(args.directory, i))
+                           for i in range(SHARD_COUNT)
+                           if os.path.exists(_shard_path(args.directory, i)))
+                print(f"Шардов: {present}/{SHARD_COUNT} ({present / SHARD_COUNT:.1%})")
+                print(f"Размер: {size / 1024 / 1024:.1f} МБ")
+    except KeyboardInterrupt:
+        print("\n⚠️  Синхронизация прервана: готовые шарды сохранены, "
+              "повторный запуск продолжит с места остановки")
+        sys.exit(130)
+    except (OSError, ValueError, PwnedMirrorError) as e:
+        print(f"❌ Ошибка: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
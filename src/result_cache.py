@@ -0,0 +1,158 @@
+"""
+Модуль кэша результатов проверки паролей по SHA-1 (без хранения самих паролей)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from results import PasswordResult
+
+
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_RESULT_TTL = 24 * 3600
+
+# Результаты с этими источниками стабильны; ошибки API не кэшируются
+CACHEABLE_SOURCES = frozenset({"haveibeenpwned", "local_db", "disabled"})
+
+# Как часто фиксировать записи в SQLite
+_COMMIT_EVERY = 1000
+
+
+def password_key(password: str) -> bytes:
+    """Ключ кэша: SHA-1 пароля в сыром виде"""
+    return hashlib.sha1(password.encode('utf-8')).digest()
+
+
+class ResultCache:
+    """
+    LRU-кэш результатов check_password в памяти с необязательным
+    постоянным уровнем в SQLite и сроком жизни записей.
+
+    Ключ - SHA-1 пароля и пространство имен режима проверки (например,
+    с API или без), поэтому сами пароли никогда не сохраняются.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None,
+                 ttl: Optional[float] = DEFAULT_RESULT_TTL):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._conn = None
+
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            import sqlite3
+
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key BLOB PRIMARY KEY,"
+                " stored_at REAL NOT NULL,"
+                " result TEXT NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn.commit()
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def get(self, key: bytes, namespace: str = "") -> Optional[PasswordResult]:
+        """Возвращает результат по ключу password_key или None"""
+        full_key = namespace.encode() + b":" + key
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(full_key)
+            if entry is not None:
+                stored_at, result = entry
+                if not self._expired(stored_at, now):
+                    self._memory.move_to_end(full_key)
+                    self.hits += 1
+                    return result
+                del self._memory[full_key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT stored_at, result FROM results WHERE key = ?", (full_key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[0], now):
+                    # На диске - прежняя форма словарем, в памяти - компактная
+                    result = PasswordResult.from_dict(json.loads(row[1]))
+                    self._remember(full_key, row[0], result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def record_hit(self) -> None:
+        """Учитывает повтор, найденный вызывающим кодом без обращения к кэшу"""
+        with self._lock:
+            self.hits += 1
+
+    def put(self, key: bytes, result: PasswordResult, namespace: str = "") -> None:
+        """Сохраняет результат, если он не является временной ошибкой API"""
+        if result['breach_check'].get('source') not in CACHEABLE_SOURCES:
+            return
+
+        full_key = namespace.encode() + b":" + key
+        now = time.time()
+
+        with self._lock:
+            self._remember(full_key, now, result)
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, stored_at, result) VALUES (?, ?, ?)",
+                    (full_key, now, json.dumps(result.to_dict(), ensure_ascii=False))
+                )
+                self._pending_writes += 1
+                if self._pending_writes >= _COMMIT_EVERY:
+                    self._conn.commit()
+                    self._pending_writes = 0
+
+    def _remember(self, full_key: bytes, stored_at: float, result: PasswordResult) -> None:
+        self._memory[full_key] = (stored_at, result)
+        self._memory.move_to_end(full_key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,269 @@
+"""
+Модуль компактных результатов проверки пароля.
+
+Результат хранится не вложенными словарями, а объектом со __slots__:
+критерии сложности и флаг утечки упакованы в биты одного числа,
+вид и источник результата проверки на утечки - в код, а сообщения
+собираются только при обращении. Объекты - неизменяемые Mapping с
+прежними ключами: result['complexity']['details'] и т.д.
+
+Компактная форма используется внутри проверки файла (статистика, запись
+результатов, кэш результатов); публичные функции check_password* по-прежнему
+возвращают обычные словари (as_dict)
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from password_analyzer import DETAIL_KEYS, complexity_from_bits, strength_label
+
+
+# Источники результата, которые кодируются числом; остальные (ошибки API)
+# хранятся исходным словарем
+SOURCES = ("haveibeenpwned", "pwned_mirror", "local_db", "disabled")
+
+# Виды результата проверки на утечки
+BREACH_FOUND = 0
+BREACH_NOT_FOUND = 1
+BREACH_COMMON = 2  # Пароль из списка самых распространенных
+BREACH_LOCAL_INDEX = 3  # Найден в локальном индексе утечек
+BREACH_DISABLED = 4  # API отключен
+
+BREACH_MESSAGES = {
+    BREACH_NOT_FOUND: "Пароль не найден в известных утечках",
+    BREACH_COMMON: "Пароль найден в списке самых распространенных паролей!",
+    BREACH_LOCAL_INDEX: "Пароль найден в локальной базе утечек!",
+    BREACH_DISABLED: "Проверка через API отключена",
+}
+
+LOCAL_BREACH_COUNT = 1000000  # Условно большое число: локальные списки не хранят число утечек
+
+_BREACH_KEYS = ("breached", "count", "message", "source")
+_RESULT_KEYS = ("complexity", "breach_check", "strength_score", "is_secure")
+
+_SOURCE_BITS = 2
+_SOURCE_MASK = (1 << _SOURCE_BITS) - 1
+_SOURCE_CODES = {source: code for code, source in enumerate(SOURCES)}
+
+_DETAIL_MASK = (1 << len(DETAIL_KEYS)) - 1
+_BREACHED_BIT = 1 << len(DETAIL_KEYS)
+_POPCOUNT = tuple(bin(bits).count("1") for bits in range(_DETAIL_MASK + 1))
+
+
+def found_message(count: int) -> str:
+    return f"Пароль найден в {count:,} утечках!".replace(",", " ")
+
+
+class BreachResult(Mapping):
+    """
+    Результат проверки на утечки: код (вид << 2 | источник) и число утечек.
+    Читается как прежний словарь {"breached", "count", "message", "source"}
+    """
+
+    __slots__ = ("code", "count")
+
+    def __init__(self, kind: int, source: str, count: int = 0):
+        self.code = kind << _SOURCE_BITS | _SOURCE_CODES[source]
+        self.count = count
+
+    @property
+    def kind(self) -> int:
+        return self.code >> _SOURCE_BITS
+
+    @property
+    def breached(self) -> bool:
+        return self.code >> _SOURCE_BITS in (BREACH_FOUND, BREACH_COMMON, BREACH_LOCAL_INDEX)
+
+    @property
+    def source(self) -> str:
+        return SOURCES[self.code & _SOURCE_MASK]
+
+    @property
+    def message(self) -> str:
+        kind = self.code >> _SOURCE_BITS
+        return found_message(self.count) if kind == BREACH_FOUND else BREACH_MESSAGES[kind]
+
+    def __getitem__(self, key: str):
+        if key not in _BREACH_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_BREACH_KEYS)
+
+    def __len__(self) -> int:
+        return len(_BREACH_KEYS)
+
+    def __repr__(self) -> str:
+        return f"BreachResult({dict(self)!r})"
+
+    def to_dict(self) -> Dict:
+        return dict(self)
+
+    @classmethod
+    def found(cls, count: int, source: str = "haveibeenpwned") -> "BreachResult":
+        return cls(BREACH_FOUND, source, count)
+
+
+# Результаты без переменной части - по одному объекту на весь процесс
+NOT_FOUND_RESULTS = {source: BreachResult(BREACH_NOT_FOUND, source)
+                     for source in ("haveibeenpwned", "pwned_mirror")}
+COMMON_RESULT = BreachResult(BREACH_COMMON, "local_db", LOCAL_BREACH_COUNT)
+LOCAL_INDEX_RESULT = BreachResult(BREACH_LOCAL_INDEX, "local_db", LOCAL_BREACH_COUNT)
+DISABLED_RESULT = BreachResult(BREACH_DISABLED, "disabled")
+
+_CANONICAL = {(result.source, result.message): result for result in
+              (*NOT_FOUND_RESULTS.values(), COMMON_RESULT, LOCAL_INDEX_RESULT, DISABLED_RESULT)}
+
+Breach = Union[BreachResult, Dict]  # Ошибки API остаются словарями
+
+
+def compact_breach(breach_check) -> Breach:
+    """Словарь результата проверки на утечки в компактной форме, если она для него есть"""
+    if isinstance(breach_check, BreachResult):
+        return breach_check
+    source = breach_check.get("source")
+    if source in _SOURCE_CODES and set(breach_check) == set(_BREACH_KEYS):
+        if breach_check["breached"] and breach_check["message"] == found_message(breach_check["count"]):
+            return BreachResult.found(breach_check["count"], source)
+        canonical = _CANONICAL.get((source, breach_check["message"]))
+        if canonical is not None and canonical.count == breach_check["count"]:
+            return canonical
+    return breach_check
+
+
+class PasswordResult(Mapping):
+    """
+    Результат проверки пароля.
+
+    flags - биты критериев сложности (в порядке DETAIL_KEYS) и бит утечки,
+    breach - BreachResult (или словарь ошибки API), extra - редкие части:
+    найденные паттерны, guesses_log10, маски нарушений политик. Читается
+    как прежний словарь: {"complexity", "breach_check", "strength_score",
+    "is_secure"} и "policies", если заданы политики; вложенные словари
+    строятся при обращении, для JSON - to_dict()
+    """
+
+    __slots__ = ("flags", "strength_score", "breach", "extra")
+
+    def __init__(self, bits: int, strength_score: int, breach_check,
+                 extra: Optional[Dict] = None):
+        self.breach = compact_breach(breach_check)
+        self.flags = bits | (_BREACHED_BIT if self.breach["breached"] else 0)
+        self.strength_score = strength_score
+        self.extra = extra
+
+    @property
+    def bits(self) -> int:
+        """Битовая маска критериев сложности"""
+        return self.flags & _DETAIL_MASK
+
+    @property
+    def complexity_score(self) -> int:
+        return _POPCOUNT[self.flags & _DETAIL_MASK]
+
+    @property
+    def strength(self) -> str:
+        return strength_label(_POPCOUNT[self.flags & _DETAIL_MASK])
+
+    @property
+    def breached(self) -> bool:
+        return bool(self.flags & _BREACHED_BIT)
+
+    @property
+    def is_secure(self) -> bool:
+        return (self.flags == _DETAIL_MASK  # Все критерии и не найден в утечках
+                and self.strength_score >= 70)
+
+    @property
+    def policy_masks(self) -> Optional[Tuple[Tuple[str, ...], Sequence[int]]]:
+        """(имена политик, маски нарушенных правил) или None"""
+        return self.extra.get("policy_masks") if self.extra else None
+
+    def set_policies(self, names: Tuple[str, ...], masks: Sequence[int]) -> None:
+        if self.extra is None:
+            self.extra = {}
+        self.extra["policy_masks"] = (names, tuple(masks))
+
+    def failed_policies(self) -> List[str]:
+        names, masks = self.policy_masks
+        return [name for name, mask in zip(names, masks) if mask]
+
+    def complexity(self) -> Dict:
+        complexity = complexity_from_bits(self.flags & _DETAIL_MASK)
+        if self.extra:
+            for key in ("patterns", "guesses_log10"):
+                if key in self.extra:
+                    complexity[key] = self.extra[key]
+        return complexity
+
+    def policies(self) -> Dict[str, List[str]]:
+        from password_policy import RULES
+        names, masks = self.policy_masks
+        return {
+            name: [rule for bit, rule in enumerate(RULES) if mask >> bit & 1]
+            for name, mask in zip(names, masks)
+        }
+
+    def _keys(self) -> Tuple[str, ...]:
+        if self.extra and "policy_masks" in self.extra:
+            return _RESULT_KEYS + ("policies",)
+        return _RESULT_KEYS
+
+    def __getitem__(self, key: str):
+        if key == "strength_score":
+            return self.strength_score
+        if key == "breach_check":
+            return self.breach
+        if key == "is_secure":
+            return self.is_secure
+        if key == "complexity":
+            return self.complexity()
+        if key == "policies" and self.policy_masks is not None:
+            return self.policies()
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"PasswordResult({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        """Прежняя форма результата: вложенные обычные словари"""
+        result = dict(self)
+        result["breach_check"] = dict(self.breach)
+        return result
+
+    @classmethod
+    def from_dict(cls, result) -> "PasswordResult":
+        """Компактная форма результата в прежнем виде (например, из кэша на диске)"""
+        if isinstance(result, PasswordResult):
+            return result
+        complexity = result["complexity"]
+        details = complexity["details"]
+        bits = 0
+        for i, key in enumerate(DETAIL_KEYS):
+            if details[key]:
+                bits |= 1 << i
+        extra = {key: complexity[key] for key in ("patterns", "guesses_log10")
+                 if key in complexity} or None
+        compact = cls(bits, result["strength_score"], result["breach_check"], extra)
+        policies = result.get("policies")
+        if policies is not None:
+            from password_policy import RULES
+            compact.set_policies(tuple(policies), [
+                sum(1 << RULES.index(rule) for rule in violations)
+                for violations in policies.values()
+            ])
+        return compact
+
+
+def as_dict(result) -> Dict:
+    """Обычный словарь из компактного результата; словари возвращаются как есть"""
+    if isinstance(result, (PasswordResult, BreachResult)):
+        return result.to_dict()
+    return result
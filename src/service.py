@@ -0,0 +1,254 @@
+"""
+Модуль сервисного режима: долгоживущий HTTP-сервер проверки паролей (TCP или Unix-сокет)
+
+Запросы:
+    POST /check  {"password": "..."}          -> результат check_password
+    POST /batch  {"passwords": ["...", ...]}   -> {"results": [...]}
+    GET  /health                               -> состояние сервиса
+    GET  /metrics                              -> метрики в формате Prometheus
+"""
+
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from metrics import METRICS
+from password_analyzer import DEFAULT_ANALYZER
+from password_checker import _build_result, check_password, check_passwords_breach_batch
+
+if TYPE_CHECKING:
+    # Кэш, клиент, индекс и зеркало создает вызывающий код
+    from breach_cache import RangeCache
+    from breach_client import BreachClient
+    from breach_index import BreachIndex
+    from pwned_mirror import PwnedMirror
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_SIZE = 10000
+
+
+class ServiceError(Exception):
+    """Некорректный запрос к сервису; status - HTTP-код ответа"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class PasswordService:
+    """
+    Проверка паролей с "теплым" состоянием: анализатор, кэш диапазонов,
+    локальный индекс и пул соединений с API создаются один раз на процесс.
+    """
+
+    def __init__(self, use_api: bool = True, concurrency: int = 1,
+                 cache: Optional["RangeCache"] = None, client: Optional["BreachClient"] = None,
+                 local_index: Optional["BreachIndex"] = None,
+                 mirror: Optional["PwnedMirror"] = None):
+        self.use_api = use_api
+        self.concurrency = concurrency
+        self.breach_options = {"cache": cache, "client": client, "local_index": local_index,
+                               "mirror": mirror}
+        self.started = time.monotonic()
+        self.checked = 0
+        self._lock = threading.Lock()
+
+    def _count(self, n: int) -> None:
+        with self._lock:
+            self.checked += n
+        METRICS.inc("passwords_checked", n)
+
+    def check(self, password: str) -> Dict:
+        result = check_password(password, use_api=self.use_api, verbose=False,
+                                **self.breach_options)
+        with self._lock:
+            self.checked += 1
+        return result
+
+    def check_batch(self, passwords: List[str]) -> List[Dict]:
+        """Пакетная проверка: один запрос к API на уникальный префикс SHA-1"""
+        with METRICS.stage("analysis"):
+            analyzed = [DEFAULT_ANALYZER.analyze(password) for password in passwords]
+        with METRICS.stage("breach_check"):
+            breach_checks = check_passwords_breach_batch(
+                passwords, self.use_api, concurrency=self.concurrency, **self.breach_options
+            )
+        self._count(len(passwords))
+        return [
+            _build_result(complexity, breach_check, strength_score, password)
+            for password, (complexity, strength_score), breach_check
+            in zip(passwords, analyzed, breach_checks)
+        ]
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": time.monotonic() - self.started,
+            "checked": self.checked,
+            "use_api": self.use_api,
+        }
+
+
+def _parse_password(value) -> str:
+    if not isinstance(value, str) or not value:
+        raise ServiceError(400, "Пароль должен быть непустой строкой")
+    return value
+
+
+def _handle_request(service: PasswordService, method: str, path: str,
+                    payload: Optional[Dict]) -> Tuple[int, object]:
+    """Маршрутизация: возвращает (HTTP-код, тело ответа)"""
+    if method == "GET":
+        if path == "/health":
+            return 200, service.health()
+        if path == "/metrics":
+            return 200, METRICS.to_prometheus()
+        raise ServiceError(404, "Неизвестный адрес")
+
+    if path == "/check":
+        return 200, service.check(_parse_password(payload.get("password")))
+
+    if path == "/batch":
+        passwords = payload.get("passwords")
+        if not isinstance(passwords, list):
+            raise ServiceError(400, "Поле passwords должно быть списком")
+        if len(passwords) > MAX_BATCH_SIZE:
+            raise ServiceError(413, f"Не больше {MAX_BATCH_SIZE} паролей в одном запросе")
+        return 200, {"results": service.check_batch([_parse_password(p) for p in passwords])}
+
+    raise ServiceError(404, "Неизвестный адрес")
+
+
+def _make_handler(service: PasswordService, log_requests: bool = False, tcp: bool = True):
+
+    class ServiceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Ответ уходит одним пакетом, без ожидания задержанного ACK (только для TCP)
+        disable_nagle_algorithm = tcp
+
+        def do_GET(self):
+            self._dispatch("GET", None)
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0 or length > MAX_BODY_BYTES:
+                self._send(413 if length > 0 else 400, {"error": "Некорректный размер запроса"})
+                self.close_connection = True
+                return
+
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except (UnicodeDecodeError, ValueError):
+                self._send(400, {"error": "Тело запроса должно быть JSON"})
+                return
+            if not isinstance(payload, dict):
+                self._send(400, {"error": "Тело запроса должно быть JSON-объектом"})
+                return
+            self._dispatch("POST", payload)
+
+        def _dispatch(self, method: str, payload: Optional[Dict]):
+            started = time.perf_counter()
+            path = self.path.split("?", 1)[0]
+            try:
+                status, body = _handle_request(service, method, path, payload)
+            except ServiceError as e:
+                status, body = e.status, {"error": str(e)}
+            except Exception as e:  # Ошибка проверки не должна ронять сервис
+                status, body = 500, {"error": f"Внутренняя ошибка: {e}"}
+            self._send(status, body)
+            METRICS.observe("request", time.perf_counter() - started)
+
+        def _send(self, status: int, body) -> None:
+            if isinstance(body, str):
+                data = body.encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                content_type = "application/json; charset=utf-8"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def address_string(self):
+            # У Unix-сокета нет адреса клиента
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, format, *args):
+            # Пароли передаются только в теле запроса, в журнал попадает лишь адрес
+            if log_requests:
+                super().log_message(format, *args)
+
+    return ServiceHandler
+
+
+class UnixThreadingHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP-сервер на Unix-сокете: каждый запрос в отдельном потоке"""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def create_server(service: PasswordService, host: str = DEFAULT_HOST,
+                  port: int = DEFAULT_PORT, unix_socket: Optional[str] = None,
+                  log_requests: bool = False):
+    """Создает сервер на TCP-адресе или на Unix-сокете (доступ только владельцу)"""
+    handler = _make_handler(service, log_requests, tcp=not unix_socket)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)  # Сокет, оставшийся от прошлого запуска
+        server = UnixThreadingHTTPServer(unix_socket, handler)
+        os.chmod(unix_socket, 0o600)
+        return server
+
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_listen(value: str) -> Tuple[str, int]:
+    """Разбирает адрес вида HOST:PORT или PORT"""
+    host, _, port = value.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Некорректный адрес: {value}")
+    return host or DEFAULT_HOST, int(port)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(service: PasswordService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          unix_socket: Optional[str] = None, log_requests: bool = False) -> None:
+    """Запускает сервис и обслуживает запросы до Ctrl+C или SIGTERM"""
+    server = create_server(service, host, port, unix_socket, log_requests)
+    # Остановка менеджером процессов завершает сервис так же аккуратно, как Ctrl+C
+    signal.signal(signal.SIGTERM, _interrupt)
+    address = f"unix:{unix_socket}" if unix_socket else f"http://{host}:{server.server_port}"
+    mode = "с проверкой через API" if service.use_api else "только локальная проверка"
+    print(f"🚀 Сервис проверки паролей: {address} ({mode})")
+    print("   POST /check, POST /batch, GET /health, GET /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Сервис остановлен. Проверено паролей: {service.checked}")
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
@@ -3,11 +3,14 @@
 Скрипт для тестирования подключения к API
 """
 
+import argparse
 import requests
 import socket
 import ssl
 import sys
 
+from breach_client import API_BASE_URL
+
 
 def check_internet_connection():
     """Проверяет наличие интернет-соединения"""
@@ -23,14 +26,14 @@ def check_internet_connection():
         return False
 
 
-def check_api_availability():
-    """Проверяет доступность API HaveIBeenPwned"""
-    print("\n🔍 Проверка доступности API HaveIBeenPwned...")
+def check_api_availability(base_url=API_BASE_URL):
+    """Проверяет доступность API HaveIBeenPwned (или сервера по адресу base_url)"""
+    print(f"\n🔍 Проверка доступности API HaveIBeenPwned ({base_url})...")
     
     try:
         # Пробуем простой запрос
         response = requests.get(
-            "https://api.pwnedpasswords.com/range/5BAA6",
+            f"{base_url.rstrip('/')}/range/5BAA6",
             headers={'User-Agent': 'Connection-Test'},
             timeout=10
         )
@@ -96,10 +99,28 @@ def check_ssl_certificates():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Диагностика подключения к API")
+    parser.add_argument(
+        "--api-url",
+        help=f"Адрес API диапазонов хешей (по умолчанию: {API_BASE_URL})",
+        default=API_BASE_URL,
+        metavar="URL"
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🛠️  ДИАГНОСТИКА ПОДКЛЮЧЕНИЯ К API")
     print("=" * 60)
     
+    if args.api_url != API_BASE_URL:
+        # Для локального сервера интернет и сертификаты не нужны
+        if check_api_availability(args.api_url):
+            print("\n🎉 Сервер отвечает, используйте: "
+                  f"python src/main.py -c 'пароль' --api-url {args.api_url}")
+        else:
+            sys.exit(1)
+        return
+    
     tests_passed = 0
     total_tests = 4
     
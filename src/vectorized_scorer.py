@@ -0,0 +1,140 @@
+"""
+Модуль векторной оценки силы паролей пакетами с помощью NumPy
+"""
+
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость
+    np = None
+
+from password_analyzer import COMMON_PASSWORDS, DEFAULT_ANALYZER
+
+
+DEFAULT_CHUNK_SIZE = 100000  # Паролей в одном блоке массива
+MAX_VECTOR_LENGTH = 64  # Более длинные пароли оцениваются скалярно
+VECTOR_ENGINE = "classic"  # Векторно считается только классическая формула оценки
+
+# Самый длинный пароль из списка распространенных - короче совпасть не может
+_COMMON_MAX_LENGTH = max(len(p) for p in COMMON_PASSWORDS)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Для векторной оценки нужен numpy: pip install numpy")
+
+
+def _score_ascii(codepoints: "np.ndarray", lengths: "np.ndarray") -> "np.ndarray":
+    """
+    Оценка для паролей только из ASCII без NUL: те же признаки, что и в
+    check_password_strength_score, но операциями над всем массивом сразу
+    """
+    n, width = codepoints.shape
+    columns = np.arange(width)
+    valid = columns[None, :] < lengths[:, None]
+
+    is_lower = (codepoints >= 97) & (codepoints <= 122)
+    is_upper = (codepoints >= 65) & (codepoints <= 90)
+    is_digit = (codepoints >= 48) & (codepoints <= 57)
+    is_other = valid & ~(is_lower | is_upper | is_digit)
+
+    # Длина пароля (максимум 30 баллов)
+    score = np.where(lengths >= 12, 30, np.where(lengths >= 8, 20,
+                                                 np.where(lengths >= 6, 10, 0)))
+
+    # Разнообразие символов (максимум 40 баллов)
+    char_types = (
+        is_lower.any(axis=1).astype(np.int64)
+        + is_upper.any(axis=1)
+        + is_digit.any(axis=1)
+        + is_other.any(axis=1)
+    )
+    score = score + char_types * 10
+
+    # Энтропия (максимум 30 баллов): число уникальных символов по отсортированной строке
+    padded = np.where(valid, codepoints, np.uint32(0xFFFFFFFF))
+    padded.sort(axis=1)
+    if width > 1:
+        changes = (padded[:, 1:] != padded[:, :-1]) & valid[:, 1:]
+        unique_chars = 1 + changes.sum(axis=1)
+    else:
+        unique_chars = np.ones(n, dtype=np.int64)
+    safe_lengths = np.maximum(lengths, 1)
+    entropy = np.minimum(unique_chars / safe_lengths * 30, 30)
+    score = score + entropy
+
+    # Штрафы за слабые паттерны: 3+ одинаковых символа подряд (кроме перевода строки)
+    if width >= 3:
+        runs = (
+            (codepoints[:, :-2] == codepoints[:, 1:-1])
+            & (codepoints[:, 1:-1] == codepoints[:, 2:])
+            & valid[:, 2:]
+            & (codepoints[:, :-2] != 10)
+        ).any(axis=1)
+        score = score - np.where(runs, 20, 0)
+
+    only_digits = (is_digit | ~valid).all(axis=1)
+    only_alpha = ((is_lower | is_upper) | ~valid).all(axis=1)
+    score = score - np.where(only_digits | only_alpha, 15, 0)
+
+    # Пароль из списка распространенных (сравнение в нижнем регистре)
+    common_width = min(width, _COMMON_MAX_LENGTH)
+    short = lengths <= _COMMON_MAX_LENGTH
+    if short.any():
+        lowered = np.where(is_upper, codepoints + 32, codepoints)[:, :common_width]
+        keys = np.ascontiguousarray(lowered.astype(np.uint8)).view(f"S{common_width}").ravel()
+        common = np.array(
+            sorted(p.encode() for p in COMMON_PASSWORDS if len(p) <= common_width),
+            dtype=f"S{common_width}"
+        )
+        is_common = short & np.isin(keys, common)
+        score = np.where(is_common, 0, score)
+
+    score = np.trunc(score).astype(np.int64)
+    score = np.where(lengths == 0, 0, score)
+    return np.clip(score, 0, 100)
+
+
+def score_batch(passwords: Sequence[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> "np.ndarray":
+    """
+    Оценка силы (0-100) для пакета паролей, совпадающая с
+    check_password_strength_score для каждого элемента.
+
+    Пароли из ASCII без NUL и не длиннее MAX_VECTOR_LENGTH считаются
+    векторно; остальные (редкие) - скалярным анализатором. С другим
+    движком оценки (configure_engine) весь пакет считается скалярно.
+    """
+    _require_numpy()
+    if not isinstance(passwords, list):
+        passwords = list(passwords)
+    if DEFAULT_ANALYZER.engine != VECTOR_ENGINE:
+        strength_score = DEFAULT_ANALYZER.strength_score
+        return np.fromiter(map(strength_score, passwords), dtype=np.int64, count=len(passwords))
+    scores = np.zeros(len(passwords), dtype=np.int64)
+
+    for start in range(0, len(passwords), chunk_size):
+        chunk = np.array(passwords[start:start + chunk_size], dtype=object)
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        scalar = lengths > MAX_VECTOR_LENGTH
+
+        rows = np.flatnonzero(~scalar)
+        if len(rows):
+            row_lengths = lengths[rows]
+            width = max(1, int(row_lengths.max()))
+            # Массив кодовых точек фиксированной ширины: строка на пароль
+            codepoints = chunk[rows].astype(f"<U{width}").view(np.uint32)
+            codepoints = codepoints.reshape(len(rows), width)
+
+            # Не-ASCII символы и NUL оцениваются скалярно: у них свои правила Unicode
+            valid = np.arange(width)[None, :] < row_lengths[:, None]
+            special = (valid & ((codepoints >= 128) | (codepoints == 0))).any(axis=1)
+            scalar[rows[special]] = True
+
+            keep = ~special
+            scores[start + rows[keep]] = _score_ascii(codepoints[keep], row_lengths[keep])
+
+        for i in np.flatnonzero(scalar):
+            scores[start + i] = DEFAULT_ANALYZER.strength_score(chunk[i])
+
+    return scores
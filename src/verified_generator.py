@@ -0,0 +1,188 @@
+"""
+Модуль конвейерной генерации паролей с проверкой: слабые и найденные
+в утечках кандидаты отбрасываются и заменяются новыми
+"""
+
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from async_breach import DEFAULT_RATE, TokenBucket, _fetch_range_async
+from breach_cache import RangeCache
+from breach_client import BreachClient, PasswordAPIError, get_default_client
+from metrics import METRICS
+from password_analyzer import DEFAULT_ANALYZER
+from password_checker import _build_result, _local_breach_result, _match_range_suffix
+from password_generator import generate_batch
+
+if TYPE_CHECKING:
+    from breach_index import BreachIndex
+    from pwned_mirror import PwnedMirror
+
+
+DEFAULT_MIN_SCORE = 70  # Порог is_secure для числовой оценки
+DEFAULT_IN_FLIGHT = 16
+CANDIDATE_BATCH = 256
+
+# Сколько кандидатов можно перебрать на один выданный пароль, прежде чем
+# признать порог недостижимым для такой длины
+MAX_CANDIDATES_PER_PASSWORD = 1000
+
+# Столько ошибок API подряд означает, что проверка сейчас невозможна
+MAX_CONSECUTIVE_ERRORS = 10
+
+Candidate = Tuple[str, Dict, int]  # Пароль, анализ сложности, оценка 0-100
+
+
+class VerifiedGenerator:
+    """
+    Генерирует пароли, которые набирают не меньше min_score и не найдены в утечках.
+
+    Кандидаты оцениваются локально сразу после генерации; прошедшие порог
+    проверяются через API параллельно, одновременно в проверке держится
+    до in_flight кандидатов. Поэтому скорость выдачи ограничена частотой
+    запросов, а не задержкой каждого ответа. Кандидат, которого не удалось
+    проверить из-за ошибки API, не выдается.
+    """
+
+    def __init__(self, length: int = 12, min_score: int = DEFAULT_MIN_SCORE,
+                 use_api: bool = True, in_flight: int = DEFAULT_IN_FLIGHT,
+                 max_retries: int = 2, rate: Optional[float] = None,
+                 cache: Optional[RangeCache] = None,
+                 client: Optional[BreachClient] = None,
+                 local_index: Optional["BreachIndex"] = None,
+                 mirror: Optional["PwnedMirror"] = None):
+        if in_flight < 1:
+            raise ValueError("Число кандидатов в проверке должно быть не меньше 1")
+        self.length = length
+        self.min_score = min_score
+        self.use_api = use_api
+        self.in_flight = in_flight
+        self.max_retries = max_retries
+        self.rate = rate
+        self.cache = cache
+        self.client = client
+        self.local_index = local_index
+        self.mirror = mirror
+
+        self.generated = 0
+        self.rejected_weak = 0
+        self.rejected_breached = 0
+        self.unverified = 0
+        self.accepted = 0
+
+    def _candidates(self, count: int) -> Iterator[Candidate]:
+        """Кандидаты, прошедшие локальную оценку"""
+        limit = count * MAX_CANDIDATES_PER_PASSWORD
+        while True:
+            for raw in generate_batch(CANDIDATE_BATCH, self.length):
+                if self.generated >= limit:
+                    raise ValueError(f"Пароли длины {self.length} почти не набирают "
+                                     f"оценку {self.min_score}: уменьшите порог или "
+                                     f"увеличьте длину")
+                self.generated += 1
+                password = raw.decode('ascii')
+                complexity, strength_score = DEFAULT_ANALYZER.analyze(password)
+                if strength_score < self.min_score:
+                    self.rejected_weak += 1
+                    METRICS.inc("candidates_rejected_weak")
+                    continue
+                yield password, complexity, strength_score
+
+    async def _verify(self, candidate: Candidate, client: BreachClient,
+                      limiter: TokenBucket, executor: ThreadPoolExecutor):
+        """Проверка кандидата по диапазону его префикса: (кандидат, результат, ошибка)"""
+        sha1_hash = hashlib.sha1(candidate[0].encode('utf-8')).hexdigest().upper()
+        prefix, suffix = sha1_hash[:5], sha1_hash[5:]
+
+        body = self.cache.get(prefix) if self.cache is not None else None
+        if body is None:
+            body, error = await _fetch_range_async(prefix, client, limiter, executor,
+                                                     self.max_retries)
+            if error is not None:
+                return candidate, None, error
+            if self.cache is not None:
+                self.cache.put(prefix, body)
+
+        return candidate, _match_range_suffix(body, suffix), None
+
+    async def _run(self, count: int,
+                   on_accept: Optional[Callable[[str, Dict], None]]) -> List[Tuple[str, Dict]]:
+        accepted: List[Tuple[str, Dict]] = []
+        candidates = self._candidates(count)
+        pending = set()
+        consecutive_errors = 0
+
+        def accept(candidate: Candidate, breach_check: Dict) -> None:
+            password, complexity, strength_score = candidate
+            if breach_check["breached"]:
+                self.rejected_breached += 1
+                METRICS.inc("candidates_rejected_breached")
+                return
+            result = _build_result(complexity, breach_check, strength_score)
+            accepted.append((password, result))
+            self.accepted += 1
+            METRICS.inc("passwords_generated")
+            if on_accept is not None:
+                on_accept(password, result)
+
+        client = None
+        rate = self.rate
+        if rate is None:
+            rate = self.client.rate if self.client is not None else DEFAULT_RATE
+        limiter = TokenBucket(rate, capacity=self.in_flight)
+        with ThreadPoolExecutor(max_workers=self.in_flight) as executor:
+            while len(accepted) < count:
+                # Не больше кандидатов, чем осталось выдать: лишних запросов к API нет
+                while len(pending) < min(self.in_flight, count - len(accepted)):
+                    candidate = next(candidates)
+                    local_result = _local_breach_result(candidate[0], self.use_api,
+                                                        self.local_index, self.mirror)
+                    if local_result is not None:
+                        accept(candidate, local_result)
+                        continue
+                    if client is None:
+                        client = self.client or get_default_client()
+                    pending.add(asyncio.ensure_future(
+                        self._verify(candidate, client, limiter, executor)
+                    ))
+
+                if not pending:
+                    continue
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    candidate, breach_check, error = task.result()
+                    if error is None:
+                        consecutive_errors = 0
+                        accept(candidate, breach_check)
+                        continue
+
+                    self.unverified += 1
+                    consecutive_errors += 1
+                    if (error["source"] == "circuit_open"
+                            or consecutive_errors >= MAX_CONSECUTIVE_ERRORS):
+                        for other in pending:
+                            other.cancel()
+                        raise PasswordAPIError(error["message"])
+
+        return accepted
+
+    def run(self, count: int,
+            on_accept: Optional[Callable[[str, Dict], None]] = None) -> List[Tuple[str, Dict]]:
+        """
+        Возвращает count пар (пароль, результат проверки) в порядке готовности.
+        on_accept вызывается для каждого пароля сразу, как только он проверен.
+        """
+        return asyncio.run(self._run(count, on_accept))
+
+    def stats(self) -> Dict:
+        """Счетчики сгенерированных и отброшенных кандидатов"""
+        return {
+            "generated": self.generated,
+            "rejected_weak": self.rejected_weak,
+            "rejected_breached": self.rejected_breached,
+            "unverified": self.unverified,
+            "accepted": self.accepted,
+        }